@@ -0,0 +1,75 @@
+"""
+Query latency of the metrics history store on a synthetic history.
+
+Records N commits touching a handful of files each (skewed towards a few
+hot files, as in real repositories) into a throwaway SQLite file, then times
+churn, hotspot and trend queries over the whole history and over the last
+200 commits.
+
+Usage:
+    uv run python -m benchmarks.bench_history [commits]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from dev_manager_agent.history import MetricsHistory
+
+REPO = "bench/history"
+
+
+def populate(history: MetricsHistory, commit_count: int, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    paths = [f"src/pkg_{i % 40}/module_{i}.py" for i in range(2000)]
+    started = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    for index in range(commit_count):
+        files = []
+        for path in {paths[min(int(rng.paretovariate(1.2)) - 1, len(paths) - 1)] for _ in range(rng.randint(1, 8))}:
+            files.append({
+                "filename": path,
+                "status": "modified",
+                "additions": rng.randint(1, 120),
+                "deletions": rng.randint(0, 60),
+                "loc": rng.randint(50, 2000),
+                "complexity": rng.randint(1, 40),
+                "findings": int(rng.random() < 0.05),
+                "review_issues": int(rng.random() < 0.2),
+            })
+        commit = {
+            "sha": f"{index:040x}",
+            "author": f"dev{index % 12}",
+            "date": (started + timedelta(hours=3 * index)).isoformat(),
+            "message": f"Change {index}",
+        }
+        history.record(REPO, commit, files)
+
+
+def timed(label: str, fn, repeat: int = 20) -> None:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"{label:<34} {(time.perf_counter() - started) / repeat * 1000:7.2f} ms")
+
+
+def main():
+    commit_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        history = MetricsHistory(os.path.join(directory, "history.db"))
+        started = time.perf_counter()
+        populate(history, commit_count)
+        print(f"{commit_count} commits recorded in {time.perf_counter() - started:.1f} s: {history.summary(REPO)}")
+
+        timed("churn, whole history", lambda: history.churn(REPO))
+        timed("churn, last 200 commits", lambda: history.churn(REPO, last_commits=200))
+        timed("hotspots, whole history", lambda: history.hotspots(REPO))
+        timed("hotspots, last 200 commits", lambda: history.hotspots(REPO, last_commits=200))
+        timed("trend per week, whole history", lambda: history.trend(REPO))
+        timed("trend per commit, last 200", lambda: history.trend(REPO, last_commits=200, bucket="commit"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Files/sec of the whole-repository scan, streamed from a tar archive, inline
+versus on a process pool.
+
+A throwaway git repository with generated source files (plus vendored and
+binary noise that must be skipped) is scanned through REPO_CHECKOUT_PATH with
+ref=HEAD, so every run reads the tree through ``git archive`` exactly like a
+mirror-backed scan.
+
+Usage:
+    uv run python -m benchmarks.bench_repo_scan [files] [workers]
+"""
+import os
+import sys
+import random
+import string
+import tempfile
+import subprocess
+
+from security_agent.repo_scan import run_repository_scan
+
+
+def generate_repo(root: str, file_count: int, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    for index in range(file_count):
+        lines = []
+        for block in range(rng.randint(5, 40)):
+            lines.append(f"def handler_{block}(request, items):")
+            lines.append("    total = 0")
+            lines.append("    for item in items:")
+            lines.append("        if item.enabled and item.price > 0:")
+            lines.append("            total += item.price * item.quantity")
+            if rng.random() < 0.05:
+                lines.append('    cursor.execute("SELECT * FROM users WHERE id = " + request.user_id)')
+            if rng.random() < 0.02:
+                lines.append('    api_key = "' + "".join(rng.choices(string.ascii_letters + string.digits, k=32)) + '"')
+            lines.append("    return total")
+            lines.append("")
+        path = os.path.join(root, "src", f"pkg_{index % 50}", f"module_{index}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as handle:
+            handle.write("\n".join(lines))
+
+    # Noise the scan has to skip
+    os.makedirs(os.path.join(root, "node_modules", "lib"), exist_ok=True)
+    for index in range(file_count // 10):
+        with open(os.path.join(root, "node_modules", "lib", f"dep_{index}.js"), "w") as handle:
+            handle.write("module.exports = function () { return eval('1 + 1'); };\n" * 50)
+        with open(os.path.join(root, "src", f"image_{index}.png"), "wb") as handle:
+            handle.write(bytes(rng.getrandbits(8) for _ in range(2048)))
+
+    subprocess.run(["git", "init", "--quiet", root], check=True)
+    subprocess.run(["git", "-C", root, "add", "-A"], check=True)
+    subprocess.run(
+        ["git", "-C", root, "-c", "user.name=bench", "-c", "user.email=bench@example.com",
+         "commit", "--quiet", "-m", "bench"],
+        check=True,
+    )
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(2, os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_repo(root, file_count)
+        os.environ["REPO_CHECKOUT_PATH"] = root
+        print(f"{file_count} source files (+ vendored and binary files to skip)")
+        for label, count in (("inline", 1), (f"{workers} workers", workers)):
+            totals = run_repository_scan("HEAD", workers=count)["totals"]
+            print(f"{label:<12} {totals['files_scanned']:6d} files  {totals['bytes_scanned'] / 1e6:6.1f} MB  "
+                  f"{totals['elapsed_seconds']:6.2f} s  {totals['files_per_second']:8.1f} files/s  "
+                  f"skipped {totals['skipped_by_reason']}  findings {totals['findings_by_category']}")
+
+
+if __name__ == "__main__":
+    main()
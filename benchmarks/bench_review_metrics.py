@@ -0,0 +1,116 @@
+"""
+Cost of the reviewer's three metric tools run back to back, before and after the fused analyzer.
+
+The fused analyzer also runs the AST complexity analysis, which dominates a
+cold run; repeated tool calls on the same code are served from the cache.
+
+Usage:
+    uv run python -m benchmarks.bench_review_metrics [size_mb]
+"""
+import sys
+import time
+import random
+
+from common.metrics import MetricsCache, compute_metrics
+from common.complexity import analyze_complexity
+
+
+def generate_content(size_bytes: int, seed: int = 3) -> str:
+    """
+    Builds Python-like code with functions, nested loops and the odd print/TODO.
+    """
+    rng = random.Random(seed)
+    blocks = [
+        "def process(items):\n    total = 0\n    for item in items:\n        total += item.value\n    return total\n",
+        "def pairs(a, b):\n    for x in a:\n        for y in b:\n            yield x, y\n",
+        "class Handler:\n    def handle(self, request):\n        try:\n            return self.dispatch(request)\n        except Exception:\n            raise\n",
+        "# TODO: remove once the migration is done\nprint('debug')\n",
+        "\n",
+    ]
+    parts = []
+    size = 0
+    while size < size_bytes:
+        block = rng.choice(blocks)
+        parts.append(block)
+        size += len(block)
+    return "".join(parts)
+
+
+def legacy_review(code_content: str):
+    """
+    The three tools as they were: each one re-splits and re-scans the code.
+    """
+    lines = code_content.splitlines()
+    num_functions = 0
+    max_indent = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("def ") or stripped.startswith("function "):
+            num_functions += 1
+        max_indent = max(max_indent, len(line) - len(line.lstrip()))
+    quality = {"loc": len(lines), "function_count": num_functions, "max_indentation_depth": max_indent}
+
+    issues = []
+    if "print(" in code_content:
+        issues.append("print")
+    if "TODO" in code_content:
+        issues.append("todo")
+    if "except Exception:" in code_content or "except:" in code_content:
+        issues.append("except")
+
+    suggestions = []
+    lines = code_content.splitlines()
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("for ") or stripped.startswith("while "):
+            indent_level = len(line) - len(line.lstrip())
+            if i + 1 < len(lines):
+                next_line = lines[i + 1]
+                next_stripped = next_line.strip()
+                next_indent = len(next_line) - len(next_line.lstrip())
+                if (next_stripped.startswith("for ") or next_stripped.startswith("while ")) and next_indent > indent_level:
+                    suggestions.append(i + 1)
+    return quality, issues, suggestions
+
+
+def fused_three_calls(cache: MetricsCache, code_content: str):
+    # What the LLM typically does: three tool calls on the same code
+    return (
+        cache.get(code_content).quality(),
+        cache.get(code_content).best_practices(),
+        cache.get(code_content).optimizations(),
+    )
+
+
+def measure(label: str, fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {best * 1000:8.1f} ms")
+    return best
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    content = generate_content(int(size_mb * 1024 * 1024))
+    print(f"Reviewing {size_mb} MB ({content.count(chr(10))} lines)")
+
+    legacy = legacy_review(content)
+    fused = compute_metrics(content)
+    assert legacy[0]["function_count"] == fused.function_count
+
+    baseline = measure("legacy: three separate passes", lambda: legacy_review(content))
+    measure("complexity analysis alone (AST)", lambda: analyze_complexity(content))
+    cold = measure("fused: three calls, cold cache", lambda: fused_three_calls(MetricsCache(), content))
+    warm_cache = MetricsCache()
+    warm_cache.get(content)
+    warm = measure("fused: three calls, warm cache", lambda: fused_three_calls(warm_cache, content))
+    print(f"speedup cold: {baseline / cold:.2f}x   warm: {baseline / warm:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Per-request latency and memory of the remote (one process per agent, HTTP) and
+local (AGENT_TOPOLOGY=local, one process) topologies.
+
+Each request scans and reviews the same synthetic commit diff on
+security_agent and reviewer_agent, which is what the Dev Manager does for
+every commit. LLM time is excluded; it is the same in both topologies.
+
+Usage:
+    uv run python -m benchmarks.bench_topology [requests] [files_per_commit]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import statistics
+import subprocess
+
+import httpx
+
+AGENTS = ("security_agent", "reviewer_agent")
+
+
+def generate_files(file_count: int, lines_per_file: int = 200):
+    """
+    A commit's "files" list as returned by analyze_code_changes.
+    """
+    files = []
+    for index in range(file_count):
+        added = "\n".join(
+            f"+    value_{i} = compute(item_{i}, retries=3)  # step {i}" if i % 50 else "+    print(query)"
+            for i in range(lines_per_file)
+        )
+        files.append({"filename": f"src/module_{index}.py", "patch": f"@@ -1,1 +1,{lines_per_file + 1} @@\n def handler():\n{added}"})
+    return files
+
+
+def rss_mb(pid: int) -> float:
+    # Linux only: resident set size from /proc
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def summarize(label: str, latencies, memory_mb: float, processes: int) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<8} p50 {statistics.median(latencies) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms   "
+          f"RSS {memory_mb:7.1f} MB in {processes} process(es)")
+
+
+def run_local(requests: int, file_count: int) -> None:
+    """
+    Runs in a child process so its memory is measured on its own.
+    """
+    from security_agent.agent import scan_commit_changes
+    from reviewer_agent.agent import review_commit_changes
+
+    files = generate_files(file_count)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        scan_commit_changes(files)
+        review_commit_changes(files)
+        latencies.append(time.perf_counter() - start)
+    print(json.dumps({"latencies": latencies, "rss_mb": rss_mb(os.getpid())}))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def run_remote(requests: int, file_count: int):
+    ports = {name: free_port() for name in AGENTS}
+    servers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{name}.agent:app", "--port", str(port), "--log-level", "warning"],
+            stdout=subprocess.DEVNULL,
+        )
+        for name, port in ports.items()
+    ]
+    try:
+        for port in ports.values():
+            wait_until_up(f"http://127.0.0.1:{port}/")
+
+        files = {"files": generate_files(file_count)}
+        latencies = []
+        with httpx.Client(timeout=60.0) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.post(f"http://127.0.0.1:{ports['security_agent']}/scan/diff", json=files).raise_for_status()
+                client.post(f"http://127.0.0.1:{ports['reviewer_agent']}/review/diff", json=files).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        memory = sum(rss_mb(server.pid) for server in servers) + rss_mb(os.getpid())
+        return latencies, memory
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--local-child":
+        run_local(int(sys.argv[2]), int(sys.argv[3]))
+        return
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{requests} requests, {file_count} files x 200 added lines per commit")
+
+    child = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_topology", "--local-child", str(requests), str(file_count)],
+        capture_output=True, text=True, check=True,
+    )
+    local = json.loads(child.stdout.strip().splitlines()[-1])
+    summarize("local", local["latencies"], local["rss_mb"], 1)
+
+    latencies, memory = run_remote(requests, file_count)
+    summarize("remote", latencies, memory, len(AGENTS) + 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import re
+import ast
+from typing import List, Dict, Any, Optional
+
+# Methods whose cost grows with the container; one call per iteration makes the loop quadratic
+EXPENSIVE_METHODS = {
+    "index": "list.index() scans the whole list",
+    "count": "count() scans the whole container",
+    "remove": "list.remove() scans and shifts the list",
+    "indexOf": "indexOf() scans the whole array",
+    "includes": "includes() scans the whole array",
+    "lastIndexOf": "lastIndexOf() scans the whole array",
+    "splice": "splice() shifts the array",
+}
+# Calls that are only expensive with a leading 0 (shift everything after the front)
+FRONT_SHIFTING_METHODS = {
+    "insert": "list.insert(0, ...) shifts the whole list; use collections.deque",
+    "pop": "list.pop(0) shifts the whole list; use collections.deque",
+}
+
+
+def analyze_complexity(code_content: str) -> Dict[str, Any]:
+    """
+    Measures loop nesting, cyclomatic complexity and loop hotspots in linear time.
+
+    Python is analyzed from its AST; anything that does not parse as Python
+    (JavaScript, Go, Java, ...) falls back to a tokenizer that skips strings
+    and comments and follows braces.
+
+    Returns:
+        A dictionary with language ("python" or "generic"), max_loop_depth,
+        max_complexity, functions (name, line, complexity, max_loop_depth) and
+        hotspots (line, kind, message).
+    """
+    try:
+        analyzer = _PythonAnalyzer()
+        analyzer.visit(ast.parse(code_content))
+        language = "python"
+    except (SyntaxError, ValueError, RecursionError):
+        # Not Python, or nested too deeply for the recursive AST walk
+        analyzer = _GenericAnalyzer()
+        analyzer.run(code_content)
+        language = "generic"
+
+    return {
+        "language": language,
+        "max_loop_depth": analyzer.max_loop_depth,
+        "max_complexity": max((f["complexity"] for f in analyzer.functions), default=analyzer.module_complexity),
+        "functions": analyzer.functions,
+        "hotspots": analyzer.hotspots,
+    }
+
+
+class _Counters:
+    """
+    Loop depth and complexity bookkeeping shared by both analyzers.
+    """
+
+    def __init__(self):
+        self.functions: List[Dict[str, Any]] = []
+        self.hotspots: List[Dict[str, Any]] = []
+        self.max_loop_depth = 0
+        self.module_complexity = 1
+        self.loop_depth = 0
+        self._function_stack: List[Dict[str, Any]] = []
+
+    def add_decision(self, count: int = 1) -> None:
+        if self._function_stack:
+            self._function_stack[-1]["complexity"] += count
+        else:
+            self.module_complexity += count
+
+    def enter_function(self, name: str, line: int) -> int:
+        record = {"name": name, "line": line, "complexity": 1, "max_loop_depth": 0}
+        self.functions.append(record)
+        self._function_stack.append(record)
+        # A function body runs when called, not once per iteration of an enclosing loop
+        outer_depth, self.loop_depth = self.loop_depth, 0
+        return outer_depth
+
+    def exit_function(self, outer_depth: int) -> None:
+        self._function_stack.pop()
+        self.loop_depth = outer_depth
+
+    def enter_loop(self, line: int) -> None:
+        self.loop_depth += 1
+        self.add_decision()
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+        if self._function_stack:
+            record = self._function_stack[-1]
+            record["max_loop_depth"] = max(record["max_loop_depth"], self.loop_depth)
+        if self.loop_depth >= 2:
+            self.hotspot(line, "nested_loop", f"Loop nested {self.loop_depth} deep: O(N^{self.loop_depth}) if each loop grows with the input.")
+
+    def exit_loop(self) -> None:
+        self.loop_depth -= 1
+
+    def hotspot(self, line: int, kind: str, message: str) -> None:
+        self.hotspots.append({"line": line, "kind": kind, "message": message})
+
+
+class _PythonAnalyzer(ast.NodeVisitor, _Counters):
+    """
+    Single AST walk. Names bound to lists are tracked per scope so that
+    ``x in items`` inside a loop can be told apart from a set lookup.
+    """
+
+    def __init__(self):
+        _Counters.__init__(self)
+        self._list_names: List[set] = [set()]
+
+    # Functions and scopes
+
+    def visit_FunctionDef(self, node):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit(node.args)
+        outer_depth = self.enter_function(node.name, node.lineno)
+        self._list_names.append({arg.arg for arg in _all_args(node.args) if _is_list_annotation(arg.annotation)})
+        for statement in node.body:
+            self.visit(statement)
+        self._list_names.pop()
+        self.exit_function(outer_depth)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        for target in node.targets:
+            self._bind(target, node.value)
+
+    def visit_AnnAssign(self, node):
+        self.generic_visit(node)
+        if isinstance(node.target, ast.Name):
+            if _is_list_annotation(node.annotation) or (node.value is not None and _is_list_value(node.value)):
+                self._list_names[-1].add(node.target.id)
+            else:
+                self._list_names[-1].discard(node.target.id)
+
+    def _bind(self, target, value):
+        if isinstance(target, ast.Name):
+            if _is_list_value(value):
+                self._list_names[-1].add(target.id)
+            else:
+                self._list_names[-1].discard(target.id)
+
+    # Loops
+
+    def visit_For(self, node):
+        # The iterable is evaluated once, outside the loop
+        self.visit(node.iter)
+        self.enter_loop(node.lineno)
+        self.visit(node.target)
+        for statement in node.body:
+            self.visit(statement)
+        self.exit_loop()
+        if node.orelse:
+            self.add_decision()
+            for statement in node.orelse:
+                self.visit(statement)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self.enter_loop(node.lineno)
+        self.visit(node.test)
+        for statement in node.body:
+            self.visit(statement)
+        self.exit_loop()
+        if node.orelse:
+            self.add_decision()
+            for statement in node.orelse:
+                self.visit(statement)
+
+    def _visit_comprehension(self, node, results):
+        entered = 0
+        for index, generator in enumerate(node.generators):
+            if index == 0:
+                # Only the first iterable is evaluated outside the comprehension
+                self.visit(generator.iter)
+            self.enter_loop(node.lineno)
+            entered += 1
+            if index > 0:
+                self.visit(generator.iter)
+            self.visit(generator.target)
+            for condition in generator.ifs:
+                self.add_decision()
+                self.visit(condition)
+        for result in results:
+            self.visit(result)
+        for _ in range(entered):
+            self.exit_loop()
+
+    def visit_ListComp(self, node):
+        self._visit_comprehension(node, [node.elt])
+
+    visit_SetComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self._visit_comprehension(node, [node.key, node.value])
+
+    # Branches
+
+    def visit_If(self, node):
+        self.add_decision()
+        self.generic_visit(node)
+
+    visit_IfExp = visit_If
+    visit_ExceptHandler = visit_If
+    visit_match_case = visit_If
+
+    def visit_BoolOp(self, node):
+        self.add_decision(len(node.values) - 1)
+        self.generic_visit(node)
+
+    # Hotspots
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if not self.loop_depth or not isinstance(node.func, ast.Attribute):
+            return
+        method = node.func.attr
+        if method in EXPENSIVE_METHODS:
+            self.hotspot(node.lineno, "linear_call_in_loop", f"{EXPENSIVE_METHODS[method]} on every iteration; consider a dict or set.")
+        elif method in FRONT_SHIFTING_METHODS and node.args and _is_zero(node.args[0]):
+            self.hotspot(node.lineno, "linear_call_in_loop", f"{FRONT_SHIFTING_METHODS[method]}.")
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if not self.loop_depth:
+            return
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)) and self._is_list(comparator):
+                self.hotspot(node.lineno, "list_membership_in_loop", "Membership test against a list on every iteration; use a set.")
+
+    def _is_list(self, node) -> bool:
+        if isinstance(node, ast.Name):
+            return any(node.id in scope for scope in (self._list_names[-1], self._list_names[0]))
+        return isinstance(node, ast.ListComp) or (_is_list_value(node) and not isinstance(node, ast.List))
+
+
+def _all_args(args: ast.arguments):
+    return args.posonlyargs + args.args + args.kwonlyargs + [a for a in (args.vararg, args.kwarg) if a]
+
+
+def _is_list_annotation(annotation) -> bool:
+    if isinstance(annotation, ast.Subscript):
+        annotation = annotation.value
+    return isinstance(annotation, ast.Name) and annotation.id in ("list", "List")
+
+
+def _is_list_value(node) -> bool:
+    if isinstance(node, (ast.List, ast.ListComp)):
+        return True
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("list", "sorted")
+
+
+def _is_zero(node) -> bool:
+    return isinstance(node, ast.Constant) and node.value == 0 and not isinstance(node.value, bool)
+
+
+GENERIC_TOKEN = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/|\#[^\n]*)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?P<word>[A-Za-z_$][\w$]*)
+  | (?P<op>\?\.|&&|\|\||[{}();?.:\n])
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+INDENT = re.compile(r"[ \t]*")
+LOOP_KEYWORDS = {"for", "while", "foreach", "loop"}
+BRANCH_KEYWORDS = {"if", "elif", "case", "catch", "except", "and", "or"}
+FUNCTION_KEYWORDS = {"function", "func", "fn", "def"}
+CONTROL_KEYWORDS = LOOP_KEYWORDS | {"if", "switch", "catch", "with", "return", "else", "do", "try"}
+
+
+class _GenericAnalyzer(_Counters):
+    """
+    Token-level analysis for code that is not valid Python. Strings and
+    comments are skipped; ``for``/``while`` mark the next block as a loop and
+    ``function``/``func``/``fn``/``def`` (or ``name(...) {``) open a function.
+    Blocks are delimited by braces, or by indentation after a trailing ``:``.
+    """
+
+    def run(self, code_content: str) -> None:
+        line = 1
+        indent = 0
+        at_line_start = True
+        paren_depth = 0
+        # One entry per open block: (kind, saved loop depth, indent or None for braces)
+        blocks: List[tuple] = []
+        pending: Optional[str] = None
+        pending_name: Optional[str] = None
+        pending_line = pending_indent = 0
+        signature: Optional[str] = None
+        previous = ""
+
+        for match in GENERIC_TOKEN.finditer(code_content):
+            kind = match.lastgroup
+            token = match.group()
+            if kind in ("comment", "string"):
+                line += token.count("\n")
+                if kind == "comment":
+                    continue
+            elif token == "\n":
+                if paren_depth == 0 and previous == ":" and pending:
+                    # Indentation block header such as "for x in y:"
+                    blocks.append(self._open_block(pending, pending_name, pending_line, pending_indent))
+                    pending = pending_name = None
+                line += 1
+                indent = INDENT.match(code_content, match.end()).end() - match.end()
+                at_line_start = True
+                continue
+
+            if at_line_start:
+                at_line_start = False
+                while blocks and blocks[-1][2] is not None and indent <= blocks[-1][2]:
+                    self._close_block(blocks.pop())
+
+            if kind == "word":
+                if previous == ".":
+                    if self.loop_depth and token in EXPENSIVE_METHODS:
+                        self.hotspot(line, "linear_call_in_loop", f"{EXPENSIVE_METHODS[token]} on every iteration; consider a map or set.")
+                elif token in LOOP_KEYWORDS:
+                    pending, pending_line, pending_indent = "loop", line, indent
+                elif token in BRANCH_KEYWORDS:
+                    self.add_decision()
+                elif token in FUNCTION_KEYWORDS:
+                    pending, pending_name, pending_line, pending_indent = "function", None, line, indent
+                elif pending == "function" and pending_name is None:
+                    pending_name = token
+            elif token in ("&&", "||", "?"):
+                self.add_decision()
+            elif token == "(":
+                if paren_depth == 0 and pending is None and previous[:1].isalpha() and previous not in CONTROL_KEYWORDS:
+                    signature, pending_line = previous, line
+                paren_depth += 1
+            elif token == ")":
+                paren_depth = max(paren_depth - 1, 0)
+            elif token == "{":
+                if pending is None and signature and previous == ")":
+                    pending, pending_name = "function", signature
+                blocks.append(self._open_block(pending or "block", pending_name, pending_line, None))
+                pending = pending_name = None
+            elif token == "}":
+                # Close any indentation blocks opened inside the braces first
+                while blocks and blocks[-1][2] is not None:
+                    self._close_block(blocks.pop())
+                if blocks:
+                    self._close_block(blocks.pop())
+            elif token == ";" and paren_depth == 0:
+                if pending == "loop":
+                    # Brace-less single-statement loop body
+                    self.enter_loop(pending_line)
+                    self.exit_loop()
+                pending = pending_name = None
+
+            # name(...) only opens a function when "{" follows the closing parenthesis
+            if token not in ("(", ")") and paren_depth == 0 and previous == ")":
+                signature = None
+            previous = token
+
+        while blocks:
+            self._close_block(blocks.pop())
+
+    def _open_block(self, kind: str, name: Optional[str], line: int, indent: Optional[int]) -> tuple:
+        if kind == "loop":
+            self.enter_loop(line)
+            return ("loop", None, indent)
+        if kind == "function":
+            return ("function", self.enter_function(name or "<anonymous>", line), indent)
+        return ("block", None, indent)
+
+    def _close_block(self, block: tuple) -> None:
+        kind, saved, _ = block
+        if kind == "loop":
+            self.exit_loop()
+        elif kind == "function":
+            self.exit_function(saved)
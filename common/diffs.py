@@ -0,0 +1,45 @@
+import re
+from typing import Iterator, List, Tuple
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def iter_patch_lines(patch: str) -> Iterator[Tuple[str, int, int, str]]:
+    """
+    Walks a GitHub-style unified diff patch (hunks only, as returned by analyze_code_changes).
+
+    Yields:
+        Tuples (kind, old_line, new_line, text) where kind is "+", "-" or " ".
+        Line numbers are 1-based positions in the old/new file; the number on
+        the side a line does not exist on is the position it would have had.
+    """
+    old_line = new_line = 0
+    for line in patch.splitlines():
+        if line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            if match:
+                old_line = int(match.group(1))
+                new_line = int(match.group(3))
+            continue
+        if line.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        kind = line[:1] or " "
+        text = line[1:]
+        if kind == "+":
+            yield kind, old_line, new_line, text
+            new_line += 1
+        elif kind == "-":
+            yield kind, old_line, new_line, text
+            old_line += 1
+        else:
+            yield " ", old_line, new_line, text
+            old_line += 1
+            new_line += 1
+
+
+def added_lines(patch: str) -> List[Tuple[int, str]]:
+    """
+    Returns ``(new_line_number, text)`` for every line the patch adds.
+    """
+    return [(new_line, text) for kind, _, new_line, text in iter_patch_lines(patch) if kind == "+"]
@@ -0,0 +1,347 @@
+import os
+import time
+import base64
+import codecs
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import IO, Iterator, List, Dict, Any, Optional, Tuple
+
+from common.github import parse_repo_name
+from common.paths import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Git's well-known empty tree, used as the "parent" of root commits
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Same vocabulary GitHub uses for commit.files[].status
+STATUS_NAMES = {
+    "A": "added",
+    "M": "modified",
+    "D": "removed",
+    "R": "renamed",
+    "C": "copied",
+    "T": "changed",
+}
+
+
+class GitError(Exception):
+    """Raised when a git command exits with a non-zero status."""
+
+
+class GitMirror:
+    """
+    Bare mirror of a repository on local disk, answered with git plumbing.
+
+    The mirror is cloned on first use and refreshed with an incremental
+    ``git fetch`` at most once every ``fetch_interval`` seconds (or on demand
+    when a requested commit is not present yet). Every method returns the same
+    shapes as the REST-backed repo_agent tools.
+    """
+
+    def __init__(self, remote_url: str, path: str, fetch_interval: float = 60.0, token: Optional[str] = None):
+        self.remote_url = remote_url
+        self.path = path
+        # Passed to clone/fetch through the environment: neither stored in the mirror's
+        # config on disk nor visible on the command line (ps, /proc/*/cmdline)
+        self._auth_env: Optional[Dict[str, str]] = None
+        if token and remote_url.startswith("https://"):
+            credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            self._auth_env = _config_env({"http.extraHeader": f"Authorization: Basic {credentials}"})
+        self.fetch_interval = fetch_interval
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+
+    def _git(self, *args: str, check: bool = True, env: Optional[Dict[str, str]] = None) -> bytes:
+        result = subprocess.run(
+            ["git", "--git-dir", self.path, *args],
+            capture_output=True,
+            env=env,
+        )
+        if check and result.returncode != 0:
+            raise GitError(result.stderr.decode("utf-8", "replace").strip())
+        return result.stdout
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Clones the mirror if missing, otherwise fetches new objects when the interval has elapsed.
+        """
+        with self._lock:
+            if not os.path.isdir(self.path):
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                logger.info(f"Cloning mirror into {self.path}")
+                result = subprocess.run(
+                    ["git", "clone", "--mirror", "--quiet", self.remote_url, self.path],
+                    capture_output=True,
+                    env=self._auth_env,
+                )
+                if result.returncode != 0:
+                    raise GitError(result.stderr.decode("utf-8", "replace").strip())
+                self._last_fetch = time.monotonic()
+                return
+
+            if not force and time.monotonic() - self._last_fetch < self.fetch_interval:
+                return
+            try:
+                self._git("fetch", "--prune", "--quiet", "origin", env=self._auth_env)
+                self._last_fetch = time.monotonic()
+            except GitError as e:
+                # A stale mirror is still useful; surface the problem in the logs only
+                logger.warning(f"Mirror fetch failed, serving existing objects: {e}")
+
+    def _resolve(self, ref: str) -> str:
+        """
+        Resolves ``ref`` to a commit SHA, fetching once if the mirror does not have it yet.
+        """
+        self.sync()
+        for attempt in range(2):
+            output = self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}", check=False)
+            if output:
+                return output.decode().strip()
+            if attempt == 0:
+                self.sync(force=True)
+        raise GitError(f"Unknown revision: {ref}")
+
+    def head_sha(self, branch: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Returns ``(branch, sha)`` for ``branch`` or the mirror's default branch.
+        """
+        self.sync()
+        if not branch:
+            branch = self._git("symbolic-ref", "--short", "HEAD").decode().strip()
+        return branch, self._resolve(f"refs/heads/{branch}")
+
+    def recent_commits(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Lists the newest ``limit`` commits on the default branch.
+        """
+        self.sync()
+        return _parse_log(self._git("log", f"-n{limit}", "--format=%H%x1f%an%x1f%aI%x1f%B%x1e", "HEAD"))
+
+    def commit_changes(self, commit_sha: str) -> Dict[str, Any]:
+        """
+        Returns the message, stats and per-file patches of a commit (diffed against its first parent).
+
+        ``files`` is a lazy iterator: patches are read from ``git diff`` as the
+        caller consumes them, so a page-limited caller never buffers the whole diff.
+        """
+        sha = self._resolve(commit_sha)
+        parent = self._git("rev-parse", "--verify", "--quiet", f"{sha}^1", check=False).decode().strip()
+        message = self._git("show", "-s", "--format=%B", sha).decode("utf-8", "replace").strip()
+        stats, files = self._diff(parent or EMPTY_TREE_SHA, sha)
+        return {"sha": commit_sha, "message": message, "stats": stats, "files": files}
+
+    def compare(self, base: str, head: str) -> Dict[str, Any]:
+        """
+        Returns the net diff from the merge base of ``base`` and ``head`` to ``head`` plus the commits in between.
+
+        As with ``commit_changes``, ``files`` is a lazy iterator.
+        """
+        base_sha = self._resolve(base)
+        head_sha = self._resolve(head)
+        merge_base = self._git("merge-base", base_sha, head_sha, check=False).decode().strip() or EMPTY_TREE_SHA
+        output = self._git("log", "--format=%H%x1f%an%x1f%aI%x1f%B%x1e", f"{base_sha}..{head_sha}")
+        commits = _parse_log(output)
+        behind = self._git("rev-list", "--count", f"{head_sha}..{base_sha}").decode().strip()
+        stats, files = self._diff(merge_base, head_sha)
+        return {
+            "base": base,
+            "head": head,
+            "merge_base": merge_base,
+            "ahead_by": len(commits),
+            "behind_by": int(behind or 0),
+            "total_commits": len(commits),
+            "commits": list(reversed(commits)),
+            "stats": stats,
+            "files": files,
+        }
+
+    def _diff(self, base: str, sha: str) -> Tuple[Dict[str, int], Iterator[Dict[str, Any]]]:
+        statuses = dict(_parse_name_status(self._git("diff", "-M", "-z", "--name-status", base, sha)))
+        counts = _parse_numstat(self._git("diff", "-M", "-z", "--numstat", base, sha))
+        additions = sum(added for added, _ in counts.values())
+        deletions = sum(deleted for _, deleted in counts.values())
+        stats = {"total": additions + deletions, "additions": additions, "deletions": deletions}
+        return stats, self._iter_files(base, sha, statuses, counts)
+
+    def _iter_files(
+        self, base: str, sha: str, statuses: Dict[str, str], counts: Dict[str, Tuple[int, int]]
+    ) -> Iterator[Dict[str, Any]]:
+        process = subprocess.Popen(
+            ["git", "--git-dir", self.path, "diff", "-M", "--no-color", "--no-ext-diff", base, sha],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for filename, patch in _iter_patches(process.stdout):
+                additions, deletions = counts.get(filename, (0, 0))
+                yield {
+                    "filename": filename,
+                    "status": statuses.get(filename, "modified"),
+                    "additions": additions,
+                    "deletions": deletions,
+                    "patch": patch,
+                }
+        finally:
+            # The caller may stop early; don't leave git writing into a full pipe
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+    @contextmanager
+    def archive(self, ref: Optional[str] = None) -> Iterator[IO[bytes]]:
+        """
+        Streams ``git archive`` of ``ref`` (defaults to the default branch) as an uncompressed tar.
+        """
+        sha = self._resolve(ref or "HEAD")
+        process = subprocess.Popen(
+            ["git", "--git-dir", self.path, "archive", "--format=tar", sha],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+    def file_content(self, file_path: str, ref: Optional[str] = None) -> str:
+        """
+        Returns the content of ``file_path`` at ``ref`` (defaults to the default branch).
+        """
+        sha = self._resolve(ref or "HEAD")
+        return self._git("show", f"{sha}:{file_path}").decode("utf-8")
+
+
+def _config_env(settings: Dict[str, str]) -> Dict[str, str]:
+    """
+    Returns a copy of the environment that adds git config entries via GIT_CONFIG_COUNT/KEY_n/VALUE_n.
+    """
+    env = dict(os.environ)
+    count = int(env.get("GIT_CONFIG_COUNT", "0") or 0)
+    for key, value in settings.items():
+        env[f"GIT_CONFIG_KEY_{count}"] = key
+        env[f"GIT_CONFIG_VALUE_{count}"] = value
+        count += 1
+    env["GIT_CONFIG_COUNT"] = str(count)
+    return env
+
+
+def _parse_log(output: bytes) -> List[Dict[str, Any]]:
+    commits = []
+    for record in output.decode("utf-8", "replace").split("\x1e"):
+        record = record.strip("\n")
+        if not record:
+            continue
+        sha, author, date, message = record.split("\x1f", 3)
+        commits.append({"sha": sha, "author": author, "date": date, "message": message.strip()})
+    return commits
+
+
+def _parse_name_status(output: bytes) -> List[Tuple[str, str]]:
+    fields = output.decode("utf-8", "replace").split("\0")
+    entries = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        code = fields[i][0]
+        if code in ("R", "C"):
+            # Renames and copies carry both the old and the new path
+            entries.append((fields[i + 2], STATUS_NAMES[code]))
+            i += 3
+        else:
+            entries.append((fields[i + 1], STATUS_NAMES.get(code, "modified")))
+            i += 2
+    return entries
+
+
+def _parse_numstat(output: bytes) -> Dict[str, Tuple[int, int]]:
+    fields = output.decode("utf-8", "replace").split("\0")
+    counts = {}
+    i = 0
+    while i < len(fields) and fields[i]:
+        added, deleted, path = fields[i].split("\t", 2)
+        if not path:
+            # Rename: "added\tdeleted\t" followed by the old and new paths
+            path = fields[i + 2]
+            i += 3
+        else:
+            i += 1
+        # Binary files report "-" for both counts
+        counts[path] = (int(added) if added != "-" else 0, int(deleted) if deleted != "-" else 0)
+    return counts
+
+
+def _iter_patches(stream: IO[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Reads a multi-file ``git diff`` and yields GitHub-style ``(path, patch)`` pairs (hunks only, no headers).
+    """
+    path = None
+    hunks: List[str] = []
+
+    for raw in stream:
+        line = raw.decode("utf-8", "replace").rstrip("\n")
+        if line.startswith("diff --git "):
+            if path is not None:
+                yield path, "\n".join(hunks)
+            # Fallback for blocks without ---/+++ lines (binary files, pure renames)
+            path = _unquote(line.rsplit(" b/", 1)[-1])
+            hunks = []
+        elif not hunks and line.startswith("rename to "):
+            path = _unquote(line[len("rename to "):])
+        elif not hunks and line.startswith("+++ "):
+            if line != "+++ /dev/null":
+                path = _unquote(line[4:]).removeprefix("b/")
+        elif line.startswith("@@") or hunks:
+            hunks.append(line)
+
+    if path is not None:
+        yield path, "\n".join(hunks)
+
+
+def _unquote(path: str) -> str:
+    # git C-quotes paths with unusual characters, escaping non-ASCII bytes as octal
+    if len(path) >= 2 and path[0] == '"' and path[-1] == '"':
+        return codecs.escape_decode(path[1:-1].encode("utf-8"))[0].decode("utf-8", "replace")
+    return path
+
+
+def mirror_remote_url(repo_url: str) -> str:
+    """
+    Builds the URL to clone from: local paths are used as-is, "owner/name" becomes a GitHub URL.
+    """
+    if os.path.isdir(repo_url) or repo_url.startswith("file://"):
+        return repo_url
+    if "://" not in repo_url:
+        repo_url = f"https://github.com/{repo_url}"
+    return repo_url.removesuffix(".git") + ".git"
+
+
+_mirrors: Dict[str, GitMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(repo_url: str, token: Optional[str] = None) -> GitMirror:
+    """
+    Returns the process-wide mirror for ``repo_url``, creating it on first use.
+    """
+    with _mirrors_lock:
+        mirror = _mirrors.get(repo_url)
+        if mirror is None:
+            if os.path.isdir(repo_url):
+                name = os.path.basename(os.path.abspath(repo_url))
+            else:
+                name = parse_repo_name(repo_url).replace("/", "__")
+            base_dir = os.getenv("REPO_MIRROR_DIR", os.path.join(DEFAULT_CACHE_DIR, "mirrors"))
+            mirror = GitMirror(
+                remote_url=mirror_remote_url(repo_url),
+                path=os.path.join(base_dir, f"{name.removesuffix('.git')}.git"),
+                fetch_interval=float(os.getenv("REPO_MIRROR_FETCH_INTERVAL", "60")),
+                token=token,
+            )
+            _mirrors[repo_url] = mirror
+        return mirror
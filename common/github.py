@@ -0,0 +1,10 @@
+DEFAULT_BASE_URL = "https://api.github.com"
+
+
+def parse_repo_name(repo_url: str) -> str:
+    """
+    Turns a repository URL (or an already bare "owner/name") into "owner/name".
+    """
+    if "github.com/" in repo_url:
+        return repo_url.split("github.com/")[1].removesuffix(".git").strip("/")
+    return repo_url
@@ -0,0 +1,151 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from common.complexity import analyze_complexity
+
+FUNCTION_PREFIXES = ("def ", "function ")
+
+PRINT_MESSAGE = "Avoid 'print()' in production code; use logging instead."
+TODO_MESSAGE = "Found TODO comments. Ensure these are tracked."
+EXCEPT_MESSAGE = "Avoid bare except clauses or catching generic Exception."
+
+
+class CodeMetrics:
+    """
+    Everything the reviewer tools report about one piece of code: line metrics
+    from a single pass plus the AST/token-based complexity analysis.
+
+    Attributes:
+        loc: Number of lines.
+        function_count: Lines starting with "def " or "function ".
+        max_indent: Widest leading whitespace of a non-blank line.
+        has_print, has_todo, has_broad_except: Best-practice flags.
+        complexity: Result of ``analyze_complexity`` (loop depth, per-function
+            cyclomatic complexity, hotspots).
+    """
+
+    def __init__(self):
+        self.loc = 0
+        self.function_count = 0
+        self.max_indent = 0
+        self.has_print = False
+        self.has_todo = False
+        self.has_broad_except = False
+        self.complexity: Dict[str, Any] = {}
+
+    def quality(self) -> Dict[str, Any]:
+        return {
+            "loc": self.loc,
+            "function_count": self.function_count,
+            "max_indentation_depth": self.max_indent,
+            "max_loop_depth": self.complexity["max_loop_depth"],
+            "max_cyclomatic_complexity": self.complexity["max_complexity"],
+            "language": self.complexity["language"],
+            "rating": "Low" if self.complexity["max_complexity"] > 10 or self.complexity["max_loop_depth"] > 3 else "Good",
+        }
+
+    def best_practices(self) -> List[str]:
+        issues = []
+        if self.has_print:
+            issues.append(PRINT_MESSAGE)
+        if self.has_todo:
+            issues.append(TODO_MESSAGE)
+        if self.has_broad_except:
+            issues.append(EXCEPT_MESSAGE)
+        return issues
+
+    def optimizations(self) -> List[str]:
+        return [f"Line {hotspot['line']}: {hotspot['message']}" for hotspot in self.complexity["hotspots"]]
+
+
+def compute_metrics(code_content: str) -> CodeMetrics:
+    """
+    Walks the code once for line metrics, then runs the complexity analysis.
+    """
+    metrics = CodeMetrics()
+    lines = code_content.splitlines()
+    metrics.loc = len(lines)
+
+    for line in lines:
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+        if not stripped:
+            continue
+        if indent > metrics.max_indent:
+            metrics.max_indent = indent
+        if stripped.startswith(FUNCTION_PREFIXES):
+            metrics.function_count += 1
+
+        if not metrics.has_print and "print(" in line:
+            metrics.has_print = True
+        if not metrics.has_todo and "TODO" in line:
+            metrics.has_todo = True
+        if not metrics.has_broad_except and ("except Exception:" in line or "except:" in line):
+            metrics.has_broad_except = True
+
+    metrics.complexity = analyze_complexity(code_content)
+    return metrics
+
+
+class MetricsCache:
+    """
+    Bounded LRU of CodeMetrics keyed by a hash of the code, so the reviewer
+    tools called back to back on the same code analyze it only once.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, CodeMetrics]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, code_content: str) -> CodeMetrics:
+        """
+        Returns the metrics for this code, computing them on a miss.
+        """
+        key = hashlib.blake2b(code_content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            metrics = self._entries.get(key)
+            if metrics is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return metrics
+            self._stats["misses"] += 1
+
+        metrics = compute_metrics(code_content)
+        with self._lock:
+            self._entries[key] = metrics
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return metrics
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters plus the current size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+_metrics_cache: Optional[MetricsCache] = None
+_metrics_cache_lock = threading.Lock()
+
+
+def get_metrics_cache() -> MetricsCache:
+    """
+    Returns the cache shared by every reviewer tool in this process.
+
+    Created lazily so settings loaded from ``.env`` after import still apply.
+    """
+    global _metrics_cache
+    with _metrics_cache_lock:
+        if _metrics_cache is None:
+            _metrics_cache = MetricsCache(max_entries=int(os.getenv("REVIEW_CACHE_SIZE", "128")))
+        return _metrics_cache
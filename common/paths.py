@@ -0,0 +1,7 @@
+import os
+
+# Repository root: default home of the SQLite databases that hold state worth keeping
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Caches that can be rebuilt at any time (GitHub objects, git mirrors)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "spaghetti-scanner")
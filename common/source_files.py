@@ -0,0 +1,49 @@
+from typing import Optional
+
+# File suffixes of source code: these get quality metrics (LOC, complexity) wherever files are measured
+CODE_SUFFIXES = (
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rb", ".php", ".c", ".h", ".cc", ".cpp", ".hpp",
+    ".cs", ".kt", ".swift", ".rs", ".scala",
+)
+
+
+def is_code_file(path: str) -> bool:
+    return path.lower().endswith(CODE_SUFFIXES)
+
+
+# Files that are machine-generated noise for reviewers and scanners
+GENERATED_FILENAMES = {
+    "uv.lock",
+    "poetry.lock",
+    "Pipfile.lock",
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "go.sum",
+}
+GENERATED_SUFFIXES = (".min.js", ".min.css", ".map", "_pb2.py", ".pb.go", ".snap")
+VENDORED_PREFIXES = ("node_modules/", "vendor/", "third_party/", "dist/", "build/")
+BINARY_SUFFIXES = (
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".pdf", ".zip", ".gz", ".tar",
+    ".jar", ".whl", ".so", ".dll", ".exe", ".bin", ".woff", ".woff2", ".ttf", ".mp4", ".mp3",
+)
+
+
+def path_skip_reason(filename: str) -> Optional[str]:
+    """
+    Returns why a file should not be scanned judging by its path alone ("binary", "generated", "vendored"), or None.
+    """
+    name = filename.rsplit("/", 1)[-1]
+    lowered = filename.lower()
+    if lowered.endswith(BINARY_SUFFIXES):
+        return "binary"
+    if name in GENERATED_FILENAMES or lowered.endswith(GENERATED_SUFFIXES):
+        return "generated"
+    if lowered.startswith(VENDORED_PREFIXES) or any(f"/{prefix}" in lowered for prefix in VENDORED_PREFIXES):
+        return "vendored"
+    return None
+
@@ -1,33 +1,181 @@
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
+from fastapi import FastAPI
 from google.adk import Agent
-from google.adk.agents.remote_a2a_agent import RemoteA2aAgent, AGENT_CARD_WELL_KNOWN_PATH
+from google.adk.agents.remote_a2a_agent import RemoteA2aAgent, AGENT_CARD_WELL_KNOWN_PATH, DEFAULT_TIMEOUT
+from a2a.client.client import ClientConfig
+from a2a.client.client_factory import ClientFactory
+from a2a.types import TransportProtocol
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 
+from common.github import parse_repo_name
+from dev_manager_agent.history import get_metrics_history, update_history
+from dev_manager_agent.pipeline import build_pipeline, fetch_head_sha
+from dev_manager_agent.replicas import close_replica_pools, get_replica_pool, replica_client
+from dev_manager_agent.report_cache import (
+    DEFAULT_REPORT_PATTERN,
+    ReportCacheCallbacks,
+    config_version,
+    get_commit_cache,
+    get_report_cache,
+)
+from dev_manager_agent.services import DEFAULT_SERVICE_URLS, service_urls
+from dev_manager_agent.webhooks import start_analysis_pool, stop_analysis_pool, webhook_api
+from dev_manager_agent.work_queue import get_commit_queue, queue_enabled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Define remote agent connections
-repo_service = RemoteA2aAgent(
-    name="repo_agent",
-    description="Agent for fetching repository data (commits, files).",
-    agent_card=f"http://127.0.0.1:8001{AGENT_CARD_WELL_KNOWN_PATH}"
-)
+# AGENT_TOPOLOGY=local runs the worker agents inside this process instead of over A2A
+if os.getenv("AGENT_TOPOLOGY", "remote") == "local":
+    from repo_agent.agent import root_agent as repo_service
+    from security_agent.agent import root_agent as security_service
+    from reviewer_agent.agent import root_agent as reviewer_service
+else:
+    def _client_factory(name: str) -> ClientFactory:
+        # One keep-alive client per agent, spreading calls over its replicas (e.g. SECURITY_AGENT_URLS);
+        # the agent card is fetched once through it and cached by RemoteA2aAgent
+        return ClientFactory(config=ClientConfig(
+            httpx_client=replica_client(name, DEFAULT_TIMEOUT),
+            streaming=False,
+            polling=False,
+            supported_transports=[TransportProtocol.jsonrpc],
+        ))
 
-security_service = RemoteA2aAgent(
-    name="security_agent",
-    description="Agent for security scanning (secrets, sql injection).",
-    agent_card=f"http://127.0.0.1:8002{AGENT_CARD_WELL_KNOWN_PATH}"
-)
+    # Define remote agent connections
+    repo_service = RemoteA2aAgent(
+        name="repo_agent",
+        description="Agent for fetching repository data (commits, files).",
+        agent_card=f"{service_urls('repo_agent')[0]}{AGENT_CARD_WELL_KNOWN_PATH}",
+        a2a_client_factory=_client_factory("repo_agent"),
+    )
+
+    security_service = RemoteA2aAgent(
+        name="security_agent",
+        description="Agent for security scanning (secrets, sql injection).",
+        agent_card=f"{service_urls('security_agent')[0]}{AGENT_CARD_WELL_KNOWN_PATH}",
+        a2a_client_factory=_client_factory("security_agent"),
+    )
+
+    reviewer_service = RemoteA2aAgent(
+        name="reviewer_agent",
+        description="Agent for code reviews and quality checks.",
+        agent_card=f"{service_urls('reviewer_agent')[0]}{AGENT_CARD_WELL_KNOWN_PATH}",
+        a2a_client_factory=_client_factory("reviewer_agent"),
+    )
+
+def get_precomputed_findings(commit_shas: List[str]) -> Dict[str, Any]:
+    """
+    Returns the security findings and review issues already computed for commits by the webhook workers.
+
+    Args:
+        commit_shas: Full SHAs of the commits to look up.
+
+    Returns:
+        A dictionary with "results" (per-commit analyses keyed by SHA) and "missing" (SHAs that still need analysis).
+    """
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    if not queue_enabled() or not repo_url:
+        return {"results": {}, "missing": commit_shas}
+    try:
+        results = get_commit_queue().results(parse_repo_name(repo_url), commit_shas)
+    except Exception as e:
+        return {"error": str(e)}
+    return {"results": results, "missing": [sha for sha in commit_shas if sha not in results]}
+
+
+def _history_repo() -> Optional[str]:
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    return parse_repo_name(repo_url) if repo_url else None
+
+
+async def update_metrics_history(limit: int = 200) -> Dict[str, Any]:
+    """
+    Adds the newest commits to the local metrics history; commits already stored are skipped.
+
+    Args:
+        limit: How many recent commits to consider.
+
+    Returns:
+        A dictionary with the number of commits ingested and skipped.
+    """
+    repo = _history_repo()
+    if not repo:
+        return {"error": "GITHUB_REPO_URL not configured"}
+    return await update_history(repo, limit, os.getenv("AGENT_TOPOLOGY", "remote"))
+
+
+def get_file_churn(since: Optional[str] = None, until: Optional[str] = None,
+                   last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+    """
+    Lists the files that changed the most (lines added plus deleted) in a range of the stored history.
+
+    Args:
+        since: ISO date the range starts at (optional).
+        until: ISO date the range ends at, inclusive (optional).
+        last_commits: Only the last N commits (up to ``until``) (optional).
+        limit: How many files to return.
+
+    Returns:
+        A dictionary with the number of commits in the range and the files with their churn, commits and findings.
+    """
+    repo = _history_repo()
+    if not repo:
+        return {"error": "GITHUB_REPO_URL not configured"}
+    try:
+        return get_metrics_history().churn(repo, since, until, last_commits, limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_hotspots(since: Optional[str] = None, until: Optional[str] = None,
+                 last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+    """
+    Lists the files that both change often and are complex, from the stored history.
+
+    Args:
+        since: ISO date the range starts at (optional).
+        until: ISO date the range ends at, inclusive (optional).
+        last_commits: Only the last N commits (up to ``until``) (optional).
+        limit: How many files to return.
+
+    Returns:
+        A dictionary with the files ranked by score (commits touching the file x its latest cyclomatic complexity).
+    """
+    repo = _history_repo()
+    if not repo:
+        return {"error": "GITHUB_REPO_URL not configured"}
+    try:
+        return get_metrics_history().hotspots(repo, since, until, last_commits, limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_findings_trend(since: Optional[str] = None, until: Optional[str] = None,
+                       last_commits: Optional[int] = None, bucket: str = "week") -> Dict[str, Any]:
+    """
+    Shows how security findings, review issues and line changes developed over the stored history.
+
+    Args:
+        since: ISO date the range starts at (optional).
+        until: ISO date the range ends at, inclusive (optional).
+        last_commits: Only the last N commits (up to ``until``) (optional).
+        bucket: "commit", "day", "week" (ISO, from Monday) or "month" (calendar).
+
+    Returns:
+        A dictionary with one point per bucket.
+    """
+    repo = _history_repo()
+    if not repo:
+        return {"error": "GITHUB_REPO_URL not configured"}
+    try:
+        return get_metrics_history().trend(repo, since, until, last_commits, bucket)
+    except Exception as e:
+        return {"error": str(e)}
 
-reviewer_service = RemoteA2aAgent(
-    name="reviewer_agent",
-    description="Agent for code reviews and quality checks.",
-    agent_card=f"http://127.0.0.1:8003{AGENT_CARD_WELL_KNOWN_PATH}"
-)
 
 # Initialize the agent
 agent = Agent(
@@ -40,17 +188,19 @@ agent = Agent(
     2. **Interactive Assistance**: Answer questions about the codebase, specific commits, or file contents.
     
     You have a team of sub-agents:
-    - 'repo_agent': Fetches commits, file contents, and diffs.
+    - 'repo_agent': Fetches commits, file contents, and diffs (including many commits' diffs in one batch, or the net diff between two refs).
     - 'security_agent': Scans code for vulnerabilities.
     - 'reviewer_agent': Reviews code for quality and best practices.
     
     **Workflows:**
     
     **1. Activity Summary (Trigger: "What's new?", "Summarize recent changes", "Report"):**
-       - **STEP 1**: Call 'repo_agent' to get the list of recent commits.
-       - **STEP 2**: For each interesting commit in that list, call 'repo_agent' AGAIN to get the diff/changes.
-       - **STEP 3**: ONLY ONCE YOU HAVE THE CODE CONTENT, send that content to 'security_agent' and 'reviewer_agent' for analysis.
+       - **STEP 1**: Call 'repo_agent' ONCE and ask it to analyze the recent commits in a single batch with budgeting on (its 'analyze_commits_batch' tool with budget=true returns the list of commits together with compacted, risk-ranked diffs that fit a token budget).
+       - **STEP 2**: Only if a specific commit failed in the batch, call 'repo_agent' AGAIN for that commit's diff/changes.
+       - Before STEP 3, call 'get_precomputed_findings' with the commit SHAs: commits listed under "results" were already scanned and reviewed, so use those results and only send the "missing" commits on.
+       - **STEP 3**: ONLY ONCE YOU HAVE THE CODE CONTENT, send that content to 'security_agent' and 'reviewer_agent' for analysis. Forward each commit's "files" list (filename + patch) unchanged so they can scan only the added lines. Files under "deferred" did not fit the budget; only ask 'repo_agent' for them (get_file_patch) if the user needs them or their risk is high.
        - **STEP 4**: Consolidate into a summary.
+       - If the user asks about a range ("this sprint", "since v1.2", "between X and Y"), ask 'repo_agent' to compare the two refs instead; it returns each changed file once with its net diff plus the commit list, so send that net diff to 'security_agent' and 'reviewer_agent' once.
 
     **2. Code Review / Interactive Queries:**
        - **STEP 1**: If the user asks for a review of a specific commit or "the last commit", YOU MUST FIRST call 'repo_agent' to get the diff/content of that commit.
@@ -58,16 +208,82 @@ agent = Agent(
        - **STEP 3**: Send the *actual code content* you received to 'reviewer_agent' and 'security_agent'. **DO NOT** call them empty-handed.
        - **STEP 4**: Present the results clearly.
        
+    **3. History Questions (Trigger: "Which files churn most?", "Hotspots", "Findings trend over the last 200 commits"):**
+       - Call 'update_metrics_history' first (it only fetches commits that are not stored yet), then answer with 'get_file_churn', 'get_hotspots' or 'get_findings_trend' over the requested range. Do not fetch individual commits for these questions.
+
     **Important:**
+    - Large diffs come back in pages. If a commit result has a 'next_cursor', only ask 'repo_agent' for the next page when the files you already have are not enough; files listed under 'skipped' (binary, generated, vendored) need no review.
     - If a user asks "Give me a code review" without context, assume they mean the *last commit* or ask for clarification, but PREFER to assume last commit if you recently discussed it.
     - Always output text based on the tools' responses. Do not return empty responses.
     """,
     sub_agents=[repo_service, security_service, reviewer_service],
-    tools=[]
+    tools=[get_precomputed_findings, update_metrics_history, get_file_churn, get_hotspots, get_findings_trend]
 )
 
-app = to_a2a(agent)
-root_agent = agent
+# DEV_MANAGER_MODE=pipeline swaps the LLM-sequenced workflow for the code-defined report pipeline
+if os.getenv("DEV_MANAGER_MODE", "agent") == "pipeline":
+    root_agent = build_pipeline()
+else:
+    root_agent = agent
+
+# Repeated report requests against an unchanged HEAD are answered from the report cache (REPORT_CACHE=0 disables it).
+# Only prompts that are a report request as a whole are cached, and those do not depend on earlier turns,
+# so this is safe in agent mode as well as in pipeline mode
+if os.getenv("REPORT_CACHE", "1") != "0":
+    _report_callbacks = ReportCacheCallbacks(
+        get_report_cache(),
+        lambda: fetch_head_sha(os.getenv("AGENT_TOPOLOGY", "remote")),
+        config_version(root_agent),
+        pattern=os.getenv("REPORT_CACHE_PATTERN", DEFAULT_REPORT_PATTERN),
+        pending_ttl=float(os.getenv("REPORT_CACHE_TTL", "900")),
+    )
+    root_agent.before_agent_callback = _report_callbacks.before_agent
+    root_agent.after_agent_callback = _report_callbacks.after_agent
+
+app = to_a2a(root_agent)
+
+# Load and health of each worker agent's replicas (GET /stats/replicas)
+stats_api = FastAPI(title="dev_manager stats")
+
+@stats_api.get("/replicas")
+def replica_stats() -> Dict[str, Any]:
+    return {name: get_replica_pool(name).stats() for name in DEFAULT_SERVICE_URLS}
+
+@stats_api.get("/cache")
+def cache_stats() -> Dict[str, Any]:
+    return {"reports": get_report_cache().stats(), "commits": get_commit_cache().stats()}
+
+app.mount("/stats", stats_api)
+
+# Churn, hotspot and trend queries over the stored metrics history (GET /history/...)
+history_api = FastAPI(title="dev_manager history")
+
+@history_api.post("/ingest")
+async def history_ingest_endpoint(limit: int = 200) -> Dict[str, Any]:
+    return await update_metrics_history(limit)
+
+@history_api.get("/churn")
+def history_churn_endpoint(since: Optional[str] = None, until: Optional[str] = None,
+                           last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+    return get_file_churn(since, until, last_commits, limit)
+
+@history_api.get("/hotspots")
+def history_hotspots_endpoint(since: Optional[str] = None, until: Optional[str] = None,
+                              last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+    return get_hotspots(since, until, last_commits, limit)
+
+@history_api.get("/trend")
+def history_trend_endpoint(since: Optional[str] = None, until: Optional[str] = None,
+                           last_commits: Optional[int] = None, bucket: str = "week") -> Dict[str, Any]:
+    return get_findings_trend(since, until, last_commits, bucket)
+
+app.mount("/history", history_api)
+
+# Push webhooks queue new commits, which background workers analyze once and store by SHA (needs WEBHOOK_SECRET)
+app.mount("/webhooks", webhook_api)
+app.add_event_handler("startup", start_analysis_pool)
+app.add_event_handler("shutdown", stop_analysis_pool)
+app.add_event_handler("shutdown", close_replica_pools)
 
 if __name__ == "__main__":
     import uvicorn
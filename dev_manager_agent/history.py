@@ -0,0 +1,397 @@
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.source_files import is_code_file
+from dev_manager_agent.pipeline import LocalWorkers, RemoteWorkers
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    author TEXT,
+    message TEXT,
+    additions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    files_changed INTEGER NOT NULL,
+    findings INTEGER NOT NULL,
+    review_issues INTEGER NOT NULL,
+    truncated INTEGER NOT NULL,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS history_commits_by_time ON history_commits (repo, timestamp);
+CREATE TABLE IF NOT EXISTS history_files (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT,
+    additions INTEGER NOT NULL,
+    deletions INTEGER NOT NULL,
+    loc INTEGER,
+    complexity INTEGER,
+    findings INTEGER NOT NULL,
+    review_issues INTEGER NOT NULL,
+    PRIMARY KEY (repo, sha, filename)
+);
+CREATE INDEX IF NOT EXISTS history_files_by_time ON history_files (repo, timestamp);
+CREATE INDEX IF NOT EXISTS history_files_by_name ON history_files (repo, filename, timestamp);
+"""
+
+# First UTC day of the bucket a commit falls in, for trend queries: weeks are
+# ISO weeks starting on Monday, months are calendar months ("commit" means one point per commit)
+TREND_BUCKETS = {
+    "day": "date(timestamp, 'unixepoch')",
+    "week": "date(timestamp, 'unixepoch', 'weekday 0', '-6 days')",
+    "month": "date(timestamp, 'unixepoch', 'start of month')",
+}
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """
+    Turns an ISO 8601 date or date-time (e.g. "2024-05-01" or a commit date) into a UTC epoch timestamp.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class MetricsHistory:
+    """
+    Per-commit, per-file metrics of a repository's history in a SQLite file.
+
+    Every ingested commit keeps its total additions and deletions (GitHub's
+    commit stats, which also cover files past the paged diff), per-file
+    additions and deletions for the files that were read, the changed file's LOC and maximum cyclomatic complexity at that commit, and
+    the number of security findings and review issues in its added lines.
+    Rows are indexed by commit time, so churn, hotspot and trend queries over
+    any range are answered by one aggregate query without touching GitHub.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            if not write:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    # ---- Ingestion ----
+
+    def known_shas(self, repo: str, shas: List[str]) -> set:
+        if not shas:
+            return set()
+        placeholders = ",".join("?" * len(shas))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT sha FROM history_commits WHERE repo = ? AND sha IN ({placeholders})", (repo, *shas)
+            ).fetchall()
+        return {sha for sha, in rows}
+
+    def record(self, repo: str, commit: Dict[str, Any], files: List[Dict[str, Any]], truncated: bool = False,
+               stats: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Stores one commit and its per-file rows (filename, status, additions, deletions, loc, complexity, findings, review_issues).
+
+        The commit's additions and deletions come from ``stats`` (the whole
+        commit) when given, else from the per-file rows.
+        """
+        timestamp = parse_timestamp(commit.get("date")) or time.time()
+        stats = stats or {}
+        additions = stats.get("additions", sum(f["additions"] for f in files))
+        deletions = stats.get("deletions", sum(f["deletions"] for f in files))
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO history_commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    repo, commit["sha"], timestamp, commit.get("author"), (commit.get("message") or "").split("\n", 1)[0],
+                    additions, deletions, len(files),
+                    sum(f["findings"] for f in files), sum(f["review_issues"] for f in files), int(truncated),
+                ),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO history_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (repo, commit["sha"], timestamp, f["filename"], f.get("status"), f["additions"], f["deletions"],
+                     f.get("loc"), f.get("complexity"), f["findings"], f["review_issues"])
+                    for f in files
+                ],
+            )
+
+    async def ingest(self, workers, repo: str, limit: int = 200, max_pages: int = 5, metrics_files: int = 20) -> Dict[str, Any]:
+        """
+        Adds the newest ``limit`` commits that are not in the store yet; known SHAs are never fetched again.
+
+        Args:
+            workers: LocalWorkers or RemoteWorkers (see dev_manager_agent.pipeline).
+            repo: Repository key ("owner/name").
+            limit: How many recent commits to consider.
+            max_pages: Diff pages read per commit.
+            metrics_files: Changed source files per commit whose LOC and complexity are measured.
+
+        Returns:
+            A dictionary with the number of commits "ingested", "skipped" (already known) and any "errors".
+        """
+        started = time.monotonic()
+        commits = await workers.recent_commits(limit)
+        if commits and "error" in commits[0]:
+            return {"error": commits[0]["error"]}
+        known = await asyncio.to_thread(self.known_shas, repo, [c["sha"] for c in commits])
+        new = [c for c in commits if c["sha"] not in known]
+
+        async def ingest_commit(commit: Dict[str, Any]) -> Optional[str]:
+            try:
+                files, truncated, stats = await self._collect(workers, commit["sha"], max_pages, metrics_files)
+            except Exception as e:
+                return f"{commit['sha'][:7]}: {e}"
+            await asyncio.to_thread(self.record, repo, commit, files, truncated, stats)
+            return None
+
+        errors = [e for e in await asyncio.gather(*(ingest_commit(c) for c in new)) if e]
+        elapsed = round(time.monotonic() - started, 2)
+        logger.info(f"Metrics history: {len(new) - len(errors)} commits ingested, {len(known)} already known, {elapsed}s")
+        return {"ingested": len(new) - len(errors), "skipped": len(known), "errors": errors, "elapsed_seconds": elapsed}
+
+    @staticmethod
+    async def _collect(workers, sha: str, max_pages: int,
+                       metrics_files: int) -> Tuple[List[Dict[str, Any]], bool, Optional[Dict[str, Any]]]:
+        files, cursor, stats = [], None, None
+        for _ in range(max_pages):
+            changes = await workers.commit_changes(sha, cursor)
+            if "error" in changes:
+                raise RuntimeError(changes["error"])
+            stats = stats or changes.get("stats")
+            files.extend(changes.get("files", []))
+            cursor = changes.get("next_cursor")
+            if not cursor:
+                break
+
+        patches = [{"filename": f["filename"], "patch": f.get("patch") or ""} for f in files]
+        security, review = await asyncio.gather(workers.scan_diff(patches), workers.review_diff(patches))
+        findings = Counter(f.get("filename") for f in security.get("findings", []))
+        issues = Counter(i.get("filename") for i in review.get("issues", []))
+
+        # LOC and complexity of the file as of this commit, for the largest changed source files
+        measured = sorted(
+            (f for f in files if f.get("status") != "removed" and is_code_file(f["filename"])),
+            key=lambda f: -(f.get("additions", 0) + f.get("deletions", 0)),
+        )[:metrics_files]
+        contents = await asyncio.gather(*(workers.file_content(f["filename"], sha) for f in measured))
+        sources = [{"filename": f["filename"], "content": c} for f, c in zip(measured, contents) if c is not None]
+        quality = {}
+        if sources:
+            quality = {r["filename"]: r["quality"] for r in (await workers.review_metrics(sources)).get("results", [])}
+
+        rows = []
+        for f in files:
+            metrics = quality.get(f["filename"], {})
+            rows.append({
+                "filename": f["filename"],
+                "status": f.get("status"),
+                "additions": f.get("additions", 0),
+                "deletions": f.get("deletions", 0),
+                "loc": metrics.get("loc"),
+                "complexity": metrics.get("max_cyclomatic_complexity"),
+                "findings": findings[f["filename"]],
+                "review_issues": issues[f["filename"]],
+            })
+        return rows, bool(cursor), stats
+
+    # ---- Queries ----
+
+    def _range(self, conn, repo: str, since: Optional[str], until: Optional[str], last_commits: Optional[int]) -> Tuple[float, float]:
+        start = parse_timestamp(since) if since else float("-inf")
+        end = parse_timestamp(until) if until else float("inf")
+        if until and len(until) == 10:
+            # A bare date includes the whole day
+            end += 86400 - 1e-6
+        if last_commits:
+            row = conn.execute(
+                "SELECT MIN(timestamp) FROM (SELECT timestamp FROM history_commits WHERE repo = ? AND timestamp <= ? "
+                "ORDER BY timestamp DESC LIMIT ?)",
+                (repo, end, last_commits),
+            ).fetchone()
+            if row[0] is not None:
+                start = max(start, row[0])
+        return start, end
+
+    def churn(self, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+              last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Files ranked by lines added plus deleted in the range, with how many commits touched them.
+        """
+        with self._connect() as conn:
+            start, end = self._range(conn, repo, since, until, last_commits)
+            rows = conn.execute(
+                "SELECT filename, COUNT(*), SUM(additions), SUM(deletions), SUM(findings) FROM history_files "
+                "WHERE repo = ? AND timestamp BETWEEN ? AND ? GROUP BY filename "
+                "ORDER BY SUM(additions) + SUM(deletions) DESC, filename LIMIT ?",
+                (repo, start, end, limit),
+            ).fetchall()
+            commits = self._commit_count(conn, repo, start, end)
+        return {
+            "commits": commits,
+            "files": [
+                {"filename": name, "commits": count, "additions": added, "deletions": deleted,
+                 "churn": added + deleted, "findings": found}
+                for name, count, added, deleted, found in rows
+            ],
+        }
+
+    def hotspots(self, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+                 last_commits: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Files that change often and are complex: score = commits touching the file x its latest measured complexity.
+        """
+        with self._connect() as conn:
+            start, end = self._range(conn, repo, since, until, last_commits)
+            rows = conn.execute(
+                """
+                WITH touched AS (
+                    SELECT filename, COUNT(*) AS commits, SUM(additions + deletions) AS churn, SUM(findings) AS findings
+                    FROM history_files WHERE repo = ? AND timestamp BETWEEN ? AND ? GROUP BY filename
+                )
+                SELECT t.filename, t.commits, t.churn, t.findings, l.loc, l.complexity,
+                       t.commits * COALESCE(l.complexity, 1) AS score
+                FROM touched t LEFT JOIN history_files l ON l.rowid = (
+                    -- Latest measurement of the file, found through the (repo, filename, timestamp) index
+                    SELECT rowid FROM history_files
+                    WHERE repo = ? AND filename = t.filename AND timestamp <= ? AND complexity IS NOT NULL
+                    ORDER BY timestamp DESC LIMIT 1
+                )
+                ORDER BY score DESC, t.churn DESC, t.filename LIMIT ?
+                """,
+                (repo, start, end, repo, end, limit),
+            ).fetchall()
+            commits = self._commit_count(conn, repo, start, end)
+        return {
+            "commits": commits,
+            "files": [
+                {"filename": name, "commits": count, "churn": churn, "findings": found, "loc": loc,
+                 "complexity": complexity, "score": score}
+                for name, count, churn, found, loc, complexity, score in rows
+            ],
+        }
+
+    def trend(self, repo: str, since: Optional[str] = None, until: Optional[str] = None,
+              last_commits: Optional[int] = None, bucket: str = "week") -> Dict[str, Any]:
+        """
+        Findings, review issues and line changes over time, per ``bucket`` ("commit", "day", "week" or "month").
+
+        Buckets are in UTC; weeks are ISO weeks starting on Monday and months are calendar months.
+        """
+        if bucket != "commit" and bucket not in TREND_BUCKETS:
+            return {"error": f"Unknown bucket '{bucket}', use commit, day, week or month"}
+        with self._connect() as conn:
+            start, end = self._range(conn, repo, since, until, last_commits)
+            if bucket == "commit":
+                rows = conn.execute(
+                    "SELECT sha, timestamp, findings, review_issues, additions, deletions FROM history_commits "
+                    "WHERE repo = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                    (repo, start, end),
+                ).fetchall()
+                points = [
+                    {"sha": sha, "date": _iso(ts), "findings": found, "review_issues": issues,
+                     "additions": added, "deletions": deleted}
+                    for sha, ts, found, issues, added, deleted in rows
+                ]
+            else:
+                rows = conn.execute(
+                    f"SELECT {TREND_BUCKETS[bucket]} AS slot, COUNT(*), SUM(findings), SUM(review_issues), "
+                    "SUM(additions), SUM(deletions) FROM history_commits "
+                    "WHERE repo = ? AND timestamp BETWEEN ? AND ? GROUP BY slot ORDER BY slot",
+                    (repo, start, end),
+                ).fetchall()
+                points = [
+                    {"start": _iso(parse_timestamp(slot)), "commits": count, "findings": found, "review_issues": issues,
+                     "additions": added, "deletions": deleted}
+                    for slot, count, found, issues, added, deleted in rows
+                ]
+        return {"bucket": bucket, "points": points}
+
+    def summary(self, repo: str) -> Dict[str, Any]:
+        """
+        Returns how many commits are stored and the time span they cover.
+        """
+        with self._connect() as conn:
+            count, first, last = conn.execute(
+                "SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM history_commits WHERE repo = ?", (repo,)
+            ).fetchone()
+        return {"commits": count, "first": _iso(first) if first else None, "last": _iso(last) if last else None}
+
+    @staticmethod
+    def _commit_count(conn, repo: str, start: float, end: float) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM history_commits WHERE repo = ? AND timestamp BETWEEN ? AND ?", (repo, start, end)
+        ).fetchone()[0]
+
+
+async def update_history(repo: str, limit: int = 200, topology: str = "remote") -> Dict[str, Any]:
+    """
+    Ingests the newest ``limit`` commits not yet in the history, through the worker agents.
+    """
+    semaphore = asyncio.Semaphore(int(os.getenv("PIPELINE_CONCURRENCY", "8")))
+    if topology == "local":
+        workers = LocalWorkers(semaphore)
+    else:
+        workers = RemoteWorkers(semaphore, float(os.getenv("PIPELINE_TIMEOUT", "120")))
+    try:
+        return await get_metrics_history().ingest(
+            workers,
+            repo,
+            limit=limit,
+            max_pages=int(os.getenv("REPO_BUDGET_MAX_PAGES", "5")),
+            metrics_files=int(os.getenv("HISTORY_METRICS_FILES", "20")),
+        )
+    except Exception as e:
+        return {"error": f"Could not update the metrics history: {e}"}
+
+
+_metrics_history: Optional[MetricsHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_metrics_history() -> MetricsHistory:
+    """
+    Returns the process-wide metrics history (HISTORY_DB_PATH).
+    """
+    global _metrics_history
+    with _history_lock:
+        if _metrics_history is None:
+            _metrics_history = MetricsHistory(os.getenv("HISTORY_DB_PATH", "history.db"))
+        return _metrics_history
@@ -0,0 +1,296 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from typing import AsyncGenerator, List, Dict, Any, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from common.github import parse_repo_name
+from dev_manager_agent.replicas import replica_client
+from dev_manager_agent.report_cache import get_commit_cache
+from dev_manager_agent.services import DEFAULT_SERVICE_URLS
+from dev_manager_agent.work_queue import get_commit_queue, queue_enabled
+from repo_agent.budget import budget_files, default_budget
+
+logger = logging.getLogger(__name__)
+
+# Session state key the collector writes and the report writer reads
+ACTIVITY_STATE_KEY = "activity"
+
+# "last 5 commits", "the 3 most recent commits", "latest 20 commits"
+COMMIT_COUNT_PATTERN = re.compile(r"\b(\d+)\s+(?:(?:most\s+)?(?:recent|latest|last)\s+)?commits?\b", re.IGNORECASE)
+
+
+def requested_commit_count(content: Optional[types.Content]) -> Optional[int]:
+    """
+    Returns the number of commits a prompt asks about ("last 5 commits"), or None if it names none.
+    """
+    text = " ".join(part.text for part in (content.parts or []) if part.text) if content else ""
+    match = COMMIT_COUNT_PATTERN.search(text)
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else None
+
+
+class RemoteWorkers:
+    """
+    Calls the worker agents' JSON endpoints over HTTP, load balanced over their replicas.
+
+    The clients are the process-wide replica clients, so building one of these
+    is cheap and connections are pooled across calls; there is nothing to close.
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore, timeout: float):
+        self.semaphore = semaphore
+        self.clients = {name: replica_client(name, timeout) for name in DEFAULT_SERVICE_URLS}
+
+    async def _request(self, service: str, method: str, path: str, **kwargs) -> Any:
+        async with self.semaphore:
+            response = await self.clients[service].request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def recent_commits(self, limit: int) -> List[Dict[str, Any]]:
+        return await self._request("repo_agent", "GET", "/repo/commits", params={"limit": limit})
+
+    async def head(self) -> Dict[str, Any]:
+        return await self._request("repo_agent", "GET", "/repo/head")
+
+    async def commit_changes(self, sha: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        params = {"cursor": cursor} if cursor else None
+        return await self._request("repo_agent", "GET", f"/repo/commits/{sha}", params=params)
+
+    async def file_content(self, path: str, ref: str) -> Optional[str]:
+        result = await self._request("repo_agent", "GET", "/repo/file", params={"path": path, "ref": ref})
+        return result.get("content")
+
+    async def scan_diff(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._request("security_agent", "POST", "/scan/diff", json={"files": files})
+
+    async def review_diff(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._request("reviewer_agent", "POST", "/review/diff", json={"files": files})
+
+    async def review_metrics(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._request("reviewer_agent", "POST", "/review/metrics", json={"files": files})
+
+
+class LocalWorkers:
+    """
+    Calls the worker agents' tool functions in this process (AGENT_TOPOLOGY=local).
+
+    The tools are blocking, so each call runs in a worker thread.
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+
+    async def _call(self, fn, *args) -> Any:
+        async with self.semaphore:
+            return await asyncio.to_thread(fn, *args)
+
+    async def recent_commits(self, limit: int) -> List[Dict[str, Any]]:
+        from repo_agent.agent import fetch_recent_commits
+        return await self._call(fetch_recent_commits, limit)
+
+    async def head(self) -> Dict[str, Any]:
+        from repo_agent.agent import get_head_sha
+        return await self._call(get_head_sha)
+
+    async def commit_changes(self, sha: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        from repo_agent.agent import analyze_code_changes
+        return await self._call(analyze_code_changes, sha, cursor)
+
+    async def file_content(self, path: str, ref: str) -> Optional[str]:
+        from repo_agent.agent import read_file
+        return (await self._call(read_file, path, ref)).get("content")
+
+    async def scan_diff(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from security_agent.agent import scan_commit_changes
+        return await self._call(scan_commit_changes, files)
+
+    async def review_diff(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from reviewer_agent.agent import review_commit_changes
+        return await self._call(review_commit_changes, files)
+
+    async def review_metrics(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from reviewer_agent.agent import analyze_code_quality
+        return {"results": [
+            {"filename": f["filename"], "quality": await self._call(analyze_code_quality, f["content"])} for f in files
+        ]}
+
+
+class ActivityCollectorAgent(BaseAgent):
+    """
+    Gathers the data for an activity report without involving the LLM.
+
+    Lists the recent commits, then for every commit fetches its diff and sends
+    it to security_agent and reviewer_agent (over their JSON endpoints, or
+    directly when ``topology`` is "local"). Commits are processed concurrently
+    (at most ``concurrency`` calls in flight), so the total time follows the
+    slowest commit rather than the sum.
+
+    A count named in the user's prompt ("the last 5 commits") sets how many
+    commits are listed, capped at ``commit_limit``, which is also the default.
+    """
+
+    commit_limit: int = 10
+    concurrency: int = 8
+    timeout: float = 120.0
+    topology: str = "remote"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        workers = LocalWorkers(semaphore) if self.topology == "local" else RemoteWorkers(semaphore, self.timeout)
+        requested = requested_commit_count(ctx.user_content)
+        limit = min(requested, self.commit_limit) if requested else self.commit_limit
+        activity = await self.collect(workers, limit)
+        activity["commit_window"] = limit
+        activity["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        logger.info(f"Collected {len(activity['commits'])} commits in {activity['elapsed_seconds']}s")
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={ACTIVITY_STATE_KEY: json.dumps(activity, default=str)}),
+        )
+
+    async def collect(self, workers, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns {"commits": [...], "errors": [...]} for the ``limit`` (default ``commit_limit``) most recent commits.
+        """
+        try:
+            commits = await workers.recent_commits(limit or self.commit_limit)
+        except Exception as e:
+            return {"commits": [], "errors": [f"Could not list commits: {e}"]}
+        if commits and "error" in commits[0]:
+            return {"commits": [], "errors": [commits[0]["error"]]}
+
+        precomputed = await precomputed_results([commit["sha"] for commit in commits])
+        results = await asyncio.gather(
+            *(self._process_commit(workers, commit, precomputed.get(commit["sha"])) for commit in commits)
+        )
+        return {"commits": results, "errors": [r["error"] for r in results if "error" in r]}
+
+    async def _process_commit(self, workers, commit: Dict[str, Any], precomputed: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # A commit never changes, so its findings are reused by every later report
+        cache = get_commit_cache()
+        cache_key = f"{os.getenv('GITHUB_REPO_URL', '')}:{commit['sha']}:{os.getenv('REPORT_CACHE_VERSION', '1')}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        # Commits pushed since the webhook service started were already analyzed by its workers
+        result = precomputed or await analyze_commit(workers, commit)
+        if "error" not in result:
+            cache.put(cache_key, result)
+        return result
+
+
+async def analyze_commit(workers, commit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fetches one commit's diff, budgets it and runs the security scan and code review on it.
+
+    Args:
+        workers: LocalWorkers or RemoteWorkers.
+        commit: Dictionary with the commit's "sha" (and "author", "date", "message").
+
+    Returns:
+        The commit summary with its findings, or with an "error" key if it could not be analyzed.
+    """
+    summary = {key: commit.get(key) for key in ("sha", "author", "date", "message")}
+    try:
+        changes = await workers.commit_changes(commit["sha"])
+        if "error" in changes:
+            return dict(summary, error=f"{commit['sha'][:7]}: {changes['error']}")
+
+        # Compacted, risk-ranked patches within the token budget; the rest are only listed
+        budgeted = budget_files(changes.get("files", []), default_budget(), commit["sha"])
+        files = [{"filename": f["filename"], "patch": f["patch"]} for f in budgeted["files"]]
+        security, review = await asyncio.gather(workers.scan_diff(files), workers.review_diff(files))
+    except Exception as e:
+        return dict(summary, error=f"{commit['sha'][:7]}: {e}")
+
+    # Only results go to the LLM, never the patches themselves
+    return dict(
+        summary,
+        stats=changes.get("stats"),
+        files=[f["filename"] for f in files],
+        deferred=[f["filename"] for f in budgeted["deferred"]],
+        skipped=changes.get("skipped", []),
+        truncated=bool(changes.get("next_cursor")),
+        security_findings=security.get("findings", []),
+        review_issues=review.get("issues", []),
+    )
+
+
+async def precomputed_results(shas: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the analyses the webhook workers already stored for these commits, keyed by SHA.
+    """
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    if not queue_enabled() or not repo_url:
+        return {}
+    try:
+        return await asyncio.to_thread(get_commit_queue().results, parse_repo_name(repo_url), shas)
+    except Exception as e:
+        logger.warning(f"Could not read precomputed results: {e}")
+        return {}
+
+
+async def fetch_head_sha(topology: str, timeout: float = 10.0) -> Optional[str]:
+    """
+    Returns the repository's current HEAD SHA via repo_agent, or None if it cannot be resolved.
+    """
+    semaphore = asyncio.Semaphore(1)
+    workers = LocalWorkers(semaphore) if topology == "local" else RemoteWorkers(semaphore, timeout)
+    try:
+        head = await workers.head()
+    except Exception as e:
+        logger.warning(f"Could not resolve HEAD: {e}")
+        return None
+    return head.get("sha")
+
+
+REPORT_INSTRUCTION = """You are the Dev Manager. Write an activity report for the user from the data below,
+which was collected from the repository, security scanner and code reviewer.
+
+The data covers the last "commit_window" commits; say so, and if the user asked for more commits
+than that, tell them the report is limited to this many.
+For each commit give its short SHA, author and a one-line summary, then the security findings
+and review issues that matter. Finish with an overall assessment and the most important follow-ups.
+If a commit has "truncated": true or lists "deferred" files, mention that only part of its diff was scanned.
+Mention any errors briefly. Do not invent findings that are not in the data.
+
+Data (JSON):
+{activity?}
+"""
+
+
+def build_pipeline(model: str = "gemini-2.0-flash") -> SequentialAgent:
+    """
+    Builds the report pipeline: deterministic collection, then one LLM call to write the report.
+    """
+    collector = ActivityCollectorAgent(
+        name="activity_collector",
+        description="Fetches recent commits and scans their diffs in parallel.",
+        commit_limit=int(os.getenv("PIPELINE_COMMIT_LIMIT", "10")),
+        concurrency=int(os.getenv("PIPELINE_CONCURRENCY", "8")),
+        timeout=float(os.getenv("PIPELINE_TIMEOUT", "120")),
+        topology=os.getenv("AGENT_TOPOLOGY", "remote"),
+    )
+    report_writer = LlmAgent(
+        name="report_writer",
+        model=model,
+        description="Turns the collected activity data into a report.",
+        instruction=REPORT_INSTRUCTION,
+    )
+    return SequentialAgent(
+        name="dev_manager",
+        description="Activity report pipeline: parallel collection, then a single LLM consolidation step.",
+        sub_agents=[collector, report_writer],
+    )
@@ -0,0 +1,101 @@
+"""
+Replays recorded GitHub push payloads against the local webhook endpoint.
+
+Every payload is signed with WEBHOOK_SECRET exactly like GitHub does, so the
+endpoint's signature check is exercised too. Payloads come from JSON files
+(or directories of them, e.g. copied from the repository's webhook delivery
+log), or are built from the last commits of a local git checkout.
+
+Usage:
+    uv run python -m dev_manager_agent.replay_webhooks payloads/*.json
+    uv run python -m dev_manager_agent.replay_webhooks --git 5 --checkout .
+"""
+import os
+import sys
+import json
+import uuid
+import argparse
+import subprocess
+from typing import Any, Dict, Iterator
+
+import httpx
+from dotenv import load_dotenv
+
+from common.github import parse_repo_name
+from dev_manager_agent.webhooks import sign_payload
+
+
+def iter_payload_files(paths) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".json"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def load_payload(path: str) -> Dict[str, Any]:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def payload_from_git(checkout: str, count: int, repo_url: str) -> Dict[str, Any]:
+    """
+    Builds a push payload for the last ``count`` commits of a local checkout.
+    """
+    separator = "\x1f"
+    log = subprocess.run(
+        ["git", "-C", checkout, "log", f"-{count}", f"--format=%H{separator}%an{separator}%aI{separator}%s"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    commits = []
+    for line in reversed(log.splitlines()):
+        sha, author, date, message = line.split(separator, 3)
+        commits.append({"id": sha, "distinct": True, "timestamp": date, "message": message, "author": {"name": author}})
+    return {
+        "ref": "refs/heads/main",
+        "after": commits[-1]["id"] if commits else None,
+        "deleted": False,
+        "repository": {"full_name": parse_repo_name(repo_url)},
+        "commits": commits,
+    }
+
+
+def post_payload(client: httpx.Client, url: str, secret: str, payload: Dict[str, Any]) -> httpx.Response:
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": "push",
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "X-Hub-Signature-256": sign_payload(secret, body),
+    }
+    return client.post(url, content=body, headers=headers)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Replay push webhooks against the Dev Manager.")
+    parser.add_argument("payloads", nargs="*", help="Recorded push payloads (JSON files or directories)")
+    parser.add_argument("--git", type=int, metavar="N", help="Build one push from the last N commits of --checkout")
+    parser.add_argument("--checkout", default=".", help="Local checkout used with --git")
+    parser.add_argument("--url", default=os.getenv("WEBHOOK_URL", "http://127.0.0.1:8000/webhooks/github"))
+    args = parser.parse_args()
+
+    secret = os.getenv("WEBHOOK_SECRET")
+    if not secret:
+        sys.exit("WEBHOOK_SECRET is not set")
+    payloads = [(path, load_payload(path)) for path in iter_payload_files(args.payloads)]
+    if args.git:
+        payloads.append((f"git log -{args.git}", payload_from_git(args.checkout, args.git, os.getenv("GITHUB_REPO_URL", ""))))
+    if not payloads:
+        parser.error("no payloads given")
+
+    with httpx.Client(timeout=30.0) as client:
+        for source, payload in payloads:
+            response = post_payload(client, args.url, secret, payload)
+            print(f"{source}: {response.status_code} {response.text}")
+
+
+if __name__ == "__main__":
+    main()
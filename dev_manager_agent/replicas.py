@@ -0,0 +1,339 @@
+import os
+import time
+import asyncio
+import logging
+import weakref
+import threading
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+import httpx
+
+from dev_manager_agent.services import service_urls
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """
+    One endpoint of a worker agent, with its own keep-alive connection pool.
+
+    Connections belong to the event loop that opened them, and the process
+    runs several loops (the A2A server, the Streamlit background loop, each
+    ``asyncio.run``), so there is one connection pool per loop.
+    """
+
+    def __init__(self, url: str, max_connections: int):
+        self.url = httpx.URL(url.rstrip("/"))
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.max_connections = max_connections
+        # A loop that is gone takes its connection pool with it
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._transports_lock = threading.Lock()
+
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        """
+        Returns the connection pool of the running event loop, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        with self._transports_lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                )
+                self._transports[loop] = transport
+            return transport
+
+    async def aclose(self) -> None:
+        """
+        Closes the running loop's connection pool (pools of other loops are theirs to close).
+        """
+        with self._transports_lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    def route(self, request: httpx.Request, raw_path: bytes) -> None:
+        # Keep path and query, swap the origin (and any path prefix) for this replica's
+        request.url = request.url.copy_with(
+            scheme=self.url.scheme,
+            host=self.url.host,
+            port=self.url.port,
+            raw_path=self.url.raw_path.rstrip(b"/") + raw_path,
+        )
+        request.headers["Host"] = self.url.netloc.decode("ascii")
+
+
+class ReplicaPool:
+    """
+    Client-side load balancer over the replicas of one worker agent.
+
+    Requests go to the healthy replica with the fewest requests in flight.
+    After ``eject_after`` consecutive failures (connection errors or 5xx) a
+    replica is ejected for ``eject_seconds``; ejected replicas are probed in
+    the background every ``health_interval`` seconds and return as soon as
+    their agent card answers. If every replica is ejected, the one due back
+    first is used rather than failing outright.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        urls: List[str],
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        health_interval: float = 10.0,
+        health_path: str = "/.well-known/agent-card.json",
+        max_connections: int = 20,
+    ):
+        if not urls:
+            raise ValueError(f"No endpoints configured for {name}")
+        self.name = name
+        self.replicas = [Replica(url, max_connections) for url in urls]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.health_path = health_path
+        self._lock = threading.Lock()
+        self._next = 0
+        self._last_health_check = 0.0
+        # Running probes: the event loop only keeps weak references to its tasks
+        self._health_tasks: Set[asyncio.Task] = set()
+
+    def acquire(self, exclude: Optional[List[Replica]] = None) -> Replica:
+        """
+        Picks a replica and counts the request against it; pair with ``release``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [r for r in self.replicas if not exclude or r not in exclude] or self.replicas
+            healthy = [r for r in candidates if r.ejected_until <= now]
+            if healthy:
+                # Least outstanding requests; rotate the starting point so ties spread evenly
+                self._next = (self._next + 1) % len(healthy)
+                rotated = healthy[self._next:] + healthy[:self._next]
+                replica = min(rotated, key=lambda r: r.outstanding)
+            else:
+                replica = min(candidates, key=lambda r: r.ejected_until)
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def release(self, replica: Replica, ok: bool) -> None:
+        """
+        Ends a request and updates the replica's failure streak.
+        """
+        with self._lock:
+            replica.outstanding -= 1
+            if ok:
+                replica.failures = 0
+                replica.ejected_until = 0.0
+                return
+            replica.failures += 1
+            if replica.failures >= self.eject_after and replica.ejected_until <= time.monotonic():
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+                logger.warning(f"Ejecting {self.name} replica {replica.url} after {replica.failures} failures")
+
+    def maybe_check_health(self) -> None:
+        """
+        Starts a background probe of ejected replicas if one is due.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_health_check < self.health_interval:
+                return
+            self._last_health_check = now
+            ejected = [r for r in self.replicas if r.ejected_until > now]
+        if ejected:
+            task = asyncio.get_running_loop().create_task(self.check_health(ejected))
+            with self._lock:
+                self._health_tasks.add(task)
+            task.add_done_callback(self._health_task_done)
+
+    def _health_task_done(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._health_tasks.discard(task)
+
+    async def check_health(self, replicas: Optional[List[Replica]] = None) -> None:
+        """
+        Probes replicas (all by default) and reinstates those that answer.
+        """
+        for replica in replicas or self.replicas:
+            request = httpx.Request("GET", replica.url.join(self.health_path))
+            try:
+                response = await replica.transport().handle_async_request(request)
+                await response.aclose()
+                healthy = response.status_code < 500
+            except httpx.TransportError:
+                healthy = False
+            with self._lock:
+                if healthy:
+                    if replica.ejected_until:
+                        logger.info(f"{self.name} replica {replica.url} is healthy again")
+                    replica.failures = 0
+                    replica.ejected_until = 0.0
+                elif replica.ejected_until <= time.monotonic():
+                    replica.failures = max(replica.failures, self.eject_after)
+                    replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns per-replica load and health.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "name": self.name,
+                "replicas": [
+                    {
+                        "url": str(r.url),
+                        "outstanding": r.outstanding,
+                        "requests": r.requests,
+                        "failures": r.failures,
+                        "ejected": r.ejected_until > now,
+                    }
+                    for r in self.replicas
+                ],
+            }
+
+    async def aclose(self) -> None:
+        """
+        Cancels the running loop's health probes and closes its connections to every replica.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            probes = [task for task in self._health_tasks if task.get_loop() is loop]
+        for task in probes:
+            task.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+        for replica in self.replicas:
+            await replica.aclose()
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    # A request stays outstanding until its response body has been read or closed
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+class ReplicaTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that sends every request to a replica chosen by a ReplicaPool.
+
+    The request's own host is ignored, so agent cards that advertise a single
+    URL still spread their calls over all replicas. Requests that fail to
+    connect are retried on another replica, since nothing reached the server.
+    """
+
+    def __init__(self, pool: ReplicaPool):
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.pool.maybe_check_health()
+        raw_path = request.url.raw_path
+        tried: List[Replica] = []
+        while True:
+            replica = self.pool.acquire(exclude=tried)
+            tried.append(replica)
+            replica.route(request, raw_path)
+            try:
+                response = await replica.transport().handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.pool.release(replica, ok=False)
+                if len(tried) < len(self.pool.replicas):
+                    continue
+                raise
+            except Exception:
+                self.pool.release(replica, ok=False)
+                raise
+
+            released = False
+
+            def release(replica=replica, ok=response.status_code < 500):
+                nonlocal released
+                if not released:
+                    released = True
+                    self.pool.release(replica, ok)
+
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_TrackedStream(response.stream, release),
+                extensions=response.extensions,
+            )
+
+
+_pools: Dict[str, ReplicaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_replica_pool(name: str) -> ReplicaPool:
+    """
+    Returns the process-wide pool for a worker agent, built from its configured endpoints.
+
+    Endpoints come from e.g. SECURITY_AGENT_URLS (comma separated), falling
+    back to SECURITY_AGENT_URL and then the default local port.
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ReplicaPool(
+                name,
+                service_urls(name),
+                eject_after=int(os.getenv("REPLICA_EJECT_AFTER", "3")),
+                eject_seconds=float(os.getenv("REPLICA_EJECT_SECONDS", "30")),
+                health_interval=float(os.getenv("REPLICA_HEALTH_INTERVAL", "10")),
+                max_connections=int(os.getenv("REPLICA_MAX_CONNECTIONS", "20")),
+            )
+            _pools[name] = pool
+        return pool
+
+
+_clients: Dict[Tuple[str, float], httpx.AsyncClient] = {}
+
+
+def replica_client(name: str, timeout: float = 600.0) -> httpx.AsyncClient:
+    """
+    Returns the shared httpx client whose requests are load balanced over the agent's replicas.
+
+    The client holds no connections itself (they live in the replicas' per-loop
+    pools), so one client per agent and timeout serves every loop and caller.
+    It must not be closed; use ``close_replica_pools`` on shutdown instead.
+    """
+    pool = get_replica_pool(name)
+    with _pools_lock:
+        client = _clients.get((name, timeout))
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=ReplicaTransport(pool),
+                base_url=service_urls(name)[0],
+                timeout=httpx.Timeout(timeout),
+            )
+            _clients[(name, timeout)] = client
+        return client
+
+
+async def close_replica_pools() -> None:
+    """
+    Closes the running loop's connections to every replica of every worker agent.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        await pool.aclose()
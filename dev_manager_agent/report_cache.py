@@ -0,0 +1,238 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Activity-report prompts, whose answer depends only on the repository, not on the conversation
+# so far. Matched against the whole normalized prompt, so "summarize that file" or "status of
+# this PR" (which refer to earlier turns) never hit the cache.
+DEFAULT_REPORT_PATTERN = (
+    r"((please|can you|could you) )?((give|show|send|get) me |write |generate |create |make |produce )?"
+    r"(an? |the |my )?((activity|status|sprint|progress|weekly|daily) )+(report|summary|update)"
+    r"( (of|on|for|about|covering|based on|from|over|across|using) (the )?((recent|latest|last( \d+)?|past( \d+)?) )?"
+    r"(activity|changes|commits|week|days|sprint|repo|repository))?( please)?"
+    r"|what'?s new( in the repo(sitory)?)?"
+    r"|(summari[sz]e|report on) (the )?(recent|latest|last( \d+)?) (activity|changes|commits)( in the repo(sitory)?)?"
+)
+
+
+class TTLCache:
+    """
+    Bounded LRU whose entries also expire ``ttl`` seconds after they were stored.
+
+    Every entry carries a small metadata dict, so related entries (e.g. all
+    reports of a repository at an older HEAD) can be dropped together.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidated": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[2]
+
+    def put(self, key: str, value: Any, **meta: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, meta, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """
+        Drops every entry whose metadata matches; returns how many were dropped.
+        """
+        with self._lock:
+            stale = [key for key, (_, meta, _) in self._entries.items() if predicate(meta)]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidated"] += len(stale)
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters plus the current size.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Lowercases a prompt and collapses whitespace and trailing punctuation, so trivially different phrasings share an entry.
+    """
+    return re.sub(r"\s+", " ", text).strip().rstrip(".!?").strip().lower()
+
+
+def config_version(agent: BaseAgent) -> str:
+    """
+    Returns a short hash of everything in the agent tree that shapes a report:
+    agent names and types, models, instructions and the collector's settings,
+    plus REPORT_CACHE_VERSION for manual invalidation.
+    """
+    def describe(node: BaseAgent) -> Dict[str, Any]:
+        fields = {
+            name: getattr(node, name)
+            for name in ("model", "instruction", "commit_limit", "topology")
+            if isinstance(getattr(node, name, None), (str, int, float))
+        }
+        return {
+            "name": node.name,
+            "type": type(node).__name__,
+            "fields": fields,
+            "sub_agents": [describe(sub) for sub in node.sub_agents],
+        }
+
+    payload = json.dumps([describe(agent), os.getenv("REPORT_CACHE_VERSION", "1")], sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ReportCacheCallbacks:
+    """
+    before/after agent callbacks that serve repeated report requests from a cache.
+
+    The key is (normalized prompt, repository, HEAD SHA, config version), so a
+    push yields a new key; when a new HEAD is seen, the repository's entries
+    for older HEADs are dropped straight away. Only prompts that ``pattern``
+    matches in full (activity report requests) are cached, since their
+    answer does not depend on the conversation before them.
+
+    A miss is remembered until ``after_agent`` stores the report; misses
+    whose invocation never finished are dropped after ``pending_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        cache: TTLCache,
+        resolve_head: Callable[[], Awaitable[Optional[str]]],
+        version: str,
+        pattern: str = DEFAULT_REPORT_PATTERN,
+        pending_ttl: float = 900.0,
+    ):
+        self.cache = cache
+        self.resolve_head = resolve_head
+        self.version = version
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.pending_ttl = pending_ttl
+        # invocation_id -> (key, repo, head, started) of the report being generated on a miss
+        self._pending: Dict[str, Tuple[str, str, str, float]] = {}
+        self._pending_lock = threading.Lock()
+
+    async def before_agent(self, callback_context: CallbackContext) -> Optional[types.Content]:
+        self._drop_stale_pending()
+        content = callback_context.user_content
+        prompt = " ".join(p.text for p in (content.parts if content and content.parts else []) if p.text)
+        if not prompt or not self.pattern.fullmatch(normalize_prompt(prompt)):
+            return None
+        repo = os.getenv("GITHUB_REPO_URL", "")
+        head = await self.resolve_head()
+        if not head:
+            return None
+
+        dropped = self.cache.invalidate(lambda meta: meta.get("repo") == repo and meta.get("head") != head)
+        if dropped:
+            logger.info(f"Dropped {dropped} cached reports for {repo}: HEAD moved to {head[:7]}")
+
+        raw_key = "\0".join((normalize_prompt(prompt), repo, head, self.version))
+        key = hashlib.blake2b(raw_key.encode("utf-8"), digest_size=16).hexdigest()
+        report = self.cache.get(key)
+        if report is not None:
+            logger.info(f"Serving cached report for HEAD {head[:7]}")
+            return types.Content(role="model", parts=[types.Part(text=report)])
+        with self._pending_lock:
+            self._pending[callback_context.invocation_id] = (key, repo, head, time.monotonic())
+        return None
+
+    async def after_agent(self, callback_context: CallbackContext) -> None:
+        with self._pending_lock:
+            pending = self._pending.pop(callback_context.invocation_id, None)
+        if pending is None:
+            return None
+        key, repo, head, _ = pending
+        # The report is the last text the agent tree produced in this invocation
+        for event in reversed(callback_context.session.events):
+            if event.invocation_id != callback_context.invocation_id or event.author == "user":
+                continue
+            if event.partial or not event.content or not event.content.parts:
+                continue
+            if any(p.function_call or p.function_response for p in event.content.parts):
+                break
+            text = "".join(p.text for p in event.content.parts if p.text and not p.thought)
+            if text.strip():
+                self.cache.put(key, text, repo=repo, head=head)
+            break
+        return None
+
+    def _drop_stale_pending(self) -> None:
+        # An invocation that failed or was cancelled never reaches after_agent
+        cutoff = time.monotonic() - self.pending_ttl
+        with self._pending_lock:
+            stale = [invocation for invocation, (*_, started) in self._pending.items() if started < cutoff]
+            for invocation in stale:
+                del self._pending[invocation]
+
+
+_report_cache: Optional[TTLCache] = None
+_commit_cache: Optional[TTLCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> TTLCache:
+    """
+    Returns the process-wide cache of finished reports (REPORT_CACHE_SIZE, REPORT_CACHE_TTL).
+    """
+    global _report_cache
+    with _cache_lock:
+        if _report_cache is None:
+            _report_cache = TTLCache(
+                max_entries=int(os.getenv("REPORT_CACHE_SIZE", "64")),
+                ttl=float(os.getenv("REPORT_CACHE_TTL", "900")),
+            )
+        return _report_cache
+
+
+def get_commit_cache() -> TTLCache:
+    """
+    Returns the process-wide cache of per-commit scan and review results.
+
+    Commits are immutable, so entries live long (COMMIT_CACHE_TTL, a week by default).
+    The cache is in memory only and is used by the report pipeline; nothing survives
+    a restart. Durable per-commit results come from the webhook work queue.
+    """
+    global _commit_cache
+    with _cache_lock:
+        if _commit_cache is None:
+            _commit_cache = TTLCache(
+                max_entries=int(os.getenv("COMMIT_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("COMMIT_CACHE_TTL", str(7 * 24 * 3600))),
+            )
+        return _commit_cache
@@ -0,0 +1,28 @@
+import os
+from typing import List
+
+# Where each worker agent listens; override with e.g. SECURITY_AGENT_URL=http://scanner:8002
+DEFAULT_SERVICE_URLS = {
+    "repo_agent": "http://127.0.0.1:8001",
+    "security_agent": "http://127.0.0.1:8002",
+    "reviewer_agent": "http://127.0.0.1:8003",
+}
+
+
+def service_urls(name: str) -> List[str]:
+    """
+    Returns every replica URL of a worker agent (no trailing slashes).
+
+    SECURITY_AGENT_URLS=http://a:8002,http://b:8002 lists several replicas;
+    otherwise the single SECURITY_AGENT_URL (or the default) is used.
+    """
+    urls = os.getenv(f"{name.upper()}_URLS", "")
+    urls = [url.strip().rstrip("/") for url in urls.split(",") if url.strip()]
+    return urls or [service_url(name)]
+
+
+def service_url(name: str) -> str:
+    """
+    Returns the base URL of a worker agent (no trailing slash).
+    """
+    return os.getenv(f"{name.upper()}_URL", DEFAULT_SERVICE_URLS[name]).rstrip("/")
@@ -0,0 +1,488 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event, EventActions
+from google.adk.events.event_actions import EventCompaction
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.genai import types
+
+from common.paths import PROJECT_DIR
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE INDEX IF NOT EXISTS sessions_update_time ON sessions (update_time);
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    author TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, timestamp);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+# Author of the summary events that replace compacted history
+COMPACTOR_AUTHOR = "session_compactor"
+
+# Rough token estimate for thresholds: about four bytes of JSON per token
+BYTES_PER_TOKEN = 4
+
+
+def split_state(state: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Splits a state (delta) into app-, user- and session-scoped parts, dropping temp: keys.
+    """
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def closed_boundaries(events: List[Event]) -> List[int]:
+    """
+    Returns the indices at which ``events`` can be split without separating a
+    function call from its response: every call before the index has been answered.
+    """
+    boundaries = []
+    pending = set()
+    for index, event in enumerate(events):
+        if index > 0 and not pending:
+            boundaries.append(index)
+        pending.update(call.id for call in event.get_function_calls())
+        pending.difference_update(response.id for response in event.get_function_responses())
+    return boundaries
+
+
+def summarize_events(events: List[Event], max_chars: int) -> str:
+    """
+    Builds a plain-text summary of compacted events: the user requests, the
+    agents' answers and the tools that were called, newest lines kept if it
+    runs over ``max_chars``.
+
+    The summary is extractive, so compaction never needs a model call.
+    """
+    lines = []
+    for event in events:
+        if event.actions and event.actions.compaction and event.actions.compaction.compacted_content:
+            # An earlier summary folds into this one
+            for part in event.actions.compaction.compacted_content.parts or []:
+                lines.extend(line for line in (part.text or "").splitlines()[1:] if line != "(older history omitted)")
+            continue
+        if not event.content or not event.content.parts:
+            continue
+        texts = " ".join(p.text.strip() for p in event.content.parts if p.text and not p.thought)
+        calls = [p.function_call.name for p in event.content.parts if p.function_call]
+        if texts:
+            who = "User" if event.author == "user" else event.author
+            limit = 300 if event.author == "user" else 600
+            lines.append(f"{who}: {texts[:limit]}{'…' if len(texts) > limit else ''}")
+        if calls:
+            lines.append(f"{event.author} called: {', '.join(calls)}")
+
+    header = f"Summary of {len(events)} earlier events in this conversation:"
+    kept, used = [], len(header)
+    for line in reversed(lines):
+        if used + len(line) + 1 > max_chars:
+            kept.append("(older history omitted)")
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join([header] + kept[::-1])
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service that keeps sessions in a SQLite file.
+
+    Several processes (uvicorn workers, Streamlit, the CLI) can share one
+    database: it runs in WAL mode, every write is its own immediate
+    transaction and state deltas are merged into the stored state rather
+    than overwriting it.
+
+    Once a session's stored events exceed ``compact_bytes`` or about
+    ``compact_tokens`` tokens, everything before a recent user turn (at least
+    ``keep_recent_events`` events are kept) is replaced by a single summary
+    event, which the model sees instead of the old history. A single long turn
+    is cut inside, between a tool response and the next call. When no cut is
+    possible the attempt is not repeated until another ``keep_recent_events``
+    events have been appended, so appends to such a session do not reload it
+    every time. Sessions idle for longer than ``idle_ttl`` seconds are deleted,
+    checked at most every ``evict_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        compact_bytes: int = 256 * 1024,
+        compact_tokens: int = 32000,
+        keep_recent_events: int = 20,
+        summary_chars: int = 4000,
+        idle_ttl: float = 7 * 24 * 3600,
+        evict_interval: float = 300.0,
+    ):
+        self.db_path = db_path
+        self.compact_bytes = compact_bytes
+        self.compact_tokens = compact_tokens
+        self.keep_recent_events = keep_recent_events
+        self.summary_chars = summary_chars
+        self.idle_ttl = idle_ttl
+        self.evict_interval = evict_interval
+        self._last_eviction = 0.0
+        self._lock = threading.Lock()
+        # Event count of each session at its last compaction attempt that found no cut
+        self._compact_attempted_at: Dict[Tuple[str, str, str], int] = {}
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            if not write:
+                yield conn
+                return
+            # Take the write lock up front so concurrent writers queue instead of failing mid-transaction
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    # ---- BaseSessionService ----
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await asyncio.to_thread(self._create_session, app_name, user_id, state, session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await asyncio.to_thread(self._get_session, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list_sessions, app_name, user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        compacted = await asyncio.to_thread(self._append_event, session, event)
+        if compacted is not None:
+            # Later model calls in this invocation already see the shorter history
+            session.events[:] = compacted
+        return event
+
+    # ---- Maintenance ----
+
+    async def evict_idle_sessions(self) -> int:
+        """
+        Deletes sessions idle for longer than ``idle_ttl``; returns how many were removed.
+        """
+        return await asyncio.to_thread(self._evict_idle_sessions)
+
+    # ---- Implementation (runs in worker threads) ----
+
+    def _create_session(self, app_name, user_id, state, session_id) -> Session:
+        self._maybe_evict()
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        app_delta, user_delta, session_state = split_state(state)
+        now = time.time()
+        with self._connect(write=True) as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if exists:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            self._merge_scoped_state(conn, app_name, user_id, app_delta, user_delta)
+            conn.execute(
+                "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) VALUES (?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, session_id, json.dumps(session_state), now, now),
+            )
+            app_state, user_state = self._scoped_state(conn, app_name, user_id)
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=session_state, last_update_time=now)
+        return self._with_scoped_state(session, app_state, user_state)
+
+    def _get_session(self, app_name, user_id, session_id, config) -> Optional[Session]:
+        self._maybe_evict()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            query = "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            params: List[Any] = [app_name, user_id, session_id]
+            if config and config.after_timestamp:
+                query += " AND timestamp >= ?"
+                params.append(config.after_timestamp)
+            query += " ORDER BY timestamp DESC"
+            if config and config.num_recent_events:
+                query += " LIMIT ?"
+                params.append(config.num_recent_events)
+            events = [Event.model_validate_json(data) for (data,) in conn.execute(query, params)][::-1]
+            app_state, user_state = self._scoped_state(conn, app_name, user_id)
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=json.loads(row[0]),
+            events=events,
+            last_update_time=row[1],
+        )
+        return self._with_scoped_state(session, app_state, user_state)
+
+    def _list_sessions(self, app_name, user_id) -> ListSessionsResponse:
+        query = "SELECT user_id, id, state, update_time FROM sessions WHERE app_name = ?"
+        params: List[Any] = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        sessions = []
+        with self._connect() as conn:
+            for row_user, row_id, state, update_time in conn.execute(query, params).fetchall():
+                app_state, user_state = self._scoped_state(conn, app_name, row_user)
+                session = Session(
+                    app_name=app_name, user_id=row_user, id=row_id, state=json.loads(state), last_update_time=update_time
+                )
+                sessions.append(self._with_scoped_state(session, app_state, user_state))
+        return ListSessionsResponse(sessions=sessions)
+
+    def _delete_session(self, app_name, user_id, session_id) -> None:
+        with self._lock:
+            self._compact_attempted_at.pop((app_name, user_id, session_id), None)
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+            conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            )
+
+    def _append_event(self, session: Session, event: Event) -> Optional[List[Event]]:
+        key = (session.app_name, session.user_id, session.id)
+        data = event.model_dump_json(exclude_none=True)
+        with self._connect(write=True) as conn:
+            row = conn.execute(
+                "SELECT state FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if row is None:
+                logger.warning(f"Failed to append event to session {session.id}: session not found")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO events (app_name, user_id, session_id, id, timestamp, author, size, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (event.id, event.timestamp, event.author, len(data), data),
+            )
+            app_delta, user_delta, session_delta = split_state(event.actions.state_delta if event.actions else None)
+            self._merge_scoped_state(conn, session.app_name, session.user_id, app_delta, user_delta)
+            stored_state = json.loads(row[0])
+            stored_state.update(session_delta)
+            conn.execute(
+                "UPDATE sessions SET state = ?, update_time = MAX(update_time, ?) WHERE app_name = ? AND user_id = ? AND id = ?",
+                (json.dumps(stored_state, default=str), event.timestamp) + key,
+            )
+            return self._maybe_compact(conn, key)
+
+    def _maybe_compact(self, conn: sqlite3.Connection, key: Tuple[str, str, str]) -> Optional[List[Event]]:
+        total_bytes, count = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?",
+            key,
+        ).fetchone()
+        if total_bytes <= self.compact_bytes and total_bytes / BYTES_PER_TOKEN <= self.compact_tokens:
+            return None
+        with self._lock:
+            attempted = self._compact_attempted_at.get(key)
+            if attempted is not None and count - attempted < self.keep_recent_events:
+                return None
+
+        events = [
+            Event.model_validate_json(data)
+            for (data,) in conn.execute(
+                "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY timestamp",
+                key,
+            )
+        ]
+        # Cut at the start of a user turn so no function call is separated from its response;
+        # prefer one that keeps the most recent events, else the latest turn
+        turns = [i for i, e in enumerate(events) if e.author == "user" and i > 0]
+        within = [i for i in turns if len(events) - i >= self.keep_recent_events]
+        cut = (within or turns or [0])[-1]
+        if cut <= 1:
+            # One long turn (e.g. many tool calls): cut inside it where no call awaits its response
+            boundaries = [i for i in closed_boundaries(events) if len(events) - i >= self.keep_recent_events]
+            cut = (boundaries or [0])[-1]
+        if cut <= 1:
+            with self._lock:
+                self._compact_attempted_at[key] = count
+            return None
+        with self._lock:
+            self._compact_attempted_at.pop(key, None)
+
+        old, recent = events[:cut], events[cut:]
+        summary_text = summarize_events(old, self.summary_chars)
+        start, end = old[0].timestamp, old[-1].timestamp
+        if old[0].actions and old[0].actions.compaction:
+            start = old[0].actions.compaction.start_timestamp
+        summary = Event(
+            author=COMPACTOR_AUTHOR,
+            invocation_id=old[-1].invocation_id,
+            timestamp=end,
+            actions=EventActions(compaction=EventCompaction(
+                start_timestamp=start,
+                end_timestamp=end,
+                compacted_content=types.Content(role="model", parts=[types.Part(text=summary_text)]),
+            )),
+        )
+        data = summary.model_dump_json(exclude_none=True)
+        conn.executemany(
+            "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND id = ?",
+            [key + (e.id,) for e in old],
+        )
+        conn.execute(
+            "INSERT INTO events (app_name, user_id, session_id, id, timestamp, author, size, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (summary.id, summary.timestamp, summary.author, len(data), data),
+        )
+        logger.info(f"Compacted {len(old)} events of session {key[2]} ({total_bytes} bytes) into a summary")
+        return [summary] + recent
+
+    def _maybe_evict(self) -> None:
+        if self.idle_ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_eviction < self.evict_interval:
+                return
+            self._last_eviction = now
+        try:
+            self._evict_idle_sessions()
+        except sqlite3.Error as e:
+            logger.warning(f"Session eviction failed: {e}")
+
+    def _evict_idle_sessions(self) -> int:
+        cutoff = time.time() - self.idle_ttl
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "DELETE FROM events WHERE (app_name, user_id, session_id) IN "
+                "(SELECT app_name, user_id, id FROM sessions WHERE update_time < ?)",
+                (cutoff,),
+            )
+            removed = conn.execute("DELETE FROM sessions WHERE update_time < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} idle sessions")
+        return removed
+
+    @staticmethod
+    def _merge_scoped_state(conn, app_name, user_id, app_delta, user_delta) -> None:
+        if app_delta:
+            row = conn.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+            state = dict(json.loads(row[0]) if row else {}, **app_delta)
+            conn.execute(
+                "INSERT OR REPLACE INTO app_states (app_name, state) VALUES (?, ?)",
+                (app_name, json.dumps(state, default=str)),
+            )
+        if user_delta:
+            row = conn.execute(
+                "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+            ).fetchone()
+            state = dict(json.loads(row[0]) if row else {}, **user_delta)
+            conn.execute(
+                "INSERT OR REPLACE INTO user_states (app_name, user_id, state) VALUES (?, ?, ?)",
+                (app_name, user_id, json.dumps(state, default=str)),
+            )
+
+    @staticmethod
+    def _scoped_state(conn, app_name, user_id) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        app_row = conn.execute("SELECT state FROM app_states WHERE app_name = ?", (app_name,)).fetchone()
+        user_row = conn.execute(
+            "SELECT state FROM user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+        ).fetchone()
+        return (json.loads(app_row[0]) if app_row else {}), (json.loads(user_row[0]) if user_row else {})
+
+    @staticmethod
+    def _with_scoped_state(session: Session, app_state: Dict[str, Any], user_state: Dict[str, Any]) -> Session:
+        for key, value in app_state.items():
+            session.state[State.APP_PREFIX + key] = value
+        for key, value in user_state.items():
+            session.state[State.USER_PREFIX + key] = value
+        return session
+
+
+def get_session_service() -> BaseSessionService:
+    """
+    Returns the session service configured by SESSION_STORE ("sqlite" or "memory").
+    """
+    if os.getenv("SESSION_STORE", "sqlite") == "memory":
+        return InMemorySessionService()
+    return SqliteSessionService(
+        os.getenv("SESSION_DB_PATH", os.path.join(PROJECT_DIR, "sessions.db")),
+        compact_bytes=int(os.getenv("SESSION_COMPACT_BYTES", str(256 * 1024))),
+        compact_tokens=int(os.getenv("SESSION_COMPACT_TOKENS", "32000")),
+        keep_recent_events=int(os.getenv("SESSION_KEEP_RECENT_EVENTS", "20")),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", str(7 * 24 * 3600))),
+    )
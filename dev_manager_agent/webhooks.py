@@ -0,0 +1,224 @@
+import os
+import hmac
+import json
+import asyncio
+import hashlib
+import logging
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+
+from common.github import parse_repo_name
+from dev_manager_agent.pipeline import LocalWorkers, RemoteWorkers, analyze_commit
+from dev_manager_agent.work_queue import CommitQueue, get_commit_queue, queue_enabled
+
+logger = logging.getLogger(__name__)
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """
+    Checks GitHub's X-Hub-Signature-256 header ("sha256=<hex HMAC of the body>") in constant time.
+    """
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.removeprefix("sha256="))
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """
+    Returns the X-Hub-Signature-256 value GitHub would send for ``body``.
+    """
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def parse_payload(body: bytes, content_type: Optional[str]) -> Dict[str, Any]:
+    """
+    Decodes a webhook body sent as either of GitHub's content types: application/json,
+    or application/x-www-form-urlencoded with the JSON in the ``payload`` field.
+
+    Raises:
+        ValueError: The body is not a JSON object in one of those shapes.
+    """
+    if (content_type or "").split(";")[0].strip().lower() == "application/x-www-form-urlencoded":
+        fields = urllib.parse.parse_qs(body.decode("utf-8", errors="replace"))
+        if "payload" not in fields:
+            raise ValueError("form-encoded webhook without a payload field")
+        body = fields["payload"][0].encode("utf-8")
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("webhook payload is not a JSON object")
+    return payload
+
+
+def commits_from_push(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extracts the new commits of a push event in the shape the pipeline uses (sha, author, date, message).
+
+    Branch deletions carry no commits; commits that were already pushed to
+    another branch ("distinct": false) are left out as well.
+    """
+    if payload.get("deleted"):
+        return []
+    return [
+        {
+            "sha": commit["id"],
+            "author": (commit.get("author") or {}).get("name"),
+            "date": commit.get("timestamp"),
+            "message": commit.get("message"),
+        }
+        for commit in payload.get("commits") or []
+        if commit.get("id") and commit.get("distinct", True)
+    ]
+
+
+class CommitAnalysisPool:
+    """
+    Background workers that analyze queued commits, each exactly once.
+
+    ``size`` workers run as tasks on the server's event loop. Each claims
+    a commit from the queue, runs the same analysis as the report pipeline
+    (diff, budget, security scan, review) and stores the result by SHA.
+    When the queue is empty they sleep until a webhook wakes them or
+    ``poll_interval`` passes, which also picks up retries and commits
+    left behind by a crashed process.
+    """
+
+    def __init__(self, queue: CommitQueue, size: int = 2, concurrency: int = 8, timeout: float = 120.0,
+                 poll_interval: float = 30.0, topology: str = "remote"):
+        self.queue = queue
+        self.size = size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.topology = topology
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._workers = None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self._workers = LocalWorkers(semaphore) if self.topology == "local" else RemoteWorkers(semaphore, self.timeout)
+        self._tasks = [asyncio.create_task(self._run(index)) for index in range(self.size)]
+        logger.info(f"Started {self.size} commit analysis workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def _run(self, index: int) -> None:
+        while True:
+            try:
+                item = await asyncio.to_thread(self.queue.claim)
+            except Exception as e:
+                logger.error(f"Worker {index} could not claim a commit: {e}")
+                item = None
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            sha = item["sha"]
+            logger.info(f"Worker {index} analyzing {sha[:7]} (attempt {item['attempts']})")
+            try:
+                result = await analyze_commit(self._workers, item["commit"])
+            except Exception as e:
+                result = {"error": f"{sha[:7]}: {e}"}
+            if "error" in result:
+                await asyncio.to_thread(self.queue.fail, item["repo"], sha, item["lease"], result["error"])
+            elif await asyncio.to_thread(self.queue.complete, item["repo"], sha, item["lease"], result):
+                logger.info(f"Stored findings for {sha[:7]}")
+
+
+_analysis_pool: Optional[CommitAnalysisPool] = None
+
+
+def get_analysis_pool() -> CommitAnalysisPool:
+    """
+    Returns the process-wide worker pool (WEBHOOK_WORKERS, WEBHOOK_POLL_INTERVAL); it only runs once started.
+    """
+    global _analysis_pool
+    if _analysis_pool is None:
+        _analysis_pool = CommitAnalysisPool(
+            get_commit_queue(),
+            size=int(os.getenv("WEBHOOK_WORKERS", "2")),
+            concurrency=int(os.getenv("PIPELINE_CONCURRENCY", "8")),
+            timeout=float(os.getenv("PIPELINE_TIMEOUT", "120")),
+            poll_interval=float(os.getenv("WEBHOOK_POLL_INTERVAL", "30")),
+            topology=os.getenv("AGENT_TOPOLOGY", "remote"),
+        )
+    return _analysis_pool
+
+
+async def start_analysis_pool() -> None:
+    if queue_enabled():
+        get_analysis_pool().start()
+
+
+async def stop_analysis_pool() -> None:
+    if _analysis_pool is not None:
+        await _analysis_pool.stop()
+
+
+# GitHub push webhooks (POST /webhooks/github) and the state of the analysis queue
+webhook_api = FastAPI(title="dev_manager webhooks")
+
+
+@webhook_api.post("/github", status_code=202)
+async def github_webhook(request: Request) -> Dict[str, Any]:
+    secret = os.getenv("WEBHOOK_SECRET")
+    if not secret:
+        raise HTTPException(status_code=503, detail="WEBHOOK_SECRET not configured")
+    body = await request.body()
+    if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"status": "pong"}
+    if event != "push":
+        return {"status": "ignored", "reason": f"event '{event}' is not handled"}
+
+    try:
+        payload = parse_payload(body, request.headers.get("Content-Type"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed payload: {e}")
+    repo = (payload.get("repository") or {}).get("full_name", "")
+    repo_url = os.getenv("GITHUB_REPO_URL", "")
+    # The worker agents can only read the configured repository
+    if not repo_url or repo.lower() != parse_repo_name(repo_url).lower():
+        return {"status": "ignored", "reason": f"repository '{repo}' is not the configured one"}
+
+    commits = commits_from_push(payload)
+    queued = await asyncio.to_thread(get_commit_queue().enqueue, parse_repo_name(repo_url), commits)
+    if queued:
+        get_analysis_pool().wake()
+    logger.info(f"Push to {repo} ({payload.get('ref')}): {len(commits)} commits, {queued} queued")
+    return {"status": "queued", "commits": len(commits), "queued": queued}
+
+
+@webhook_api.get("/queue")
+async def queue_stats() -> Dict[str, Any]:
+    return await asyncio.to_thread(get_commit_queue().stats)
+
+
+@webhook_api.get("/commits/{sha}")
+async def commit_status(sha: str) -> Dict[str, Any]:
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    if not repo_url:
+        raise HTTPException(status_code=503, detail="GITHUB_REPO_URL not configured")
+    entry = await asyncio.to_thread(get_commit_queue().status, parse_repo_name(repo_url), sha)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Commit {sha} was never queued")
+    return entry
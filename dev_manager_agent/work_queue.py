@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    status TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    lease TEXT,
+    finished_at REAL,
+    error TEXT,
+    result TEXT,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_ready ON commits (status, available_at);
+"""
+
+# Lifecycle of a queued commit
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class CommitQueue:
+    """
+    Durable queue of commits to analyze, and the store of their results, in one SQLite file.
+
+    A commit is keyed by (repo, sha) and enqueued at most once, so webhook
+    redeliveries and overlapping pushes never scan it twice. Workers claim
+    commits under a lease of ``lease_seconds``; a commit whose worker died
+    is claimed again once the lease runs out. Every claim gets a new lease
+    token, and only the holder of the current token can complete or fail
+    the commit, so a worker that outlived its lease cannot overwrite the
+    work of the one that took over. Failed analyses are retried with a
+    growing delay, up to ``max_attempts`` times.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600.0, max_attempts: int = 3, retry_delay: float = 30.0):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Queues created before lease tokens existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(commits)")}
+            if "lease" not in columns:
+                conn.execute("ALTER TABLE commits ADD COLUMN lease TEXT")
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            if not write:
+                yield conn
+                return
+            # Claims must be atomic across processes, so writers take the lock up front
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def enqueue(self, repo: str, commits: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queues commits (dicts with "sha" plus author/date/message) that are not known yet.
+
+        Returns:
+            How many commits were newly queued.
+        """
+        now = time.time()
+        rows = [(repo, c["sha"], QUEUED, json.dumps(c, default=str), now, now) for c in commits]
+        with self._connect(write=True) as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO commits (repo, sha, status, meta, enqueued_at, available_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Leases the oldest commit that is ready to be analyzed.
+
+        Returns:
+            {"repo", "sha", "commit", "attempts", "lease"} or None when nothing is ready;
+            pass "lease" to ``complete`` or ``fail``.
+        """
+        now = time.time()
+        lease = uuid.uuid4().hex
+        with self._connect(write=True) as conn:
+            row = conn.execute(
+                "SELECT repo, sha, meta, attempts FROM commits "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            repo, sha, meta, attempts = row
+            conn.execute(
+                "UPDATE commits SET status = ?, attempts = ?, lease_until = ?, lease = ? WHERE repo = ? AND sha = ?",
+                (RUNNING, attempts + 1, now + self.lease_seconds, lease, repo, sha),
+            )
+        return {"repo": repo, "sha": sha, "commit": json.loads(meta), "attempts": attempts + 1, "lease": lease}
+
+    def complete(self, repo: str, sha: str, lease: str, result: Dict[str, Any]) -> bool:
+        """
+        Stores a commit's analysis and marks it done.
+
+        Returns:
+            False (and stores nothing) if ``lease`` is no longer the commit's current lease.
+        """
+        with self._connect(write=True) as conn:
+            updated = conn.execute(
+                "UPDATE commits SET status = ?, result = ?, error = NULL, lease_until = NULL, lease = NULL, finished_at = ? "
+                "WHERE repo = ? AND sha = ? AND status = ? AND lease = ?",
+                (DONE, json.dumps(result, default=str), time.time(), repo, sha, RUNNING, lease),
+            ).rowcount
+        if not updated:
+            logger.warning(f"Dropping result for {sha[:7]}: its lease expired and the commit was claimed again")
+        return bool(updated)
+
+    def fail(self, repo: str, sha: str, lease: str, error: str) -> bool:
+        """
+        Records a failed analysis; the commit is retried later until it runs out of attempts.
+
+        Returns:
+            False (and records nothing) if ``lease`` is no longer the commit's current lease.
+        """
+        now = time.time()
+        with self._connect(write=True) as conn:
+            row = conn.execute(
+                "SELECT attempts FROM commits WHERE repo = ? AND sha = ? AND status = ? AND lease = ?",
+                (repo, sha, RUNNING, lease),
+            ).fetchone()
+            if row is None:
+                logger.warning(f"Ignoring failure of {sha[:7]}: its lease expired and the commit was claimed again")
+                return False
+            attempts = row[0]
+            if attempts >= self.max_attempts:
+                conn.execute(
+                    "UPDATE commits SET status = ?, error = ?, lease_until = NULL, lease = NULL, finished_at = ? "
+                    "WHERE repo = ? AND sha = ? AND lease = ?",
+                    (FAILED, error, now, repo, sha, lease),
+                )
+                logger.warning(f"Giving up on {sha[:7]} after {attempts} attempts: {error}")
+                return True
+            conn.execute(
+                "UPDATE commits SET status = ?, error = ?, lease_until = NULL, lease = NULL, available_at = ? "
+                "WHERE repo = ? AND sha = ? AND lease = ?",
+                (QUEUED, error, now + self.retry_delay * attempts, repo, sha, lease),
+            )
+        return True
+
+    def results(self, repo: str, shas: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the stored analyses of the given commits, keyed by SHA (commits not analyzed yet are left out).
+        """
+        if not shas:
+            return {}
+        placeholders = ",".join("?" * len(shas))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT sha, result FROM commits WHERE repo = ? AND status = ? AND sha IN ({placeholders})",
+                (repo, DONE, *shas),
+            ).fetchall()
+        return {sha: json.loads(result) for sha, result in rows}
+
+    def status(self, repo: str, sha: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns one commit's queue entry (status, attempts, error and result), or None if it was never queued.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, attempts, enqueued_at, finished_at, error, result FROM commits WHERE repo = ? AND sha = ?",
+                (repo, sha),
+            ).fetchone()
+        if row is None:
+            return None
+        status, attempts, enqueued_at, finished_at, error, result = row
+        entry = {"sha": sha, "status": status, "attempts": attempts, "enqueued_at": enqueued_at, "finished_at": finished_at}
+        if error:
+            entry["error"] = error
+        if result:
+            entry["result"] = json.loads(result)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns how many commits are in each state.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM commits GROUP BY status").fetchall()
+        stats = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+
+
+def queue_enabled() -> bool:
+    """
+    Webhook-driven analysis is on once WEBHOOK_SECRET is configured.
+    """
+    return bool(os.getenv("WEBHOOK_SECRET"))
+
+
+_commit_queue: Optional[CommitQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_commit_queue() -> CommitQueue:
+    """
+    Returns the process-wide commit queue (WORK_QUEUE_DB_PATH, WORK_QUEUE_MAX_ATTEMPTS).
+    """
+    global _commit_queue
+    with _queue_lock:
+        if _commit_queue is None:
+            _commit_queue = CommitQueue(
+                os.getenv("WORK_QUEUE_DB_PATH", "work_queue.db"),
+                lease_seconds=float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "600")),
+                max_attempts=int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3")),
+            )
+        return _commit_queue
@@ -5,29 +5,32 @@ import os
 
 from dotenv import load_dotenv
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
+# Load .env first: DEV_MANAGER_MODE and AGENT_TOPOLOGY are read when the agent is imported
+load_dotenv()
+
 # Import the agent
-from dev_manager_agent.agent import agent as dev_manager
+from dev_manager_agent.agent import root_agent as dev_manager
+from dev_manager_agent.session_store import get_session_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 async def main():
     print("Initializing Dev Manager...")
     try:
-        # Set up session management
-        session_service = InMemorySessionService()
+        # Set up session management (SQLite by default, so the conversation survives restarts)
+        session_service = get_session_service()
         APP_NAME = "dev_productivity_suite"
         USER_ID = "developer_1"
         SESSION_ID = "session_001"
         
-        # Create session
-        await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+        # Resume the session or create it
+        session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+        if session is None:
+            await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
         
         # Create runner
         runner = Runner(
@@ -1,13 +1,25 @@
 import os
+import base64
 import logging
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 
 from fastapi import FastAPI
-from github import Github, GithubException
+from pydantic import BaseModel
 from google.adk import Agent
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 from dotenv import load_dotenv
 
+from common.git_mirror import get_mirror
+from common.github import DEFAULT_BASE_URL, parse_repo_name
+from repo_agent.budget import budget_files, default_budget
+from repo_agent.github_pool import get_github_pool
+from repo_agent.diff_paging import DiffLimits, page_files
+from repo_agent.object_cache import get_object_cache, is_full_sha
+from repo_agent.scheduler import get_scheduler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,27 +32,93 @@ def _get_github_client_and_repo(repo_url_override: str = None):
     """
     Helper to get the GitHub client and repository object.
     
+    Clients and repository handles come from the process-wide pool, so
+    consecutive tool calls reuse the same HTTP session and repo metadata.
+    
     Returns:
         Tuple (repo_object, error_message)
     """
     github_token = os.getenv("GITHUB_TOKEN")
     repo_url = repo_url_override or os.getenv("GITHUB_REPO_URL")
+    base_url = os.getenv("GITHUB_API_URL", DEFAULT_BASE_URL)
     
     if not github_token or not repo_url:
         return None, "GITHUB_TOKEN or GITHUB_REPO_URL not configured"
         
     try:
-        github_client = Github(github_token)
-        if "github.com/" in repo_url:
-            repo_name = repo_url.split("github.com/")[1].removesuffix(".git")
-        else:
-            repo_name = repo_url
-            
-        repo = github_client.get_repo(repo_name)
+        repo = get_github_pool().get_repo(github_token, parse_repo_name(repo_url), base_url)
         return repo, None
     except Exception as e:
         return None, f"GitHub connection error: {e}"
 
+def _get_mirror():
+    """
+    Helper to get the local git mirror when REPO_BACKEND=mirror.
+    
+    Returns:
+        Tuple (mirror_or_None, error_message)
+    """
+    if os.getenv("REPO_BACKEND", "github").lower() != "mirror":
+        return None, None
+
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    if not repo_url:
+        return None, "GITHUB_REPO_URL not configured"
+    return get_mirror(repo_url, os.getenv("GITHUB_TOKEN")), None
+
+def get_github_pool_stats() -> Dict[str, Any]:
+    """
+    Returns hit/miss counters for the pooled GitHub clients and cached repo handles.
+    """
+    return get_github_pool().stats()
+
+def _scheduled(repo, key: Optional[str], fn):
+    """
+    Runs a GitHub request through the shared rate-limit scheduler.
+    """
+    return get_scheduler().call(key, fn, requester=repo.requester)
+
+def get_github_rate_limit_stats() -> Dict[str, Any]:
+    """
+    Returns the remaining GitHub budget, scheduler queue depth and request counters.
+    """
+    return get_scheduler().stats()
+
+def _conditional_get(repo, url: str, cache_key: str, parameters: Optional[Dict[str, Any]] = None):
+    """
+    GETs a mutable GitHub resource with If-None-Match against the cached ETag.
+
+    A 304 Not Modified is answered from the object cache. GitHub does not
+    count it against the rate limit, and the scheduler gets its token back.
+
+    Returns:
+        Tuple (json_data, from_cache)
+    """
+    cache = get_object_cache()
+    cached = cache.get_entry(cache_key)
+    headers = {"If-None-Match": cached[1]} if cached and cached[1] else None
+
+    def fetch():
+        response_headers, data = repo.requester.requestJsonAndCheck("GET", url, parameters=parameters, headers=headers)
+        if data is None and cached is not None:
+            # PyGithub hands back an empty body for 304 Not Modified
+            get_scheduler().credit()
+        return response_headers, data
+
+    response_headers, data = _scheduled(repo, f"GET {url} {sorted((parameters or {}).items())} {headers}", fetch)
+    if data is None and cached is not None:
+        return cached[0], True
+
+    etag = response_headers.get("etag") or response_headers.get("ETag")
+    cache.put(cache_key, data, etag=etag)
+    return data, False
+
+def _iso_date(github_date: str) -> str:
+    """
+    Normalizes GitHub's "2024-01-01T00:00:00Z" timestamps to datetime.isoformat().
+    """
+    return datetime.fromisoformat(github_date.replace("Z", "+00:00")).isoformat()
+
 def fetch_recent_commits(limit: int = 10) -> List[Dict[str, Any]]:
     """
     Fetches the recent commits from the repository.
@@ -51,59 +129,314 @@ def fetch_recent_commits(limit: int = 10) -> List[Dict[str, Any]]:
     Returns:
         A list of dictionaries containing commit information (sha, author, message, date).
     """
+    mirror, error = _get_mirror()
+    if error:
+        return [{"error": error}]
+    if mirror:
+        try:
+            return mirror.recent_commits(limit)
+        except Exception as e:
+            return [{"error": f"Error fetching commits: {e}"}]
+
     repo, error = _get_github_client_and_repo()
     if error:
         return [{"error": error}]
     
     try:
-        commits = list(repo.get_commits()[:limit])
-        result = []
-        for commit in commits:
-            result.append({
+        if limit > 100:
+            # Beyond a single page the ETag would only cover the first page
+            return _scheduled(repo, f"commits:{repo.full_name}:{limit}", lambda: [{
                 "sha": commit.sha,
                 "author": commit.commit.author.name,
                 "date": commit.commit.author.date.isoformat(),
                 "message": commit.commit.message
+            } for commit in repo.get_commits()[:limit]])
+
+        data, _ = _conditional_get(
+            repo, f"{repo.url}/commits", f"etag:commits:{repo.full_name}:{limit}", {"per_page": limit}
+        )
+        result = []
+        for commit in data[:limit]:
+            result.append({
+                "sha": commit["sha"],
+                "author": commit["commit"]["author"]["name"],
+                "date": _iso_date(commit["commit"]["author"]["date"]),
+                "message": commit["commit"]["message"]
             })
         return result
     except Exception as e:
         return [{"error": f"Error fetching commits: {e}"}]
 
-def analyze_code_changes(commit_sha: str) -> Dict[str, Any]:
+def get_head_sha(branch: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolves the current head commit of a branch.
+
+    Args:
+        branch: The branch name (optional, defaults to the default branch).
+
+    Returns:
+        A dictionary with the branch name and its head SHA.
+    """
+    mirror, error = _get_mirror()
+    if error:
+        return {"error": error}
+    if mirror:
+        try:
+            branch, sha = mirror.head_sha(branch)
+            return {"branch": branch, "sha": sha}
+        except Exception as e:
+            return {"error": f"Error resolving branch head: {e}"}
+
+    repo, error = _get_github_client_and_repo()
+    if error:
+        return {"error": error}
+
+    try:
+        branch = branch or repo.default_branch
+        data, _ = _conditional_get(repo, f"{repo.url}/branches/{branch}", f"etag:branch:{repo.full_name}:{branch}")
+        return {"branch": branch, "sha": data["commit"]["sha"]}
+    except Exception as e:
+        return {"error": f"Error resolving branch head: {e}"}
+
+def analyze_code_changes(commit_sha: str, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyzes the changes in a specific commit.
 
+    Large commits are returned a page at a time: file count, bytes per patch
+    and total bytes are capped, binary/generated/vendored files are listed
+    under "skipped" without their patch, and "next_cursor" is set while
+    files remain.
+
     Args:
         commit_sha: The SHA of the commit to analyze.
+        cursor: The "next_cursor" from a previous call to fetch the next page (optional).
 
     Returns:
         A dictionary containing the files changed, additions, deletions, and the patch.
     """
+    limits = DiffLimits.from_env()
+    mirror, error = _get_mirror()
+    if error:
+        return {"error": error}
+    if mirror:
+        try:
+            changes = mirror.commit_changes(commit_sha)
+            return dict(changes, **page_files(changes["files"], cursor, limits))
+        except Exception as e:
+            return {"error": f"Error analyzing commit: {e}"}
+
+    # Commits are immutable, so a full SHA can be answered without touching GitHub
+    cache = get_object_cache()
+    page_key = f"{cursor or 0}:{limits.cache_key}"
+    if is_full_sha(commit_sha):
+        cached = cache.get(f"commit:{commit_sha.lower()}:{page_key}")
+        if cached is not None:
+            return cached
+
     repo, error = _get_github_client_and_repo()
     if error:
         return {"error": error}
     
-    try:
+    def fetch():
         commit = repo.get_commit(commit_sha)
-        files_changed = []
-        for file in commit.files:
-            files_changed.append({
-                "filename": file.filename,
-                "status": file.status,
-                "additions": file.additions,
-                "deletions": file.deletions,
-                "patch": file.patch if file.patch else ""
-            })
-        
-        return {
+        # commit.files pages lazily, so later pages are only requested if the caps allow
+        files = ({
+            "filename": file.filename,
+            "status": file.status,
+            "additions": file.additions,
+            "deletions": file.deletions,
+            "patch": file.patch if file.patch else ""
+        } for file in commit.files)
+        return commit.sha, {
             "sha": commit_sha,
             "message": commit.commit.message,
             "stats": commit.stats.raw_data,
-            "files": files_changed
+            **page_files(files, cursor, limits)
         }
+
+    try:
+        full_sha, result = _scheduled(repo, f"commit:{repo.full_name}:{commit_sha}:{page_key}", fetch)
+        cache.put(f"commit:{full_sha}:{page_key}", dict(result, sha=full_sha))
+        return result
     except Exception as e:
         return {"error": f"Error analyzing commit: {e}"}
 
+def _all_pages(commit_sha: str) -> Dict[str, Any]:
+    # Follows next_cursor up to REPO_BUDGET_MAX_PAGES pages; pages are cached by the object cache
+    result = analyze_code_changes(commit_sha)
+    pages = 1
+    while "error" not in result and result.get("next_cursor") and pages < int(os.getenv("REPO_BUDGET_MAX_PAGES", "5")):
+        page = analyze_code_changes(commit_sha, result["next_cursor"])
+        if "error" in page:
+            break
+        result = dict(result, files=result["files"] + page["files"], skipped=result.get("skipped", []) + page.get("skipped", []),
+                      next_cursor=page.get("next_cursor"))
+        pages += 1
+    return result
+
+def budget_commit_changes(commit_sha: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Returns a commit's changes compacted to fit a token budget, ready to forward to security_agent and reviewer_agent.
+
+    Context lines, whitespace-only changes and repeated hunks are stripped,
+    files are ranked by risk (dependencies, auth, SQL, config) and only as
+    many as fit the budget keep their patch; the others are listed under
+    "deferred" and can be fetched one by one with get_file_patch.
+
+    Args:
+        commit_sha: The SHA of the commit.
+        max_tokens: Token budget for all patches together (optional, defaults to REPO_PAYLOAD_BUDGET_TOKENS).
+
+    Returns:
+        A dictionary with sha, message, stats, the budgeted files, deferred files, skipped files and a budget summary.
+    """
+    changes = _all_pages(commit_sha)
+    if "error" in changes:
+        return changes
+    budgeted = budget_files(changes["files"], max_tokens or default_budget(), changes.get("sha", commit_sha))
+    return {
+        "sha": changes.get("sha", commit_sha),
+        "message": changes.get("message"),
+        "stats": changes.get("stats"),
+        "skipped": changes.get("skipped", []),
+        "truncated": bool(changes.get("next_cursor")),
+        **budgeted,
+    }
+
+def get_file_patch(commit_sha: str, filename: str) -> Dict[str, Any]:
+    """
+    Fetches the patch of a single file in a commit (e.g. one listed under "deferred").
+
+    Args:
+        commit_sha: The SHA of the commit.
+        filename: The path of the file in the commit.
+
+    Returns:
+        A dictionary with the filename, status and patch, or an error if the file is not in the commit.
+    """
+    changes = _all_pages(commit_sha)
+    if "error" in changes:
+        return changes
+    for file in changes["files"]:
+        if file["filename"] == filename:
+            return file
+    for file in changes.get("skipped", []):
+        if file["filename"] == filename:
+            return {"error": f"{filename} has no reviewable patch ({file.get('reason')})"}
+    return {"error": f"{filename} is not part of commit {commit_sha}"}
+
+def analyze_commits_batch(shas: Optional[List[str]] = None, limit: int = 10, budget: bool = False) -> Dict[str, Any]:
+    """
+    Analyzes several commits in one call, fetching their details concurrently.
+
+    Args:
+        shas: The commit SHAs to analyze (optional, defaults to the most recent commits).
+        limit: How many recent commits to analyze when no SHAs are given.
+        budget: Return each commit as budget_commit_changes does (compacted, risk-ranked patches within the token budget).
+
+    Returns:
+        A dictionary with the successfully analyzed commits (same shape as
+        analyze_code_changes, or budget_commit_changes when budget is set, in
+        request order) and a list of per-commit errors.
+    """
+    if not shas:
+        recent = fetch_recent_commits(limit)
+        if recent and "error" in recent[0]:
+            return {"commits": [], "errors": [{"sha": None, "error": recent[0]["error"]}]}
+        shas = [commit["sha"] for commit in recent]
+
+    max_workers = max(1, min(int(os.getenv("REPO_BATCH_WORKERS", "8")), len(shas)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(budget_commit_changes if budget else analyze_code_changes, shas))
+
+    commits = []
+    errors = []
+    for sha, result in zip(shas, results):
+        if "error" in result:
+            errors.append({"sha": sha, "error": result["error"]})
+        else:
+            commits.append(result)
+
+    return {"commits": commits, "errors": errors}
+
+def compare_refs(base: str, head: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compares two refs in one call (e.g. last sprint's tag against main).
+
+    Each changed file appears once with its net patch from the merge base to
+    head, so lines touched by several commits are only shipped once.
+
+    Args:
+        base: The base commit SHA, branch or tag.
+        head: The head commit SHA, branch or tag.
+        cursor: The "next_cursor" from a previous call to fetch the next page of files (optional).
+
+    Returns:
+        A dictionary with per-commit metadata (sha, author, date, message),
+        overall stats, and the deduplicated per-file net diff (paged and capped
+        like analyze_code_changes).
+    """
+    limits = DiffLimits.from_env()
+    mirror, error = _get_mirror()
+    if error:
+        return {"error": error}
+    if mirror:
+        try:
+            comparison = mirror.compare(base, head)
+            return dict(comparison, **page_files(comparison["files"], cursor, limits))
+        except Exception as e:
+            return {"error": f"Error comparing refs: {e}"}
+
+    cache = get_object_cache()
+    immutable_key = f"compare:{base.lower()}:{head.lower()}" if is_full_sha(base) and is_full_sha(head) else None
+    if immutable_key:
+        cached = cache.get(immutable_key)
+        if cached is not None:
+            return dict(cached, **page_files(cached["files"], cursor, limits))
+
+    repo, error = _get_github_client_and_repo()
+    if error:
+        return {"error": error}
+
+    try:
+        url = f"{repo.url}/compare/{urllib.parse.quote(base, safe='')}...{urllib.parse.quote(head, safe='')}"
+        data, _ = _conditional_get(repo, url, f"etag:compare:{repo.full_name}:{base}:{head}")
+
+        additions = deletions = 0
+        files = []
+        for file in data.get("files", []):
+            additions += file["additions"]
+            deletions += file["deletions"]
+            files.append({
+                "filename": file["filename"],
+                "status": file["status"],
+                "additions": file["additions"],
+                "deletions": file["deletions"],
+                "patch": file.get("patch", "")
+            })
+
+        result = {
+            "base": base,
+            "head": head,
+            "merge_base": data["merge_base_commit"]["sha"],
+            "ahead_by": data["ahead_by"],
+            "behind_by": data["behind_by"],
+            "total_commits": data["total_commits"],
+            "commits": [{
+                "sha": commit["sha"],
+                "author": commit["commit"]["author"]["name"],
+                "date": _iso_date(commit["commit"]["author"]["date"]),
+                "message": commit["commit"]["message"]
+            } for commit in data.get("commits", [])],
+            "stats": {"total": additions + deletions, "additions": additions, "deletions": deletions},
+            "files": files
+        }
+        if immutable_key:
+            cache.put(immutable_key, result)
+        return dict(result, **page_files(files, cursor, limits))
+    except Exception as e:
+        return {"error": f"Error comparing refs: {e}"}
+
 def get_file_content(file_path: str, ref: Optional[str] = None) -> str:
     """
     Retrieves the content of a specific file.
@@ -115,32 +448,143 @@ def get_file_content(file_path: str, ref: Optional[str] = None) -> str:
     Returns:
         The content of the file as a string.
     """
+    mirror, error = _get_mirror()
+    if error:
+        return f"Error: {error}"
+    if mirror:
+        try:
+            return mirror.file_content(file_path, ref)
+        except Exception as e:
+            return f"Error fetching file content: {e}"
+
+    # A path at a fixed commit always maps to the same blob
+    cache = get_object_cache()
+    pointer_key = f"file:{ref.lower()}:{file_path}" if is_full_sha(ref) else None
+    if pointer_key:
+        blob_sha = cache.get(pointer_key)
+        if blob_sha is not None:
+            content = cache.get(f"blob:{file_path}:{blob_sha}")
+            if content is not None:
+                return content
+
     repo, error = _get_github_client_and_repo()
     if error:
         return f"Error: {error}"
     
     try:
-        if ref:
-            content_file = repo.get_contents(file_path, ref=ref)
+        url = f"{repo.url}/contents/{urllib.parse.quote(file_path)}"
+        parameters = {"ref": ref} if ref else None
+        if pointer_key:
+            _, data = _scheduled(
+                repo, f"GET {url} {ref}", lambda: repo.requester.requestJsonAndCheck("GET", url, parameters=parameters)
+            )
         else:
-            content_file = repo.get_contents(file_path)
-        
-        return content_file.decoded_content.decode("utf-8")
+            data, _ = _conditional_get(
+                repo, url, f"etag:contents:{repo.full_name}:{ref or ''}:{file_path}", parameters
+            )
+        if isinstance(data, list):
+            return f"Error fetching file content: {file_path} is a directory"
+
+        blob_key = f"blob:{file_path}:{data['sha']}"
+        content = cache.get(blob_key)
+        if content is None:
+            if data.get("encoding") == "base64":
+                raw = base64.b64decode(data["content"])
+            else:
+                # Files over 1 MB come back without inline content
+                blob = _scheduled(repo, f"blob:{repo.full_name}:{data['sha']}", lambda: repo.get_git_blob(data["sha"]))
+                raw = base64.b64decode(blob.content)
+            content = raw.decode("utf-8")
+            cache.put(blob_key, content)
+        if pointer_key:
+            cache.put(pointer_key, data["sha"])
+        return content
     except Exception as e:
          return f"Error fetching file content: {e}"
 
+def read_file(file_path: str, ref: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Like get_file_content, but returns {"path", "ref", "content"} or {"error"} (not exposed as an agent tool).
+    """
+    content = get_file_content(file_path, ref)
+    if content.startswith(("Error: ", "Error fetching file content:")):
+        return {"error": content}
+    return {"path": file_path, "ref": ref, "content": content}
+
+def get_object_cache_stats() -> Dict[str, Any]:
+    """
+    Returns hit/miss/eviction counters for the on-disk GitHub object cache.
+    """
+    return get_object_cache().stats()
+
 
 # Initialize the agent
 agent = Agent(
     name="repo_agent",
+    description="Agent for fetching repository data (commits, files).",
     model="gemini-2.0-flash",
-    instruction="You are a Repository Agent. Your job is to fetch data from GitHub repositories. You have access to tools to fetch commits, file contents, and analyze changes. Use them to answer queries about the codebase history and content.",
-    tools=[fetch_recent_commits, analyze_code_changes, get_file_content]
+    instruction="You are a Repository Agent. Your job is to fetch data from GitHub repositories. You have access to tools to fetch commits, file contents, and analyze changes. Use them to answer queries about the codebase history and content. When diffs are meant for the security or reviewer agents, return them budgeted (analyze_commits_batch with budget=true, or budget_commit_changes); files under 'deferred' can be fetched individually with get_file_patch.",
+    tools=[fetch_recent_commits, analyze_code_changes, analyze_commits_batch, budget_commit_changes, get_file_patch, compare_refs, get_file_content, get_head_sha]
 )
 
 # Expose as FastAPI app via A2A with correct host/port for agent card
 app = to_a2a(agent, host="127.0.0.1", port=8001)
 
+# Plain JSON counters next to the A2A routes (GET /stats/github)
+stats_api = FastAPI(title="repo_agent stats")
+
+@stats_api.get("/github")
+def github_stats() -> Dict[str, Any]:
+    return {
+        "rate_limit": get_github_rate_limit_stats(),
+        "client_pool": get_github_pool_stats(),
+        "object_cache": get_object_cache_stats(),
+    }
+
+app.mount("/stats", stats_api)
+
+# Repository data as plain JSON endpoints (/repo/...), for callers that don't need the LLM
+class CommitsBatchRequest(BaseModel):
+    shas: Optional[List[str]] = None
+    limit: int = 10
+    budget: bool = False
+
+repo_api = FastAPI(title="repo_agent data")
+
+@repo_api.get("/commits")
+def commits_endpoint(limit: int = 10) -> List[Dict[str, Any]]:
+    return fetch_recent_commits(limit)
+
+@repo_api.get("/head")
+def head_endpoint(branch: Optional[str] = None) -> Dict[str, Any]:
+    return get_head_sha(branch)
+
+@repo_api.get("/commits/{commit_sha}")
+def commit_changes_endpoint(commit_sha: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    return analyze_code_changes(commit_sha, cursor)
+
+@repo_api.get("/commits/{commit_sha}/budget")
+def commit_budget_endpoint(commit_sha: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    return budget_commit_changes(commit_sha, max_tokens)
+
+@repo_api.get("/commits/{commit_sha}/patch")
+def file_patch_endpoint(commit_sha: str, filename: str) -> Dict[str, Any]:
+    return get_file_patch(commit_sha, filename)
+
+@repo_api.get("/file")
+def file_endpoint(path: str, ref: Optional[str] = None) -> Dict[str, Any]:
+    return read_file(path, ref)
+
+@repo_api.post("/commits/batch")
+def commits_batch_endpoint(request: CommitsBatchRequest) -> Dict[str, Any]:
+    return analyze_commits_batch(request.shas, request.limit, request.budget)
+
+@repo_api.get("/compare")
+def compare_endpoint(base: str, head: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    return compare_refs(base, head, cursor)
+
+app.mount("/repo", repo_api)
+
 # For ADK Web UI discovery
 root_agent = agent
 
@@ -0,0 +1,217 @@
+import os
+import re
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.diffs import iter_patch_lines
+
+# Rough token estimate for budgeting: about four characters per token
+CHARS_PER_TOKEN = 4
+
+# Smaller repeated hunks are sent again: a {"hunk", "same_as"} reference costs about as much
+MIN_DUPLICATE_HUNK_TOKENS = 32
+
+# (label, weight, filename pattern): what makes a changed file worth a reviewer's tokens first
+FILENAME_RISKS = [
+    ("dependencies", 5, re.compile(
+        r"(^|/)(requirements[^/]*\.txt|pyproject\.toml|setup\.(py|cfg)|Pipfile|package\.json|go\.mod|Gemfile|"
+        r"pom\.xml|build\.gradle(\.kts)?|Cargo\.toml|composer\.json)$", re.IGNORECASE)),
+    ("auth", 5, re.compile(r"auth|login|passw|secret|token|credential|session|permission|oauth|jwt|crypt", re.IGNORECASE)),
+    ("sql", 4, re.compile(r"\.sql$|migration|schema|(^|/)(models?|db|database|queries|repository|dao)(/|\.|_)", re.IGNORECASE)),
+    ("config", 4, re.compile(
+        r"(^|/)(\.env[^/]*|Dockerfile|docker-compose[^/]*|settings[^/]*|config[^/]*|\.github/workflows/[^/]+)$|"
+        r"\.(ya?ml|toml|ini|cfg|conf)$", re.IGNORECASE)),
+]
+
+# (label, weight, pattern over added lines)
+CONTENT_RISKS = [
+    ("sql", 3, re.compile(r"\b(SELECT|INSERT|UPDATE|DELETE)\b.+\b(FROM|INTO|SET|WHERE)\b|\.execute\(|\.raw\(", re.IGNORECASE)),
+    ("auth", 3, re.compile(r"passw(or)?d|secret|api[_-]?key|token|verify\s*=\s*False|permission|authenticat", re.IGNORECASE)),
+    ("exec", 3, re.compile(r"\b(eval|exec|pickle\.loads|yaml\.load|subprocess|os\.system)\b")),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _squash(text: str) -> str:
+    return "".join(text.split())
+
+
+def compact_patch(patch: str) -> Tuple[List[Tuple[str, str]], Dict[str, int]]:
+    """
+    Strips a patch down to the lines that matter to scanners and reviewers.
+
+    Context lines are dropped, as are blank added/removed lines and removed/added
+    pairs that only differ in whitespace. The remaining changed lines are split
+    into runs of originally adjacent lines, and every run gets its own hunk
+    header, so line numbers computed from the compacted patch still match the
+    new file.
+
+    Returns:
+        Tuple (hunks, counts): hunks as (header, body) pairs and counters of
+        the dropped context / whitespace-only lines.
+    """
+    lines = list(iter_patch_lines(patch))
+    counts = {"context_lines": 0, "whitespace_lines": 0}
+
+    # Pair removed and added lines of the same change block that only differ in whitespace
+    dropped = set()
+    block: List[int] = []
+    for index in range(len(lines) + 1):
+        if index < len(lines) and lines[index][0] != " ":
+            block.append(index)
+            continue
+        removed: Dict[str, List[int]] = {}
+        for i in block:
+            if lines[i][0] == "-":
+                removed.setdefault(_squash(lines[i][3]), []).append(i)
+        for i in block:
+            if lines[i][0] == "+" and removed.get(_squash(lines[i][3])):
+                dropped.add(removed[_squash(lines[i][3])].pop(0))
+                dropped.add(i)
+        block = []
+
+    hunks: List[Tuple[str, str]] = []
+    run: List[int] = []
+
+    def flush():
+        if not run:
+            return
+        first = lines[run[0]]
+        old_count = sum(1 for i in run if lines[i][0] == "-")
+        new_count = sum(1 for i in run if lines[i][0] == "+")
+        header = f"@@ -{first[1]},{old_count} +{first[2]},{new_count} @@"
+        hunks.append((header, "\n".join(lines[i][0] + lines[i][3] for i in run)))
+        run.clear()
+
+    for index, (kind, _, _, text) in enumerate(lines):
+        if kind == " ":
+            counts["context_lines"] += 1
+            flush()
+            continue
+        if index in dropped or not text.strip():
+            counts["whitespace_lines"] += 1
+            flush()
+            continue
+        run.append(index)
+    flush()
+    return hunks, counts
+
+
+def file_risk(filename: str, hunks: List[Tuple[str, str]]) -> Tuple[int, List[str]]:
+    """
+    Scores how risky a changed file is from its path and added lines.
+
+    Returns:
+        Tuple (score, labels), e.g. (8, ["auth", "sql"]).
+    """
+    score = 0
+    labels = []
+    for label, weight, pattern in FILENAME_RISKS:
+        if pattern.search(filename):
+            score += weight
+            labels.append(label)
+    added = "\n".join(line[1:] for _, body in hunks for line in body.splitlines() if line.startswith("+"))
+    for label, weight, pattern in CONTENT_RISKS:
+        if pattern.search(added):
+            score += weight
+            if label not in labels:
+                labels.append(label)
+    return score, labels
+
+
+def budget_files(files: List[Dict[str, Any]], max_tokens: int, commit_sha: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fits a commit's changed files into a token budget for the worker agents.
+
+    Patches are compacted (see ``compact_patch``) and files are ranked by risk
+    (dependencies, auth, SQL, config, dangerous calls) then size. Files are
+    taken in that order while they fit; the rest are listed under "deferred"
+    with what repo_agent needs to fetch them on demand. A hunk of at least
+    ``MIN_DUPLICATE_HUNK_TOKENS`` that a file already selected carries is
+    replaced by a reference to that file, so every reference points at a
+    patch the worker agents actually receive.
+
+    Args:
+        files: File entries with "filename" and "patch" (as from analyze_code_changes).
+        max_tokens: Token budget for all returned patches together.
+        commit_sha: The commit the files belong to, used in the deferred references.
+
+    Returns:
+        A dictionary with the budgeted "files" (filename, patch, risk, risk_labels,
+        optional duplicate_hunks), "deferred" references and a "budget" summary.
+    """
+    candidates = []
+    original_tokens = 0
+    stripped = {"context_lines": 0, "whitespace_lines": 0, "duplicate_hunks": 0}
+
+    for file in files:
+        patch = file.get("patch") or ""
+        original_tokens += estimate_tokens(patch)
+        hunks, counts = compact_patch(patch)
+        for key, value in counts.items():
+            stripped[key] += value
+        score, labels = file_risk(file["filename"], hunks)
+        candidates.append((score, labels, hunks, file))
+
+    candidates.sort(key=lambda c: (-c[0], sum(len(h) + len(b) + 1 for h, b in c[2])))
+    sent_hunks: Dict[str, str] = {}
+    returned, deferred = [], []
+    used = 0
+    for score, labels, hunks, file in candidates:
+        kept, duplicates, digests = [], [], []
+        for header, body in hunks:
+            if estimate_tokens(body) < MIN_DUPLICATE_HUNK_TOKENS:
+                kept.append((header, body))
+                continue
+            digest = hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+            if digest in sent_hunks:
+                duplicates.append({"hunk": header, "same_as": sent_hunks[digest]})
+                continue
+            kept.append((header, body))
+            digests.append(digest)
+
+        patch = "\n".join(f"{h}\n{b}" for h, b in kept)
+        tokens = estimate_tokens(patch)
+        if used + tokens > max_tokens:
+            # Fetched on demand in full, so the reference counts the whole compacted patch
+            full_tokens = estimate_tokens("\n".join(f"{h}\n{b}" for h, b in hunks))
+            reference = {"filename": file["filename"], "risk": score, "tokens": full_tokens}
+            if commit_sha:
+                reference["fetch"] = f"repo_agent get_file_patch(commit_sha='{commit_sha}', filename='{file['filename']}')"
+            deferred.append(reference)
+            continue
+
+        used += tokens
+        for digest in digests:
+            sent_hunks.setdefault(digest, file["filename"])
+        stripped["duplicate_hunks"] += len(duplicates)
+        entry = {"filename": file["filename"], "patch": patch, "risk": score}
+        if labels:
+            entry["risk_labels"] = labels
+        if duplicates:
+            entry["duplicate_hunks"] = duplicates
+        for key in ("status", "additions", "deletions", "patch_truncated"):
+            if key in file:
+                entry[key] = file[key]
+        returned.append(entry)
+
+    return {
+        "files": returned,
+        "deferred": deferred,
+        "budget": {
+            "max_tokens": max_tokens,
+            "used_tokens": used,
+            "original_tokens": original_tokens,
+            "stripped": stripped,
+        },
+    }
+
+
+def default_budget() -> int:
+    """
+    Token budget per commit for patches sent to the worker agents (REPO_PAYLOAD_BUDGET_TOKENS).
+    """
+    return int(os.getenv("REPO_PAYLOAD_BUDGET_TOKENS", "12000"))
@@ -0,0 +1,102 @@
+import os
+from typing import Iterable, List, Dict, Any, Optional
+
+from common.source_files import path_skip_reason
+
+
+class DiffLimits:
+    """
+    Caps applied to one page of diff output.
+
+    Args:
+        max_files: Most files returned per page.
+        max_patch_bytes: Patches longer than this are cut at a line boundary.
+        max_total_bytes: Stop the page once the returned patches reach this size.
+    """
+
+    def __init__(self, max_files: int = 50, max_patch_bytes: int = 20_000, max_total_bytes: int = 200_000):
+        self.max_files = max_files
+        self.max_patch_bytes = max_patch_bytes
+        self.max_total_bytes = max_total_bytes
+
+    @classmethod
+    def from_env(cls) -> "DiffLimits":
+        return cls(
+            max_files=int(os.getenv("REPO_DIFF_MAX_FILES", "50")),
+            max_patch_bytes=int(os.getenv("REPO_DIFF_MAX_PATCH_BYTES", "20000")),
+            max_total_bytes=int(os.getenv("REPO_DIFF_MAX_TOTAL_BYTES", "200000")),
+        )
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.max_files}:{self.max_patch_bytes}:{self.max_total_bytes}"
+
+
+def skip_reason(filename: str, patch: str, additions: int, deletions: int, status: str = "modified") -> Optional[str]:
+    """
+    Returns why a file's diff should not be returned ("binary", "generated", "vendored"), or None.
+    """
+    no_text_change = not patch and additions == 0 and deletions == 0 and status != "renamed"
+    if no_text_change:
+        return "binary"
+    return path_skip_reason(filename)
+
+
+def truncate_patch(patch: str, max_bytes: int) -> str:
+    """
+    Cuts ``patch`` to at most ``max_bytes`` UTF-8 bytes, ending on a whole line.
+    """
+    encoded = patch.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return patch
+    cut = encoded[:max_bytes].decode("utf-8", "ignore")
+    newline = cut.rfind("\n")
+    return cut[:newline] if newline > 0 else cut
+
+
+def page_files(files: Iterable[Dict[str, Any]], cursor: Optional[str], limits: DiffLimits) -> Dict[str, Any]:
+    """
+    Consumes ``files`` lazily from the cursor position until a cap is reached.
+
+    Args:
+        files: Iterator of file entries (filename, status, additions, deletions, patch).
+        cursor: Position returned as ``next_cursor`` by a previous page (None for the first page).
+        limits: Caps for this page.
+
+    Returns:
+        A dictionary with the returned ``files``, the ``skipped`` files (metadata
+        and reason only) and ``next_cursor`` (None once every file was seen).
+    """
+    offset = int(cursor) if cursor else 0
+    returned: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+    total_bytes = 0
+    index = 0
+
+    for index, file in enumerate(files):
+        if index < offset:
+            continue
+        if len(returned) >= limits.max_files:
+            return {"files": returned, "skipped": skipped, "next_cursor": str(index)}
+
+        patch = file.get("patch") or ""
+        reason = skip_reason(
+            file["filename"], patch, file.get("additions", 0), file.get("deletions", 0), file.get("status", "modified")
+        )
+        if reason:
+            skipped.append({key: value for key, value in file.items() if key != "patch"} | {"reason": reason})
+            continue
+
+        entry = dict(file)
+        size = len(patch.encode("utf-8"))
+        if size > limits.max_patch_bytes:
+            entry["patch"] = truncate_patch(patch, limits.max_patch_bytes)
+            entry["patch_truncated"] = True
+            size = len(entry["patch"].encode("utf-8"))
+        if returned and total_bytes + size > limits.max_total_bytes:
+            return {"files": returned, "skipped": skipped, "next_cursor": str(index)}
+
+        total_bytes += size
+        returned.append(entry)
+
+    return {"files": returned, "skipped": skipped, "next_cursor": None}
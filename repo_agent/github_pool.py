@@ -0,0 +1,138 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from github import Auth, Github
+
+from common.github import DEFAULT_BASE_URL
+from repo_agent.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+class GithubClientPool:
+    """
+    Process-wide pool of GitHub clients keyed by (token, base URL).
+
+    Each client keeps its own HTTP session alive between tool calls, and
+    repository handles returned by ``get_repo()`` are cached for ``repo_ttl``
+    seconds so repeated tool calls skip the extra metadata round-trip.
+    """
+
+    def __init__(self, repo_ttl: float = 300.0, pool_size: int = 10):
+        self.repo_ttl = repo_ttl
+        self.pool_size = pool_size
+        self._clients: Dict[Tuple[str, str], Github] = {}
+        self._repos: Dict[Tuple[str, str, str], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "client_hits": 0,
+            "client_misses": 0,
+            "repo_hits": 0,
+            "repo_misses": 0,
+            "repo_expired": 0,
+        }
+
+    def get_client(self, token: str, base_url: str = DEFAULT_BASE_URL) -> Github:
+        """
+        Returns the pooled client for this token/base URL, creating it on first use.
+        """
+        key = (token, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._stats["client_hits"] += 1
+                return client
+            self._stats["client_misses"] += 1
+            # Pacing and retries are left to the shared RateLimitScheduler: PyGithub's own
+            # fixed delay and GithubRetry would sleep and retry underneath it
+            client = Github(
+                auth=Auth.Token(token),
+                base_url=base_url,
+                pool_size=self.pool_size,
+                seconds_between_requests=0,
+                retry=None,
+            )
+            get_scheduler().instrument(client.requester)
+            self._clients[key] = client
+            return client
+
+    def get_repo(self, token: str, repo_name: str, base_url: str = DEFAULT_BASE_URL):
+        """
+        Returns a cached ``Repository`` handle, refreshing it once the TTL has expired.
+        """
+        key = (token, base_url, repo_name)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._repos.get(key)
+            if cached is not None:
+                fetched_at, repo = cached
+                if now - fetched_at < self.repo_ttl:
+                    self._stats["repo_hits"] += 1
+                    return repo
+                self._stats["repo_expired"] += 1
+                del self._repos[key]
+            self._stats["repo_misses"] += 1
+
+        # Fetch outside the lock so a slow request does not serialize other repos
+        client = self.get_client(token, base_url)
+        repo = get_scheduler().call(f"repo:{base_url}:{repo_name}", lambda: client.get_repo(repo_name), client.requester)
+        with self._lock:
+            self._repos[key] = (time.monotonic(), repo)
+        return repo
+
+    def invalidate(self, repo_name: Optional[str] = None) -> None:
+        """
+        Drops cached repository handles (all of them, or only those for ``repo_name``).
+        """
+        with self._lock:
+            if repo_name is None:
+                self._repos.clear()
+            else:
+                for key in [k for k in self._repos if k[2] == repo_name]:
+                    del self._repos[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters plus the current pool sizes.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["clients"] = len(self._clients)
+            stats["cached_repos"] = len(self._repos)
+        return stats
+
+    def close(self) -> None:
+        """
+        Closes every pooled client and forgets all cached handles.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._repos.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing GitHub client: {e}")
+
+
+_github_pool: Optional[GithubClientPool] = None
+_github_pool_lock = threading.Lock()
+
+
+def get_github_pool() -> GithubClientPool:
+    """
+    Returns the pool shared by every repo_agent tool in this process.
+
+    Created lazily so settings loaded from ``.env`` after import still apply.
+    """
+    global _github_pool
+    with _github_pool_lock:
+        if _github_pool is None:
+            _github_pool = GithubClientPool(
+                repo_ttl=float(os.getenv("GITHUB_REPO_CACHE_TTL", "300")),
+                pool_size=int(os.getenv("GITHUB_POOL_SIZE", "10")),
+            )
+        return _github_pool
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from common.paths import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+FULL_SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+
+def is_full_sha(ref: Optional[str]) -> bool:
+    """
+    True when ``ref`` is a full 40-character commit/blob SHA (and therefore immutable).
+    """
+    return bool(ref) and bool(FULL_SHA_PATTERN.match(ref.lower()))
+
+
+class ObjectCache:
+    """
+    Persistent, size-bounded LRU cache for GitHub objects.
+
+    Entries are zlib-compressed JSON stored in a single SQLite file, so the
+    cache survives restarts and can be shared by several worker processes.
+    Immutable objects are keyed by SHA (``commit:<sha>``, ``blob:<path>:<sha>``);
+    mutable lookups store the response ETag next to the value so callers can
+    revalidate with ``If-None-Match``.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " etag TEXT,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_objects_last_access ON objects(last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while another process writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[str]]]:
+        """
+        Returns ``(value, etag)`` for ``key`` or None, marking the entry as recently used.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT value, etag FROM objects WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        with conn:
+            conn.execute("UPDATE objects SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return json.loads(zlib.decompress(row[0])), row[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value for ``key`` or None.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def put(self, key: str, value: Any, etag: Optional[str] = None) -> None:
+        """
+        Stores ``value`` (anything JSON-serializable) and evicts least recently used entries if needed.
+        """
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO objects (key, value, etag, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, etag, len(blob), time.time()),
+            )
+        self._count("writes")
+        self._evict()
+
+    def _evict(self) -> None:
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every single write
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        with conn:
+            for key, size in conn.execute("SELECT key, size FROM objects ORDER BY last_access").fetchall():
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM objects WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        self._count("evictions", evicted)
+        logger.info(f"Object cache evicted {evicted} entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters plus the current entry count and size.
+        """
+        entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({"entries": entries, "bytes": size, "max_bytes": self.max_bytes})
+        return stats
+
+
+_object_cache: Optional[ObjectCache] = None
+_object_cache_lock = threading.Lock()
+
+
+def get_object_cache() -> ObjectCache:
+    """
+    Returns the on-disk cache shared by the repo_agent tools, opening it on first use.
+    """
+    global _object_cache
+    with _object_cache_lock:
+        if _object_cache is None:
+            _object_cache = ObjectCache(
+                path=os.path.join(os.getenv("REPO_CACHE_DIR", DEFAULT_CACHE_DIR), "objects.sqlite3"),
+                max_bytes=int(os.getenv("REPO_CACHE_MAX_MB", "256")) * 1024 * 1024,
+            )
+        return _object_cache
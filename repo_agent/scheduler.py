@@ -0,0 +1,315 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Optional, TypeVar
+
+from github import GithubException, RateLimitExceededException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses worth retrying: rate limits plus transient gateway errors
+RETRYABLE_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+class RateLimitScheduler:
+    """
+    Central pacing for every GitHub call made by repo_agent.
+
+    - A token bucket (``rate`` requests/second, ``burst`` capacity) spreads
+      requests out instead of firing them all at once.
+    - The ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` budget observed on
+      responses is tracked; once it falls to ``reserve`` callers wait for the
+      reset instead of burning the last requests on errors.
+    - Identical requests that are already in flight are merged: followers wait
+      for the leader's result instead of issuing their own request.
+    - Rate-limit and transient failures are retried with exponential backoff and
+      full jitter, honouring ``Retry-After`` when GitHub sends it.
+    - Every HTTP request made by an instrumented client takes a token, so a
+      scheduled call that pages through several responses pays for each page.
+      Responses GitHub does not charge (304 Not Modified) give theirs back.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        reserve: int = 50,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._remaining: Optional[int] = None
+        self._limit: Optional[int] = None
+        self._reset_at: Optional[float] = None
+        self._inflight: Dict[str, Future] = {}
+        # Per thread: whether the token taken for the current scheduled attempt is still unused
+        self._local = threading.local()
+        self._waiting = 0
+        self._running = 0
+        self._stats = {"requests": 0, "coalesced": 0, "retries": 0, "throttled": 0, "failures": 0, "not_modified": 0}
+
+    def call(self, key: Optional[str], fn: Callable[[], T], requester: Any = None) -> T:
+        """
+        Runs ``fn`` under the scheduler.
+
+        Args:
+            key: Identifies the request for in-flight merging (None disables merging).
+            fn: Performs the GitHub request(s) and returns the result.
+            requester: PyGithub requester whose rate-limit headers are read afterwards.
+
+        Returns:
+            Whatever ``fn`` returns (shared with any merged callers).
+        """
+        if key is None:
+            return self._execute(fn, requester)
+
+        with self._cond:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._execute(fn, requester)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+    def _execute(self, fn: Callable[[], T], requester: Any) -> T:
+        attempt = 0
+        while True:
+            self._acquire()
+            outer = getattr(self._local, "prepaid", None)
+            self._local.prepaid = True
+            with self._cond:
+                self._running += 1
+            try:
+                return fn()
+            except Exception as e:
+                error = e
+            finally:
+                self._local.prepaid = outer
+                with self._cond:
+                    self._running -= 1
+                if requester is not None:
+                    self.observe_requester(requester)
+
+            # Not counted as running while backing off
+            delay = self._retry_delay(error, attempt)
+            if delay is None or attempt >= self.max_retries:
+                with self._cond:
+                    self._stats["failures"] += 1
+                raise error
+            attempt += 1
+            with self._cond:
+                self._stats["retries"] += 1
+            logger.warning(f"GitHub request failed ({error}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def before_request(self) -> None:
+        """
+        Called before every HTTP request of an instrumented client.
+
+        The first request of a scheduled attempt uses the token ``call`` already
+        took; any further request (next page, lazy completion) and requests
+        made outside ``call`` take their own.
+        """
+        if getattr(self._local, "prepaid", None):
+            self._local.prepaid = False
+            return
+        self._acquire()
+
+    def credit(self) -> None:
+        """
+        Gives back the token of a request GitHub did not charge against the
+        rate limit (a 304 Not Modified). The remaining budget itself is not
+        touched: it is read from that response's headers.
+        """
+        with self._cond:
+            self._tokens = min(self.burst, self._tokens + 1)
+            self._stats["not_modified"] += 1
+            self._cond.notify_all()
+
+    def instrument(self, requester: Any) -> None:
+        """
+        Makes a PyGithub requester report every HTTP request it sends to ``before_request``.
+
+        PyGithub has no public hook for this, so its private (name-mangled)
+        ``__deferRequest``, called right before each request, is wrapped; the
+        supported versions are pinned in pyproject.toml. If a PyGithub release
+        drops it, a warning is logged and only the scheduled calls themselves
+        are paced, not the extra pages they fetch.
+        """
+        defer = getattr(requester, "_Requester__deferRequest", None)
+        if not callable(defer):
+            logger.warning(
+                "PyGithub's Requester has no __deferRequest hook; pagination requests will not be paced. "
+                "Check the PyGithub version pinned in pyproject.toml."
+            )
+            return
+
+        def paced(verb: str) -> None:
+            self.before_request()
+            defer(verb)
+
+        requester._Requester__deferRequest = paced
+
+    def _acquire(self) -> None:
+        with self._cond:
+            self._waiting += 1
+            throttled = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+
+                    wait = self._budget_wait()
+                    if wait <= 0 and self._tokens >= 1:
+                        self._tokens -= 1
+                        if self._remaining is not None:
+                            # Optimistically spend budget so concurrent callers don't overshoot
+                            self._remaining -= 1
+                        self._stats["requests"] += 1
+                        return
+                    if wait <= 0:
+                        wait = (1 - self._tokens) / self.rate
+                    if not throttled:
+                        throttled = True
+                        self._stats["throttled"] += 1
+                    self._cond.wait(timeout=min(wait, self.max_delay))
+            finally:
+                self._waiting -= 1
+
+    def _budget_wait(self) -> float:
+        if self._remaining is None or self._reset_at is None:
+            return 0.0
+        until_reset = self._reset_at - time.time()
+        if until_reset <= 0:
+            # The window has rolled over; forget the stale budget until the next response
+            self._remaining = None
+            return 0.0
+        if self._remaining <= self.reserve:
+            return until_reset
+        return 0.0
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        if isinstance(error, GithubException):
+            if error.status not in RETRYABLE_STATUSES:
+                return None
+            if error.status == 403 and not isinstance(error, RateLimitExceededException):
+                message = str(error.data).lower() if error.data else ""
+                if "rate limit" not in message:
+                    # Plain permission errors will not go away by retrying
+                    return None
+            headers = {k.lower(): v for k, v in (error.headers or {}).items()}
+            self.observe_headers(headers)
+        elif not isinstance(error, (ConnectionError, TimeoutError, OSError)):
+            return None
+        else:
+            headers = {}
+
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if "retry-after" in headers:
+            try:
+                delay = max(delay, float(headers["retry-after"]))
+            except ValueError:
+                pass
+        return min(delay, self.max_delay)
+
+    def observe_headers(self, headers: Dict[str, str]) -> None:
+        """
+        Updates the remaining budget from raw ``X-RateLimit-*`` response headers.
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        try:
+            remaining = int(headers["x-ratelimit-remaining"]) if "x-ratelimit-remaining" in headers else None
+            limit = int(headers["x-ratelimit-limit"]) if "x-ratelimit-limit" in headers else None
+            reset_at = float(headers["x-ratelimit-reset"]) if "x-ratelimit-reset" in headers else None
+        except ValueError:
+            return
+        self._update_budget(remaining, limit, reset_at)
+
+    def observe_requester(self, requester: Any) -> None:
+        """
+        Updates the remaining budget from the headers PyGithub recorded on its last response.
+        """
+        remaining, limit = getattr(requester, "rate_limiting", (-1, -1))
+        reset_at = getattr(requester, "rate_limiting_resettime", 0)
+        if remaining < 0:
+            return
+        self._update_budget(remaining, limit, float(reset_at) if reset_at else None)
+
+    def _update_budget(self, remaining: Optional[int], limit: Optional[int], reset_at: Optional[float]) -> None:
+        with self._cond:
+            if remaining is not None:
+                self._remaining = remaining
+            if limit is not None:
+                self._limit = limit
+            if reset_at is not None:
+                self._reset_at = reset_at
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the remaining budget, queue depth and request counters.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "remaining": self._remaining,
+                "limit": self._limit,
+                "reset_at": self._reset_at,
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "in_flight_keys": len(self._inflight),
+                "tokens": round(self._tokens, 2),
+            })
+        return stats
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """
+    Returns the scheduler shared by all GitHub traffic in this process.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(
+                rate=float(os.getenv("GITHUB_RATE_PER_SEC", "10")),
+                burst=int(os.getenv("GITHUB_RATE_BURST", "20")),
+                reserve=int(os.getenv("GITHUB_RATE_RESERVE", "50")),
+                max_retries=int(os.getenv("GITHUB_MAX_RETRIES", "4")),
+            )
+        return _scheduler
@@ -1,10 +1,15 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from fastapi import FastAPI
+from pydantic import BaseModel
 from google.adk import Agent
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 from dotenv import load_dotenv
 
+from common.diffs import added_lines
+from common.metrics import EXCEPT_MESSAGE, PRINT_MESSAGE, TODO_MESSAGE, get_metrics_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,76 +27,121 @@ def analyze_code_quality(code_content: str) -> Dict[str, Any]:
     Returns:
         Dictionary with quality metrics.
     """
-    lines = code_content.splitlines()
-    num_lines = len(lines)
-    
-    num_functions = 0
-    max_indent = 0
-    
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue
-            
-        if stripped.startswith("def ") or stripped.startswith("function "):
-            num_functions += 1
-            
-        indent = len(line) - len(line.lstrip())
-        max_indent = max(max_indent, indent)
-        
-    return {
-        "loc": num_lines,
-        "function_count": num_functions,
-        "max_indentation_depth": max_indent,
-        "rating": "Low" if max_indent > 20 else "Good"
-    }
+    return get_metrics_cache().get(code_content).quality()
 
 def check_best_practices(code_content: str) -> List[str]:
     """
     Checks for adherence to standard coding practices.
     """
-    issues = []
-    if "print(" in code_content:
-        issues.append("Avoid 'print()' in production code; use logging instead.")
-    
-    if "TODO" in code_content:
-        issues.append("Found TODO comments. Ensure these are tracked.")
-        
-    if "except Exception:" in code_content or "except:" in code_content:
-         issues.append("Avoid bare except clauses or catching generic Exception.")
+    return get_metrics_cache().get(code_content).best_practices()
 
-    return issues
+# Line-level versions of the check_best_practices rules, used on diffs
+LINE_PRACTICE_CHECKS = [
+    (lambda line: "print(" in line, PRINT_MESSAGE),
+    (lambda line: "TODO" in line, TODO_MESSAGE),
+    (lambda line: line.strip() in ("except Exception:", "except:"), EXCEPT_MESSAGE),
+]
+
+def review_commit_changes(files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Checks only the lines a commit adds against the best-practice rules.
+
+    Pass the "files" list from repo_agent's analyze_code_changes as-is.
+
+    Args:
+        files: List of changed files, each with "filename" and "patch".
+
+    Returns:
+        A dictionary with issues (filename, line in the new file, message) and
+        the number of added lines reviewed.
+    """
+    issues = []
+    lines_reviewed = 0
+    for file in files:
+        for line_number, text in added_lines(file.get("patch") or ""):
+            lines_reviewed += 1
+            for check, message in LINE_PRACTICE_CHECKS:
+                if check(text):
+                    issues.append({"filename": file.get("filename", ""), "line": line_number, "message": message})
+    return {"issues": issues, "lines_reviewed": lines_reviewed}
 
 def suggest_optimizations(code_content: str) -> List[str]:
     """
     Proposes potential performance optimizations.
     """
-    suggestions = []
-    lines = code_content.splitlines()
-    for i, line in enumerate(lines):
-         # Check for nested loops more robustly
-         stripped = line.strip()
-         if stripped.startswith("for ") or stripped.startswith("while "):
-             indent_level = len(line) - len(line.lstrip())
-             # Look ahead for immediate nested loop
-             if i + 1 < len(lines):
-                 next_line = lines[i+1]
-                 next_stripped = next_line.strip()
-                 next_indent = len(next_line) - len(next_line.lstrip())
-                 if (next_stripped.startswith("for ") or next_stripped.startswith("while ")) and next_indent > indent_level:
-                     suggestions.append(f"Potential nested loop detected around line {i+1}. Consider optimizing O(N^2) operations.")
-    
-    return suggestions
+    return get_metrics_cache().get(code_content).optimizations()
+
+def review_all(code_content: str) -> Dict[str, Any]:
+    """
+    Runs the quality, best-practice and optimization checks together.
+
+    Prefer this over calling analyze_code_quality, check_best_practices and
+    suggest_optimizations one after another on the same code.
+
+    Args:
+        code_content: The code to review.
+
+    Returns:
+        A dictionary with "quality" (metrics), "functions" (cyclomatic
+        complexity and loop depth per function), "best_practices" (issues) and
+        "optimizations" (suggestions).
+    """
+    metrics = get_metrics_cache().get(code_content)
+    return {
+        "quality": metrics.quality(),
+        "functions": metrics.complexity["functions"],
+        "best_practices": metrics.best_practices(),
+        "optimizations": metrics.optimizations(),
+    }
+
+def get_metrics_cache_stats() -> Dict[str, Any]:
+    """
+    Returns hit/miss counters of the shared metrics cache (not exposed as an agent tool).
+    """
+    return get_metrics_cache().stats()
 
 
 agent = Agent(
     name="reviewer_agent",
+    description="Agent for code reviews and quality checks.",
     model="gemini-2.0-flash",
-    instruction="You are a Code Reviewer. Analyze the code for quality, best practices, and readability. Use your tools to gather metrics, but rely on your own knowledge for high-level advice.",
-    tools=[analyze_code_quality, check_best_practices, suggest_optimizations]
+    instruction="You are a Code Reviewer. Analyze the code for quality, best practices, and readability. Use review_all to gather metrics for a piece of code in one call, but rely on your own knowledge for high-level advice.",
+    tools=[review_all, analyze_code_quality, check_best_practices, suggest_optimizations, review_commit_changes]
 )
 
 app = to_a2a(agent, host="127.0.0.1", port=8003)
+
+# Deterministic metrics as plain JSON endpoints (POST /review/...), no LLM round-trip
+class SourceFile(BaseModel):
+    filename: str = ""
+    content: str
+
+class ReviewRequest(BaseModel):
+    files: List[SourceFile]
+
+class DiffFile(BaseModel):
+    filename: str = ""
+    patch: Optional[str] = None
+
+class DiffReviewRequest(BaseModel):
+    files: List[DiffFile]
+
+review_api = FastAPI(title="reviewer_agent metrics")
+
+@review_api.post("/metrics")
+def review_metrics_endpoint(request: ReviewRequest) -> Dict[str, Any]:
+    return {"results": [{"filename": f.filename, "quality": analyze_code_quality(f.content)} for f in request.files]}
+
+@review_api.post("/all")
+def review_all_endpoint(request: ReviewRequest) -> Dict[str, Any]:
+    return {"results": [{"filename": f.filename} | review_all(f.content) for f in request.files]}
+
+@review_api.post("/diff")
+def review_diff_endpoint(request: DiffReviewRequest) -> Dict[str, Any]:
+    return review_commit_changes([file.model_dump() for file in request.files])
+
+app.mount("/review", review_api)
+
 root_agent = agent
 
 if __name__ == "__main__":
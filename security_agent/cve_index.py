@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import mmap
+import struct
+import bisect
+import zipfile
+import logging
+import threading
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"CVEIDX1\n"
+
+# Pre-release phases sort before the final release, post-releases after it
+PHASES = {
+    "dev": -4,
+    "a": -3, "alpha": -3,
+    "b": -2, "beta": -2,
+    "c": -1, "rc": -1, "pre": -1, "preview": -1,
+    "post": 1, "rev": 1, "r": 1,
+}
+VERSION_PATTERN = re.compile(r"^\s*v?(\d+(?:\.\d+)*)(.*)$")
+SUFFIX_PATTERN = re.compile(r"[-_.+]?([a-zA-Z]+)[-_.]?(\d*)")
+
+# Used when no OSV dump is configured, so the tool still answers for well-known cases
+BUILTIN_ADVISORIES = [
+    {
+        "id": "GHSA-x84v-xcm2-53pg",
+        "aliases": ["CVE-2018-18074"],
+        "summary": "Insufficiently Protected Credentials in Requests (Authorization header leaked on redirect)",
+        "affected": [{
+            "package": {"ecosystem": "PyPI", "name": "requests"},
+            "ranges": [{"type": "ECOSYSTEM", "events": [{"introduced": "0"}, {"fixed": "2.20.0"}]}],
+        }],
+    },
+    {
+        "id": "GHSA-6r97-cj55-9hrq",
+        "aliases": ["CVE-2019-14234"],
+        "summary": "SQL Injection in Django JSONField/HStoreField key transforms",
+        "affected": [{
+            "package": {"ecosystem": "PyPI", "name": "django"},
+            "ranges": [{"type": "ECOSYSTEM", "events": [
+                {"introduced": "0"}, {"fixed": "1.11.23"},
+                {"introduced": "2.0a1"}, {"fixed": "2.1.11"},
+                {"introduced": "2.2a1"}, {"fixed": "2.2.4"},
+            ]}],
+        }],
+    },
+    {
+        "id": "GHSA-p6mc-m468-83gw",
+        "aliases": ["CVE-2020-8203"],
+        "summary": "Prototype Pollution in lodash (zipObjectDeep)",
+        "affected": [{
+            "package": {"ecosystem": "npm", "name": "lodash"},
+            "ranges": [{"type": "SEMVER", "events": [{"introduced": "3.7.0"}, {"fixed": "4.17.19"}]}],
+        }],
+    },
+]
+
+
+def version_key(version: str) -> Tuple:
+    """
+    Sort key for PEP 440 and SemVer style versions.
+
+    "1.2" == "1.2.0", pre-releases ("1.0a1", "1.0.0-rc.1", "1.0.dev0") sort
+    before the release and post-releases after it. Unparseable versions sort
+    before everything else.
+    """
+    match = VERSION_PATTERN.match(version)
+    if not match:
+        return ((), -9, 0)
+    release = [int(part) for part in match.group(1).split(".")]
+    while release and release[-1] == 0:
+        release.pop()
+    phase, number = 0, 0
+    suffix = match.group(2).split("+", 1)[0]
+    if suffix:
+        tag = SUFFIX_PATTERN.match(suffix)
+        if tag:
+            # Unknown tags are treated like SemVer pre-releases
+            phase = PHASES.get(tag.group(1).lower(), -1)
+            number = int(tag.group(2)) if tag.group(2) else 0
+    return (tuple(release), phase, number)
+
+
+def normalize_package(ecosystem: str, name: str) -> str:
+    """
+    Index key for a package: lowercased ecosystem plus its canonical name.
+    """
+    ecosystem = ecosystem.lower()
+    if ecosystem == "pypi":
+        name = re.sub(r"[-_.]+", "-", name).lower()
+    elif ecosystem == "npm":
+        name = name.lower()
+    return f"{ecosystem}:{name}"
+
+
+def _freeze(value):
+    # JSON turns tuples into lists; keys must compare as tuples again
+    return tuple(_freeze(item) for item in value) if isinstance(value, list) else value
+
+
+def _entries_from_advisory(advisory: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yields ``(package_key, entry)`` pairs with the affected ranges and versions of one OSV advisory.
+    """
+    label = advisory["id"]
+    aliases = [alias for alias in advisory.get("aliases", []) if alias.startswith("CVE-")]
+    if aliases:
+        label = f"{aliases[0]} ({advisory['id']})"
+    summary = advisory.get("summary") or advisory.get("details", "")[:200]
+
+    for affected in advisory.get("affected", []):
+        package = affected.get("package") or {}
+        if not package.get("ecosystem") or not package.get("name"):
+            continue
+        key = normalize_package(package["ecosystem"], package["name"])
+        ranges = []
+        for version_range in affected.get("ranges", []):
+            if version_range.get("type") == "GIT":
+                continue
+            lower = None
+            for event in version_range.get("events", []):
+                if "introduced" in event:
+                    lower = event["introduced"]
+                elif lower is not None and ("fixed" in event or "limit" in event):
+                    ranges.append((lower, event.get("fixed") or event.get("limit"), False))
+                    lower = None
+                elif lower is not None and "last_affected" in event:
+                    ranges.append((lower, event["last_affected"], True))
+                    lower = None
+            if lower is not None:
+                # Introduced and never fixed
+                ranges.append((lower, None, False))
+        yield key, {
+            "label": label,
+            "summary": summary,
+            "ranges": ranges,
+            "versions": affected.get("versions", []),
+        }
+
+
+def _build_package_blob(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turns all advisory entries for one package into its sorted, searchable form.
+    """
+    advisories = []
+    ranges = []
+    versions: Dict[str, List[int]] = {}
+    for entry in entries:
+        advisory_index = len(advisories)
+        advisories.append([entry["label"], entry["summary"]])
+        for lower, upper, inclusive in entry["ranges"]:
+            lower_key = version_key(lower) if lower != "0" else ((), -9, 0)
+            upper_key = version_key(upper) if upper is not None else None
+            ranges.append([lower_key, upper_key, inclusive, advisory_index, upper])
+        for version in entry["versions"]:
+            versions.setdefault(version, []).append(advisory_index)
+    ranges.sort(key=lambda r: r[0])
+    return {"advisories": advisories, "ranges": ranges, "versions": versions}
+
+
+class CveIndex:
+    """
+    Per-package index of affected version ranges.
+
+    Packages map to small JSON blobs holding their ranges sorted by lower
+    bound. Built from an OSV dump, the blobs are written into one file whose
+    header maps package keys to byte offsets; on restart the file is
+    memory-mapped and each package's blob is only decoded when it is queried.
+    """
+
+    def __init__(self, blobs: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._blobs = blobs or {}
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._data_start = 0
+        self._decoded: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_advisories(cls, advisories: Iterable[Dict[str, Any]]) -> "CveIndex":
+        """
+        Builds an in-memory index from OSV advisory dictionaries.
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for advisory in advisories:
+            for key, entry in _entries_from_advisory(advisory):
+                grouped.setdefault(key, []).append(entry)
+        return cls({key: _build_package_blob(entries) for key, entries in grouped.items()})
+
+    @classmethod
+    def load_or_build(cls, dump_path: str, index_path: str) -> "CveIndex":
+        """
+        Memory-maps ``index_path`` if it was built from the current dump, otherwise rebuilds it first.
+
+        Args:
+            dump_path: OSV dump, either a directory of advisory JSON files or a zip (e.g. OSV's all.zip).
+            index_path: Where the compiled index is kept.
+        """
+        signature = _dump_signature(dump_path)
+        if os.path.exists(index_path):
+            index = cls()
+            if index._open(index_path) == signature:
+                return index
+            index.close()
+            logger.info("OSV dump changed since the index was built; rebuilding")
+
+        logger.info(f"Building CVE index from {dump_path}")
+        cls.from_advisories(_iter_dump(dump_path)).write(index_path, signature)
+        index = cls()
+        index._open(index_path)
+        return index
+
+    def write(self, path: str, signature: str = "") -> None:
+        """
+        Writes the index in its memory-mappable form: magic, header length, JSON header, package blobs.
+        """
+        offsets = {}
+        chunks = []
+        position = 0
+        for key in sorted(self._blobs):
+            data = json.dumps(self._blobs[key], separators=(",", ":")).encode("utf-8")
+            offsets[key] = [position, len(data)]
+            chunks.append(data)
+            position += len(data)
+        header = json.dumps({"signature": signature, "packages": offsets}, separators=(",", ":")).encode("utf-8")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(INDEX_MAGIC)
+            handle.write(struct.pack("<Q", len(header)))
+            handle.write(header)
+            for chunk in chunks:
+                handle.write(chunk)
+        os.replace(temporary, path)
+
+    def _open(self, path: str) -> Optional[str]:
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            return None
+        (header_length,) = struct.unpack_from("<Q", self._mmap, len(INDEX_MAGIC))
+        header_start = len(INDEX_MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+        self._offsets = {key: (offset, length) for key, (offset, length) in header["packages"].items()}
+        self._data_start = header_start + header_length
+        return header.get("signature")
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _package(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self._blobs:
+            return self._blobs[key]
+        with self._lock:
+            blob = self._decoded.get(key)
+            if blob is None and key in self._offsets:
+                offset, length = self._offsets[key]
+                start = self._data_start + offset
+                blob = json.loads(self._mmap[start:start + length])
+                for version_range in blob["ranges"]:
+                    version_range[0] = _freeze(version_range[0])
+                    version_range[1] = _freeze(version_range[1])
+                self._decoded[key] = blob
+            return blob
+
+    def lookup(self, ecosystem: str, name: str, version: str) -> List[Dict[str, Any]]:
+        """
+        Returns the advisories affecting one package version.
+        """
+        blob = self._package(normalize_package(ecosystem, name))
+        if blob is None:
+            return []
+
+        key = version_key(version)
+        matched = {index: None for index in blob["versions"].get(version, [])}
+        # Ranges are sorted by lower bound: only those starting at or below the version can contain it
+        end = bisect.bisect_right(blob["ranges"], key, key=lambda r: r[0])
+        for lower_key, upper_key, inclusive, advisory_index, upper in blob["ranges"][:end]:
+            if upper_key is None or key < upper_key or (inclusive and key == upper_key):
+                if matched.get(advisory_index) is None:
+                    matched[advisory_index] = None if inclusive else upper
+
+        results = []
+        for advisory_index, fixed in matched.items():
+            label, summary = blob["advisories"][advisory_index]
+            results.append({"id": label, "summary": summary, "fixed": fixed})
+        return results
+
+    def check(self, dependencies: Iterable[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """
+        Bulk-checks ``(ecosystem, name, version)`` triples.
+
+        Returns:
+            One entry per vulnerable dependency with its matching advisories.
+        """
+        findings = []
+        for ecosystem, name, version in dependencies:
+            advisories = self.lookup(ecosystem, name, version)
+            if advisories:
+                findings.append({"ecosystem": ecosystem, "name": name, "version": version, "advisories": advisories})
+        return findings
+
+
+def _dump_signature(dump_path: str) -> str:
+    if os.path.isdir(dump_path):
+        newest = 0.0
+        count = 0
+        for root, _, names in os.walk(dump_path):
+            for name in names:
+                if name.endswith(".json"):
+                    newest = max(newest, os.path.getmtime(os.path.join(root, name)))
+                    count += 1
+        return f"dir:{os.path.abspath(dump_path)}:{count}:{newest}"
+    stat = os.stat(dump_path)
+    return f"file:{os.path.abspath(dump_path)}:{stat.st_size}:{stat.st_mtime}"
+
+
+def _iter_dump(dump_path: str) -> Iterator[Dict[str, Any]]:
+    if os.path.isdir(dump_path):
+        for root, _, names in os.walk(dump_path):
+            for name in sorted(names):
+                if name.endswith(".json"):
+                    with open(os.path.join(root, name), "rb") as handle:
+                        yield json.load(handle)
+    else:
+        with zipfile.ZipFile(dump_path) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    yield json.loads(archive.read(name))
+
+
+_index: Optional[CveIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_cve_index() -> CveIndex:
+    """
+    Returns the process-wide index: the OSV dump from OSV_DUMP_PATH, or the small built-in advisory set.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            dump_path = os.getenv("OSV_DUMP_PATH")
+            if dump_path:
+                index_path = os.getenv("OSV_INDEX_PATH") or os.path.join(
+                    os.path.expanduser("~"), ".cache", "spaghetti-scanner", "osv.idx"
+                )
+                _index = CveIndex.load_or_build(dump_path, index_path)
+            else:
+                _index = CveIndex.from_advisories(BUILTIN_ADVISORIES)
+        return _index
@@ -0,0 +1,159 @@
+import os
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Candidate tokens: long runs of characters that secrets are made of
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9+/=_\-]{20,}")
+
+# Charset-specific thresholds in bits per character (and minimum token length).
+# Random hex tops out at 4 bits, so commit SHAs and content hashes clear any usable
+# hex threshold; hex tokens are only reported next to a key-like name (HEX_KEY_CONTEXT)
+THRESHOLDS = {
+    "hex": (3.5, 32),
+    "base64": (4.3, 20),
+    "alphanumeric": (4.0, 20),
+}
+
+# Tokens preceded by one of these words on the same line are digests, not secrets
+ALLOWLIST_CONTEXT = re.compile(r"(?i)(sha\d*|md5|hash|digest|checksum|integrity|commit|etag|uuid|nonce)[\"']?\s*[:=]?\s*[\"']?$")
+# SRI digests, UUIDs, and bare 40/64-character hex (SHA-1 / SHA-256: git object ids, file hashes)
+ALLOWLIST_TOKEN = re.compile(
+    r"^(sha(1|256|384|512)-|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$|[0-9a-f]{40}$|[0-9a-f]{64}$)",
+    re.IGNORECASE,
+)
+# A hex token is only a likely credential when the line names it as one
+HEX_KEY_CONTEXT = re.compile(r"(?i)(key|token|secret|passw(or)?d|pwd|credential|auth|bearer|signature)")
+# Lockfiles are made of digests; nothing in them is a credential
+ALLOWLIST_FILENAMES = {
+    "uv.lock", "poetry.lock", "Pipfile.lock", "package-lock.json", "npm-shrinkwrap.json",
+    "yarn.lock", "pnpm-lock.yaml", "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum",
+}
+
+# Token bytes are renumbered into the 67-symbol token alphabet so count rows stay narrow
+_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=_-"
+_SYMBOL = np.zeros(256, dtype=np.int64)
+_SYMBOL[np.frombuffer(_ALPHABET, dtype=np.uint8)] = np.arange(len(_ALPHABET))
+
+# Character classes as symbol masks; a (symbol counts) @ _CLASSES product counts each class per token
+_CLASS_NAMES = ("non_hex", "base64_only", "digit", "upper", "lower")
+_CLASSES = np.array([
+    [chr(b) not in "0123456789abcdefABCDEF" for b in _ALPHABET],
+    [chr(b) in "+/" for b in _ALPHABET],
+    [chr(b).isdigit() for b in _ALPHABET],
+    [chr(b).isupper() for b in _ALPHABET],
+    [chr(b).islower() for b in _ALPHABET],
+], dtype=np.int64).T
+
+# Tokens per bincount block: keeps the (tokens x symbols) count matrix small enough for the CPU cache
+_CHUNK = 1024
+
+
+def _token_profiles(tokens: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (lengths, entropy, class_counts) for all tokens.
+
+    Uses H = log2(n) - sum(c * log2(c)) / n over the symbol counts c of a
+    token of length n, with c * log2(c) read from a lookup table.
+    """
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    symbols = _SYMBOL[np.frombuffer("".join(tokens).encode("ascii"), dtype=np.uint8)]
+    owners = np.repeat(np.arange(len(tokens)), lengths)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    width = len(_ALPHABET)
+    counts_log = np.zeros(int(lengths.max()) + 1)
+    counts_log[1:] = np.arange(1, len(counts_log)) * np.log2(np.arange(1, len(counts_log)))
+
+    weighted = np.empty(len(tokens))
+    class_counts = np.empty((len(tokens), len(_CLASS_NAMES)), dtype=np.int64)
+    for start in range(0, len(tokens), _CHUNK):
+        stop = min(start + _CHUNK, len(tokens))
+        begin, end = offsets[start], offsets[stop]
+        keys = (owners[begin:end] - start) * width + symbols[begin:end]
+        counts = np.bincount(keys, minlength=(stop - start) * width).reshape(-1, width)
+        weighted[start:stop] = counts_log[counts].sum(axis=1)
+        class_counts[start:stop] = counts @ _CLASSES
+    return lengths, np.log2(lengths) - weighted / lengths, class_counts
+
+
+def shannon_entropy_batch(tokens: List[str]) -> np.ndarray:
+    """
+    Shannon entropy (bits per character) of every token, computed without a per-token Python loop.
+    """
+    if not tokens:
+        return np.zeros(0)
+    return _token_profiles(tokens)[1]
+
+
+def detect_high_entropy(content: str, filename: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Finds random-looking tokens that are likely credentials.
+
+    The content is tokenized once; entropy and charset for all candidates are
+    computed in NumPy batches, then hashes and digests are dropped by the
+    allowlist. Hex tokens are reported only when a key-like name precedes
+    them on the same line.
+
+    Args:
+        content: The text to scan.
+        filename: Used to skip lockfiles (optional).
+
+    Returns:
+        Findings in the same shape as the scan engine's (rule_id ENT001).
+    """
+    if filename and filename.replace("\\", "/").rsplit("/", 1)[-1] in ALLOWLIST_FILENAMES:
+        return []
+
+    matches = list(TOKEN_PATTERN.finditer(content))
+    if not matches:
+        return []
+    tokens = [m.group() for m in matches]
+    lengths, entropy, class_counts = _token_profiles(tokens)
+    non_hex, base64_only, digit, upper, lower = (class_counts[:, i] > 0 for i in range(len(_CLASS_NAMES)))
+
+    charset = np.where(~non_hex, 0, np.where(base64_only, 1, 2))
+    names = ("hex", "base64", "alphanumeric")
+    limits = np.array([THRESHOLDS[name][0] for name in names])
+    min_lengths = np.array([THRESHOLDS[name][1] for name in names])
+    # Real keys mix character classes; long identifiers and words don't
+    mixed = ~non_hex | (digit & upper & lower)
+    flagged = np.nonzero((entropy >= limits[charset]) & (lengths >= min_lengths[charset]) & mixed)[0]
+    if not len(flagged):
+        return []
+
+    findings = []
+    line, line_start, counted = 1, 0, 0
+    for index in flagged:
+        token = tokens[index]
+        position = matches[index].start()
+        # Flagged tokens are in order: each stretch of the content is scanned for newlines once, without copying it
+        newlines = content.count("\n", counted, position)
+        if newlines:
+            line += newlines
+            line_start = content.rfind("\n", counted, position) + 1
+        counted = position
+        prefix = content[line_start:position]
+        if ALLOWLIST_TOKEN.match(token) or ALLOWLIST_CONTEXT.search(prefix):
+            continue
+        if charset[index] == 0 and not HEX_KEY_CONTEXT.search(prefix):
+            continue
+        findings.append({
+            "rule_id": "ENT001",
+            "rule": "High Entropy String",
+            "category": "secret",
+            "line": line,
+            "column": position - line_start + 1,
+            "match": token[:4] + "*" * (len(token) - 8) + token[-4:],
+            "entropy": round(float(entropy[index]), 2),
+            "charset": names[charset[index]],
+            "message": f"High-entropy {names[charset[index]]} string; possible hardcoded credential.",
+        })
+    return findings
+
+
+def entropy_enabled() -> bool:
+    """
+    Entropy detection runs by default; set ENTROPY_SCAN=0 to switch it off.
+    """
+    return os.getenv("ENTROPY_SCAN", "1") != "0"
@@ -0,0 +1,98 @@
+import re
+import json
+import tomllib
+from typing import List, Optional, Tuple
+
+# (ecosystem, name, version) as understood by the CVE index
+Dependency = Tuple[str, str, str]
+
+REQUIREMENT_PIN = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*===?\s*([^\s;#,]+)")
+
+
+def parse_requirements(content: str) -> List[Dependency]:
+    """
+    Extracts pinned ``name==version`` requirements; ranges, URLs and options are skipped.
+    """
+    dependencies = []
+    for line in content.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")):
+            continue
+        match = REQUIREMENT_PIN.match(line)
+        if match:
+            dependencies.append(("PyPI", match.group(1), match.group(2)))
+    return dependencies
+
+
+def parse_uv_lock(content: str) -> List[Dependency]:
+    """
+    Extracts every locked package from a ``uv.lock`` file.
+    """
+    data = tomllib.loads(content)
+    dependencies = []
+    for package in data.get("package", []):
+        source = package.get("source", {})
+        # The project itself and local path dependencies are not published releases
+        if "version" not in package or "virtual" in source or "editable" in source:
+            continue
+        dependencies.append(("PyPI", package["name"], package["version"]))
+    return dependencies
+
+
+def parse_package_lock(content: str) -> List[Dependency]:
+    """
+    Extracts installed packages from an npm ``package-lock.json`` (lockfile v1, v2 or v3).
+    """
+    data = json.loads(content)
+    dependencies = set()
+
+    packages = data.get("packages")
+    if packages:
+        for path, info in packages.items():
+            if not path or "version" not in info or info.get("link"):
+                continue
+            name = info.get("name") or path.rsplit("node_modules/", 1)[-1]
+            dependencies.add(("npm", name, info["version"]))
+    else:
+        # Lockfile v1 nests transitive dependencies
+        stack = [data.get("dependencies", {})]
+        while stack:
+            for name, info in stack.pop().items():
+                if "version" in info:
+                    dependencies.add(("npm", name, info["version"]))
+                if info.get("dependencies"):
+                    stack.append(info["dependencies"])
+    return sorted(dependencies)
+
+
+MANIFEST_PARSERS = {
+    "uv.lock": parse_uv_lock,
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+}
+
+
+def parse_manifest(filename: str, content: str) -> Optional[List[Dependency]]:
+    """
+    Picks the parser from the file name; returns None for unsupported manifests.
+    """
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    if name in MANIFEST_PARSERS:
+        return MANIFEST_PARSERS[name](content)
+    if name.endswith(".txt") and "requirements" in name:
+        return parse_requirements(content)
+    return None
+
+
+def parse_dependency_string(dependency: str) -> Optional[Dependency]:
+    """
+    Parses "name==version" (PyPI) or "name@version" / "@scope/name@version" (npm).
+    """
+    dependency = dependency.strip()
+    if "==" in dependency:
+        name, version = dependency.split("==", 1)
+        return ("PyPI", name.strip(), version.strip())
+    at = dependency.rfind("@")
+    if at > 0:
+        return ("npm", dependency[:at], dependency[at + 1:])
+    return None
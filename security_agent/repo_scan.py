@@ -0,0 +1,268 @@
+import io
+import os
+import time
+import tarfile
+import logging
+import subprocess
+import multiprocessing
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+import httpx
+
+from common.git_mirror import get_mirror
+from common.github import DEFAULT_BASE_URL, parse_repo_name
+from common.metrics import compute_metrics
+from common.source_files import is_code_file, path_skip_reason
+from security_agent.scan_engine import scan_text
+
+logger = logging.getLogger(__name__)
+
+# Directories never worth descending into in a local checkout
+SKIPPED_DIRS = {".git", "__pycache__", ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache"}
+
+# Work is shipped to the pool in batches of about this many bytes (or files)
+BATCH_BYTES = 512 * 1024
+BATCH_FILES = 64
+
+
+def scan_file_batch(batch: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    """
+    Runs the secret, SQL injection and insecure-pattern rules, and for source
+    files the quality metrics, over a batch of files. Executed in the pool's
+    worker processes.
+    """
+    results = []
+    for path, data in batch:
+        text = data.decode("utf-8", "replace")
+        entry: Dict[str, Any] = {"filename": path, "findings": scan_text(text, None, path)}
+        if is_code_file(path):
+            metrics = compute_metrics(text)
+            entry["quality"] = metrics.quality()
+            entry["best_practices"] = metrics.best_practices()
+        results.append(entry)
+    return results
+
+
+class _ResponseReader(io.RawIOBase):
+    # File-like view over an HTTP body so tarfile can stream it without buffering the archive
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+@contextmanager
+def _git_archive(checkout: str, ref: str) -> Iterator[IO[bytes]]:
+    process = subprocess.Popen(
+        ["git", "-C", checkout, "archive", "--format=tar", ref],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield process.stdout
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+@contextmanager
+def _github_tarball(ref: Optional[str]) -> Iterator[IO[bytes]]:
+    token = os.getenv("GITHUB_TOKEN")
+    repo_url = os.getenv("GITHUB_REPO_URL")
+    if not token or not repo_url:
+        raise ValueError("GITHUB_TOKEN or GITHUB_REPO_URL not configured")
+    base_url = os.getenv("GITHUB_API_URL", DEFAULT_BASE_URL).rstrip("/")
+    url = f"{base_url}/repos/{parse_repo_name(repo_url)}/tarball/{ref or ''}".rstrip("/")
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
+    # GitHub answers with a redirect to codeload; the archive itself is streamed from there
+    with httpx.stream("GET", url, headers=headers, follow_redirects=True, timeout=httpx.Timeout(60.0, read=300.0)) as response:
+        response.raise_for_status()
+        yield io.BufferedReader(_ResponseReader(response.iter_bytes()), buffer_size=256 * 1024)
+
+
+def _iter_tar(stream: IO[bytes], strip_prefix: bool, skipped: Counter, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    # "r|*" reads the archive strictly forward; members that are skipped are never held in memory
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            path = member.name
+            if strip_prefix:
+                # GitHub tarballs wrap everything in an "owner-repo-sha/" directory
+                path = path.split("/", 1)[1] if "/" in path else path
+            reason = path_skip_reason(path) or ("too_large" if member.size > max_bytes else None)
+            if reason:
+                skipped[reason] += 1
+                continue
+            data = archive.extractfile(member).read()
+            if b"\0" in data[:8192]:
+                skipped["binary"] += 1
+                continue
+            yield path, data
+
+
+def _iter_directory(root: str, skipped: Counter, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    for directory, dirnames, filenames in os.walk(root):
+        relative_dir = os.path.relpath(directory, root)
+        relative_dir = "" if relative_dir == "." else relative_dir.replace(os.sep, "/") + "/"
+        kept = []
+        for name in dirnames:
+            if name in SKIPPED_DIRS or path_skip_reason(f"{relative_dir}{name}/") == "vendored":
+                skipped["vendored"] += 1
+                continue
+            kept.append(name)
+        dirnames[:] = kept
+        for name in filenames:
+            path = f"{relative_dir}{name}"
+            full_path = os.path.join(directory, name)
+            if os.path.islink(full_path):
+                continue
+            reason = path_skip_reason(path) or ("too_large" if os.path.getsize(full_path) > max_bytes else None)
+            if reason:
+                skipped[reason] += 1
+                continue
+            with open(full_path, "rb") as handle:
+                data = handle.read()
+            if b"\0" in data[:8192]:
+                skipped["binary"] += 1
+                continue
+            yield path, data
+
+
+def iter_repository_files(ref: Optional[str], skipped: Counter, max_bytes: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields (path, content) for every scannable file of the repository at ``ref``.
+
+    The source is, in order of preference: the local checkout in
+    REPO_CHECKOUT_PATH (its working tree, or ``git archive`` of ``ref``), the
+    local mirror when REPO_BACKEND=mirror, or one tarball download from
+    GitHub. Archives are read as a stream and never extracted to disk.
+    Binary, generated, vendored and oversized files are counted in
+    ``skipped`` by reason instead of being yielded.
+    """
+    checkout = os.getenv("REPO_CHECKOUT_PATH")
+    if checkout:
+        if not ref:
+            yield from _iter_directory(checkout, skipped, max_bytes)
+            return
+        with _git_archive(checkout, ref) as stream:
+            yield from _iter_tar(stream, False, skipped, max_bytes)
+        return
+
+    if os.getenv("REPO_BACKEND", "github").lower() == "mirror":
+        repo_url = os.getenv("GITHUB_REPO_URL")
+        if not repo_url:
+            raise ValueError("GITHUB_REPO_URL not configured")
+        with get_mirror(repo_url, os.getenv("GITHUB_TOKEN")).archive(ref) as stream:
+            yield from _iter_tar(stream, False, skipped, max_bytes)
+        return
+
+    with _github_tarball(ref) as stream:
+        yield from _iter_tar(stream, True, skipped, max_bytes)
+
+
+def _batches(files: Iterator[Tuple[str, bytes]]) -> Iterator[List[Tuple[str, bytes]]]:
+    batch, size = [], 0
+    for path, data in files:
+        batch.append((path, data))
+        size += len(data)
+        if size >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def run_repository_scan(
+    ref: Optional[str] = None,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_interval: float = 5.0,
+) -> Dict[str, Any]:
+    """
+    Scans every file of the repository at ``ref`` and aggregates the results per file.
+
+    Reading the archive stays on the calling thread while batches of files are
+    scanned in a process pool; at most two batches per worker are in flight,
+    so memory stays flat however large the repository is.
+
+    Args:
+        ref: Branch, tag or SHA (optional, defaults to the default branch or the checkout's working tree).
+        workers: Worker processes (defaults to REPO_SCAN_WORKERS or the CPU count); 1 scans inline.
+        progress: Called with the running totals every ``progress_interval`` seconds.
+        progress_interval: Seconds between progress reports.
+
+    Returns:
+        A dictionary with per-file "results" and the scan "totals".
+    """
+    workers = workers or int(os.getenv("REPO_SCAN_WORKERS", str(os.cpu_count() or 1)))
+    max_bytes = int(os.getenv("REPO_SCAN_MAX_FILE_BYTES", str(1024 * 1024)))
+    skipped: Counter = Counter()
+    results: List[Dict[str, Any]] = []
+    totals = {"files_scanned": 0, "bytes_scanned": 0}
+    started = time.monotonic()
+    last_report = started
+
+    def collect(batch_results: List[Dict[str, Any]], batch_bytes: int) -> None:
+        nonlocal last_report
+        results.extend(batch_results)
+        totals["files_scanned"] += len(batch_results)
+        totals["bytes_scanned"] += batch_bytes
+        now = time.monotonic()
+        if now - last_report >= progress_interval:
+            last_report = now
+            snapshot = dict(totals, files_skipped=sum(skipped.values()), elapsed_seconds=round(now - started, 1))
+            logger.info(f"Repository scan: {snapshot['files_scanned']} files scanned, {snapshot['files_skipped']} skipped")
+            if progress:
+                progress(snapshot)
+
+    batches = _batches(iter_repository_files(ref, skipped, max_bytes))
+    if workers <= 1:
+        for batch in batches:
+            collect(scan_file_batch(batch), sum(len(data) for _, data in batch))
+    else:
+        # Workers start from a fresh interpreter: forking would copy the caller's threads, locks
+        # and open connections (the server's event loop, HTTP pools) into every child
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method)) as pool:
+            pending = {}
+            for batch in batches:
+                pending[pool.submit(scan_file_batch, batch)] = sum(len(data) for _, data in batch)
+                while len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result(), pending.pop(future))
+            for future in list(pending):
+                collect(future.result(), pending.pop(future))
+
+    elapsed = time.monotonic() - started
+    results.sort(key=lambda r: r["filename"])
+    findings_by_category = Counter(f["category"] for r in results for f in r["findings"])
+    totals.update(
+        files_skipped=sum(skipped.values()),
+        skipped_by_reason=dict(skipped),
+        files_with_findings=sum(1 for r in results if r["findings"]),
+        findings_by_category=dict(findings_by_category),
+        elapsed_seconds=round(elapsed, 2),
+        files_per_second=round(totals["files_scanned"] / elapsed, 1) if elapsed > 0 else None,
+        workers=workers,
+    )
+    return {"ref": ref, "results": results, "totals": totals}
@@ -1,12 +1,20 @@
 #!/bin/bash
 
-# Start all agent services in background
-uv run uvicorn repo_agent.agent:app --host 0.0.0.0 --port 8001 &
-sleep 2
-uv run uvicorn security_agent.agent:app --host 0.0.0.0 --port 8002 &
-sleep 2
-uv run uvicorn reviewer_agent.agent:app --host 0.0.0.0 --port 8003 &
-sleep 2
+# Start all agent services in background (not needed when the Dev Manager runs them in-process)
+if [ "${AGENT_TOPOLOGY:-remote}" != "local" ]; then
+    uv run uvicorn repo_agent.agent:app --host 0.0.0.0 --port 8001 &
+    sleep 2
+    uv run uvicorn security_agent.agent:app --host 0.0.0.0 --port 8002 &
+    sleep 2
+    uv run uvicorn reviewer_agent.agent:app --host 0.0.0.0 --port 8003 &
+    sleep 2
+fi
+
+# Push webhooks are served by the Dev Manager's own service
+if [ -n "${WEBHOOK_SECRET}" ]; then
+    uv run uvicorn dev_manager_agent.agent:app --host 0.0.0.0 --port 8000 &
+    sleep 2
+fi
 
 # Start Streamlit UI (foreground)
 uv run streamlit run streamlit_ui/app.py --server.port 8501 --server.address 0.0.0.0
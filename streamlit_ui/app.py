@@ -1,19 +1,23 @@
 import streamlit as st
-import asyncio
 import sys
+import html
+import uuid
 import os
 import logging
-from typing import List, Dict, Any
+from typing import Dict, Any
 from pathlib import Path
 
-# Fix for "Event loop is closed" error in Streamlit
-import nest_asyncio
-nest_asyncio.apply()
-
 # Add parent directory to path for imports
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
+# The ADK runner lives on one background event loop per server process
+from streamlit_ui.runtime import AgentRun, get_background_loop
+from streamlit_ui.history import ChatHistory
+
+# Messages rendered per page of chat history
+CHAT_WINDOW_SIZE = int(os.getenv("CHAT_WINDOW_SIZE", "40"))
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,6 +54,77 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+
+def render_tool_message(msg: Dict[str, Any], history: ChatHistory) -> None:
+    """
+    Renders a tool call or response as a preview; the full payload is only
+    decompressed and rendered once the user expands it. Messages of a run
+    still in flight are not in the history yet and only get the preview.
+    """
+    css_class, label = ("tool-call", "🔧 <b>Tool Called:</b>") if msg["type"] == "tool_call" else ("tool-response", "📥 <b>Tool Response:</b>")
+    content = msg["content"]
+    truncated = "payload_id" in msg or len(content) > history.preview_chars
+    preview = html.escape(content[:history.preview_chars]) + (" …" if truncated else "")
+    st.markdown(f'<div class="{css_class}">{label} {preview}</div>', unsafe_allow_html=True)
+    if "payload_id" not in msg:
+        return
+    if st.toggle(f"Show full payload ({msg['size'] / 1024:.1f} KB)", key=f"payload_{msg['payload_id']}"):
+        full = history.payload(msg)
+        if full is None:
+            st.caption("The full payload was dropped to stay within the session memory limit.")
+        else:
+            st.code(full, language=None)
+
+
+def render_message(msg: Dict[str, Any], history: ChatHistory) -> None:
+    """
+    Renders one chat message (user, assistant, tool_call or tool_response).
+    """
+    if msg["type"] == "user":
+        with st.chat_message("user"):
+            st.write(msg["content"])
+    elif msg["type"] == "assistant":
+        with st.chat_message("assistant"):
+            st.markdown(msg["content"])
+    elif msg["type"] in ("tool_call", "tool_response"):
+        render_tool_message(msg, history)
+    elif msg["type"] == "status":
+        st.caption(msg["content"])
+
+
+def stream_run(run: AgentRun, container, history: ChatHistory) -> None:
+    """
+    Renders a run's messages into the container as they arrive, until it finishes.
+
+    If the user interacts with the page meanwhile, Streamlit stops this script
+    run; the agent keeps going on the background loop and the next script run
+    picks the stream up again from the start.
+    """
+    with container:
+        live = st.container()
+        draft = st.empty()
+    rendered = 0
+    shown_partial = ""
+    while True:
+        messages, partial, done = run.snapshot()
+        with live:
+            for msg in messages[rendered:]:
+                render_message(msg, history)
+        rendered = len(messages)
+        if partial != shown_partial:
+            if partial:
+                with draft.container():
+                    with st.chat_message("assistant"):
+                        st.markdown(partial + " ▌")
+            else:
+                draft.empty()
+            shown_partial = partial
+        if done:
+            draft.empty()
+            return
+        run.wait_for_update(rendered, partial)
+
+
 # ============ SIDEBAR: CONFIGURATION ============
 with st.sidebar:
     st.header("🔐 Configuration")
@@ -113,8 +188,10 @@ tab1, tab2 = st.tabs(["💬 Chat", "📚 User Guide"])
 # ============ TAB 1: CHAT INTERFACE ============
 with tab1:
     # Initialize Session State
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    if "history" not in st.session_state:
+        st.session_state.history = ChatHistory()
+        st.session_state.history_window = CHAT_WINDOW_SIZE
+    history = st.session_state.history
 
     st.subheader("🤖 Chat with Dev Manager")
 
@@ -122,24 +199,26 @@ with tab1:
         st.info("👈 Please enter all credentials in the sidebar to start chatting.")
     else:
         # Lazy import ADK modules only after credentials are set
+        from google.adk.agents.run_config import RunConfig, StreamingMode
         from google.adk.runners import Runner
-        from google.adk.sessions import InMemorySessionService
         from google.genai import types
         
         # Initialize agent only once per session
         if "agent_initialized" not in st.session_state or not st.session_state.agent_initialized:
             try:
-                from dev_manager_agent.agent import agent as dev_manager
+                from dev_manager_agent.agent import root_agent as dev_manager
+                from dev_manager_agent.session_store import get_session_service
                 
-                st.session_state.session_service = InMemorySessionService()
-                
-                async def create_session():
-                    await st.session_state.session_service.create_session(
+                # Each browser session gets its own conversation in the shared session store
+                st.session_state.session_id = uuid.uuid4().hex
+                st.session_state.session_service = get_session_service()
+                get_background_loop().run(
+                    st.session_state.session_service.create_session(
                         app_name="streamlit_app",
                         user_id="streamlit_user",
-                        session_id="main_session"
+                        session_id=st.session_state.session_id
                     )
-                asyncio.run(create_session())
+                )
                 
                 st.session_state.runner = Runner(
                     agent=dev_manager,
@@ -152,70 +231,50 @@ with tab1:
                 st.error(f"Failed to initialize agent: {e}")
                 st.stop()
         
+        active_run = st.session_state.get("active_run")
+        
         # 1. Create a scrollable container for messages
         chat_container = st.container(height=500)
         
-        # 2. Render history inside the scrollable container
+        # 2. Render the most recent messages inside the scrollable container; older ones on demand
         with chat_container:
-            for msg in st.session_state.messages:
-                if msg["type"] == "user":
-                    with st.chat_message("user"):
-                        st.write(msg["content"])
-                elif msg["type"] == "assistant":
-                    with st.chat_message("assistant"):
-                        st.markdown(msg["content"])
-                elif msg["type"] == "tool_call":
-                    st.markdown(f'<div class="tool-call">🔧 <b>Tool Called:</b> {msg["content"]}</div>', unsafe_allow_html=True)
-                elif msg["type"] == "tool_response":
-                    st.markdown(f'<div class="tool-response">📥 <b>Tool Response:</b> {msg["content"]}</div>', unsafe_allow_html=True)
+            hidden = len(history) - st.session_state.history_window
+            if hidden > 0:
+                if st.button(f"⬆ Load older messages ({hidden} hidden)", key="load_older"):
+                    st.session_state.history_window += CHAT_WINDOW_SIZE
+                    st.rerun()
+            if history.dropped:
+                st.caption(f"{history.dropped} older messages were dropped to stay within the session memory limit.")
+            for msg in history.window(st.session_state.history_window):
+                render_message(msg, history)
         
-        # 3. Keep the input at the bottom of the tab
-        if prompt := st.chat_input("Ask the Dev Manager..."):
-            # Add user message
-            st.session_state.messages.append({"type": "user", "content": prompt})
-            
-            # Run agent
-            async def run_agent(user_prompt: str) -> List[Dict[str, Any]]:
-                events = []
-                types_module = st.session_state.types
-                user_content = types_module.Content(role='user', parts=[types_module.Part(text=user_prompt)])
-                
-                async for event in st.session_state.runner.run_async(
-                    user_id="streamlit_user",
-                    session_id="main_session",
-                    new_message=user_content
-                ):
-                    events.append(event)
-                return events
-            
-            with st.spinner("Thinking..."):
-                events = asyncio.run(run_agent(prompt))
-            
-            # Process events
-            for event in events:
-                # Check for tool calls
-                if hasattr(event, 'content') and event.content:
-                    for part in event.content.parts:
-                        # Function Call
-                        if hasattr(part, 'function_call') and part.function_call:
-                            fc = part.function_call
-                            args_str = ", ".join([f"{k}={v}" for k, v in fc.args.items()]) if fc.args else ""
-                            tool_msg = f"{fc.name}({args_str})"
-                            st.session_state.messages.append({"type": "tool_call", "content": tool_msg})
-                        
-                        # Function Response
-                        if hasattr(part, 'function_response') and part.function_response:
-                            fr = part.function_response
-                            response_str = str(fr.response) if hasattr(fr, 'response') else str(fr)
-                            st.session_state.messages.append({"type": "tool_response", "content": response_str})
-                
-                # Final response
-                if event.is_final_response() and event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            st.session_state.messages.append({"type": "assistant", "content": part.text})
+        # 3. Keep the input at the bottom of the tab; it is disabled while a run is in flight
+        prompt = st.chat_input("Ask the Dev Manager...", disabled=active_run is not None)
+        if prompt:
+            history.add({"type": "user", "content": prompt})
+            st.session_state.history_window = CHAT_WINDOW_SIZE
+            types_module = st.session_state.types
+            st.session_state.active_run = AgentRun(
+                st.session_state.runner,
+                user_id="streamlit_user",
+                session_id=st.session_state.session_id,
+                new_message=types_module.Content(role="user", parts=[types_module.Part(text=prompt)]),
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            )
+            st.rerun()
+        
+        # 4. Stream the in-flight run; clicking Stop reruns the script and cancels it
+        if active_run is not None:
+            if st.button("⏹ Stop", key="cancel_run"):
+                active_run.cancel()
+            stream_run(active_run, chat_container, history)
             
-            # Rerun to refresh the chat container with new messages
+            history.extend(active_run.messages)
+            if active_run.cancelled:
+                history.add({"type": "status", "content": "⏹ Run cancelled."})
+            elif active_run.error:
+                history.add({"type": "status", "content": f"⚠️ Run failed: {active_run.error}"})
+            del st.session_state.active_run
             st.rerun()
 
 # ============ TAB 2: USER GUIDE ============
@@ -0,0 +1,89 @@
+import os
+import zlib
+import itertools
+from typing import Any, Dict, List, Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class ChatHistory:
+    """
+    Chat messages of one Streamlit session, bounded in memory.
+
+    Messages longer than ``preview_chars`` keep only a preview; the full text
+    goes to a side store, zlib compressed, and is decompressed only when the
+    user expands it. When previews (counted as UTF-8) plus compressed payloads
+    exceed ``memory_cap`` bytes, the oldest payloads are dropped first (their previews stay), then
+    the oldest messages.
+    """
+
+    def __init__(
+        self,
+        preview_chars: Optional[int] = None,
+        memory_cap: Optional[int] = None,
+    ):
+        self.preview_chars = preview_chars or _env_int("CHAT_PREVIEW_CHARS", 600)
+        self.memory_cap = memory_cap or _env_int("CHAT_MEMORY_CAP_MB", 16) * 1024 * 1024
+        self.messages: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._payloads: Dict[int, bytes] = {}
+        self._ids = itertools.count()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def add(self, msg: Dict[str, Any]) -> None:
+        """
+        Appends a message, moving a long content into the compressed store.
+        """
+        content = str(msg.get("content", ""))
+        encoded = content.encode("utf-8")
+        entry = {"type": msg["type"], "content": content, "size": len(encoded), "bytes": len(encoded)}
+        # User prompts and answers are kept whole; tool traffic is what grows
+        if msg["type"] in ("tool_call", "tool_response") and len(content) > self.preview_chars:
+            payload_id = next(self._ids)
+            compressed = zlib.compress(encoded, 6)
+            self._payloads[payload_id] = compressed
+            self._bytes += len(compressed)
+            entry["content"] = content[:self.preview_chars]
+            entry["payload_id"] = payload_id
+            entry["bytes"] = len(entry["content"].encode("utf-8"))
+        self._bytes += entry["bytes"]
+        self.messages.append(entry)
+        self._enforce_cap()
+
+    def extend(self, messages: List[Dict[str, Any]]) -> None:
+        for msg in messages:
+            self.add(msg)
+
+    def window(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Returns the most recent ``count`` messages.
+        """
+        return self.messages[-count:] if count > 0 else []
+
+    def payload(self, msg: Dict[str, Any]) -> Optional[str]:
+        """
+        Returns the full content of a truncated message, or None if it was evicted.
+        """
+        compressed = self._payloads.get(msg.get("payload_id"))
+        if compressed is None:
+            return None
+        return zlib.decompress(compressed).decode("utf-8")
+
+    def _enforce_cap(self) -> None:
+        # Oldest payloads go first, so recent results stay expandable
+        while self._bytes > self.memory_cap and len(self._payloads) > 1:
+            payload_id = next(iter(self._payloads))
+            self._bytes -= len(self._payloads.pop(payload_id))
+        while self._bytes > self.memory_cap and len(self.messages) > 1:
+            msg = self.messages.pop(0)
+            self._bytes -= msg["bytes"] + len(self._payloads.pop(msg.get("payload_id"), b""))
+            self.dropped += 1
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """
+    One long-lived asyncio event loop on a daemon thread.
+
+    Streamlit re-runs the script on every interaction; running the ADK runner
+    here instead of in a fresh ``asyncio.run`` keeps HTTP clients, A2A
+    connections and sessions bound to a single loop for the life of the server.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="adk-event-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        Schedules a coroutine on the loop and returns a thread-safe future.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        Runs a coroutine on the loop and waits for its result.
+        """
+        return self.submit(coro).result(timeout)
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """
+    Returns the loop shared by every Streamlit session in this server process.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
+
+
+def event_to_messages(event) -> List[Dict[str, Any]]:
+    """
+    Converts one ADK event into chat messages (tool_call, tool_response, assistant).
+    """
+    messages = []
+    if not getattr(event, "content", None) or not event.content.parts:
+        return messages
+    for part in event.content.parts:
+        if getattr(part, "function_call", None):
+            fc = part.function_call
+            args_str = ", ".join([f"{k}={v}" for k, v in fc.args.items()]) if fc.args else ""
+            messages.append({"type": "tool_call", "content": f"{fc.name}({args_str})"})
+        if getattr(part, "function_response", None):
+            fr = part.function_response
+            response_str = str(fr.response) if hasattr(fr, "response") else str(fr)
+            messages.append({"type": "tool_response", "content": response_str})
+    if event.is_final_response():
+        for part in event.content.parts:
+            if getattr(part, "text", None):
+                messages.append({"type": "assistant", "content": part.text})
+    return messages
+
+
+class AgentRun:
+    """
+    One agent invocation running on the background loop.
+
+    Messages are appended as events arrive, so the UI can render them while
+    the run is still going; streamed text chunks collect in ``partial_text``
+    until the final response replaces them. ``cancel()`` stops the run.
+    """
+
+    def __init__(self, runner, user_id: str, session_id: str, new_message, run_config=None):
+        self.messages: List[Dict[str, Any]] = []
+        self.partial_text = ""
+        self.cancelled = False
+        self.error: Optional[str] = None
+        self._changed = threading.Condition()
+        self._done = False
+        self._future = get_background_loop().submit(
+            self._consume(runner, user_id, session_id, new_message, run_config)
+        )
+        # Also covers a cancel that lands before the coroutine starts
+        self._future.add_done_callback(lambda _: self._finish())
+
+    async def _consume(self, runner, user_id, session_id, new_message, run_config) -> None:
+        try:
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=new_message, run_config=run_config
+            ):
+                if getattr(event, "partial", False):
+                    text = "".join(p.text for p in (event.content.parts if event.content else []) if getattr(p, "text", None))
+                    self._update(partial_text=self.partial_text + text)
+                else:
+                    messages = event_to_messages(event)
+                    final = any(m["type"] == "assistant" for m in messages)
+                    self._update(messages=messages, partial_text="" if final else self.partial_text)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            logger.exception("Agent run failed")
+            self.error = str(e)
+
+    def _update(self, messages: Optional[List[Dict[str, Any]]] = None, partial_text: Optional[str] = None) -> None:
+        with self._changed:
+            if messages:
+                self.messages.extend(messages)
+            if partial_text is not None:
+                self.partial_text = partial_text
+            self._changed.notify_all()
+
+    def _finish(self) -> None:
+        with self._changed:
+            if self._future.cancelled():
+                self.cancelled = True
+            self._done = True
+            self._changed.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def cancel(self) -> None:
+        """
+        Cancels the run; events already received are kept.
+        """
+        self._future.cancel()
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], str, bool]:
+        """
+        Returns (messages so far, current partial text, done).
+        """
+        with self._changed:
+            return list(self.messages), self.partial_text, self._done
+
+    def wait_for_update(self, seen_messages: int, seen_partial: str, timeout: float = 0.25) -> None:
+        """
+        Blocks until something new arrives or the run ends (at most ``timeout`` seconds).
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self._done or len(self.messages) != seen_messages or self.partial_text != seen_partial,
+                timeout=timeout,
+            )
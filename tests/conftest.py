@@ -0,0 +1,4 @@
+import os
+
+# The agent modules read this when imported; tests never call out to Gemini
+os.environ.setdefault("GOOGLE_API_KEY", "test")
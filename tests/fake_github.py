@@ -0,0 +1,87 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# (status, headers, body) returned for a request; body is JSON-encoded unless it is None
+Response = Tuple[int, Dict[str, str], Any]
+
+
+class FakeGitHub:
+    """
+    Minimal GitHub REST API on localhost for tests.
+
+    Routes map "METHOD /path" to a handler taking (query, headers) and
+    returning (status, headers, body). Every request is recorded, and
+    queued one-off responses (``fail_next``) are served before the route.
+    """
+
+    def __init__(self, remaining: int = 5000):
+        self.routes: Dict[str, Callable[[Dict[str, List[str]], Dict[str, str]], Response]] = {}
+        self.requests: List[str] = []
+        self.remaining = remaining
+        self._failures: Dict[str, List[Response]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeGitHub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def route(self, key: str, handler: Callable[[Dict[str, List[str]], Dict[str, str]], Response]) -> None:
+        self.routes[key] = handler
+
+    def fail_next(self, key: str, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        self._failures.setdefault(key, []).append((status, headers or {}, body))
+
+    def count(self, key: str) -> int:
+        return sum(1 for request in self.requests if request == key)
+
+    def _respond(self, method: str, raw_path: str, headers: Dict[str, str]) -> Response:
+        parsed = urlparse(raw_path)
+        key = f"{method} {parsed.path}"
+        with self._lock:
+            self.requests.append(key)
+            self.remaining -= 1
+            failures = self._failures.get(key)
+            if failures:
+                return failures.pop(0)
+        handler = self.routes.get(key)
+        if handler is None:
+            return 404, {}, {"message": "Not Found"}
+        return handler(parse_qs(parsed.query), headers)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, headers, body = fake._respond("GET", self.path, {k.lower(): v for k, v in self.headers.items()})
+                payload = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("X-RateLimit-Limit", "5000")
+                self.send_header("X-RateLimit-Remaining", str(max(fake.remaining, 0)))
+                self.send_header("X-RateLimit-Reset", "4102444800")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
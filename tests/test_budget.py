@@ -0,0 +1,50 @@
+from repo_agent.budget import budget_files, estimate_tokens
+
+SHARED = [f"+    value_{i} = compute_something_long(argument_{i}, other_argument_{i})" for i in range(6)]
+
+
+def patch(lines, start=1):
+    return f"@@ -{start},0 +{start},{len(lines)} @@\n" + "\n".join(lines)
+
+
+def test_duplicate_hunks_point_at_a_selected_file():
+    files = [
+        # Ranked first (auth), too large for the budget: deferred
+        {"filename": "auth/tokens.py", "patch": patch(SHARED + [f"+    token_{i} = issue({i})" for i in range(200)])},
+        {"filename": "app/a.py", "patch": patch(SHARED)},
+        {"filename": "app/b.py", "patch": patch(SHARED, start=40)},
+    ]
+    result = budget_files(files, max_tokens=400, commit_sha="abc")
+
+    assert [f["filename"] for f in result["deferred"]] == ["auth/tokens.py"]
+    selected = {f["filename"]: f for f in result["files"]}
+    assert set(selected) == {"app/a.py", "app/b.py"}
+    # The first selected copy keeps the hunk, the second refers to it
+    assert "duplicate_hunks" not in selected["app/a.py"]
+    assert selected["app/b.py"]["patch"] == ""
+    assert selected["app/b.py"]["duplicate_hunks"] == [{"hunk": "@@ -40,0 +40,6 @@", "same_as": "app/a.py"}]
+    assert result["budget"]["stripped"]["duplicate_hunks"] == 1
+
+
+def test_small_repeated_hunks_keep_their_attribution():
+    small = ["+import logging"]
+    files = [{"filename": name, "patch": patch(small)} for name in ("a.py", "b.py", "c.py")]
+    result = budget_files(files, max_tokens=1000)
+
+    assert all(f["patch"] for f in result["files"])
+    assert all("duplicate_hunks" not in f for f in result["files"])
+    assert result["budget"]["stripped"]["duplicate_hunks"] == 0
+
+
+def test_files_are_ranked_by_risk_then_size_and_cut_at_the_budget():
+    files = [
+        {"filename": "docs/readme.md", "patch": patch(["+hello"])},
+        {"filename": "requirements.txt", "patch": patch(["+requests==2.0"])},
+        {"filename": "db/queries.py", "patch": patch(["+cursor.execute('SELECT * FROM t WHERE id = ' + id)"])},
+    ]
+    budget = estimate_tokens(files[1]["patch"]) + estimate_tokens(files[2]["patch"])
+    result = budget_files(files, max_tokens=budget, commit_sha="abc")
+
+    assert [f["filename"] for f in result["files"]] == ["db/queries.py", "requirements.txt"]
+    assert result["deferred"][0]["filename"] == "docs/readme.md"
+    assert "get_file_patch(commit_sha='abc'" in result["deferred"][0]["fetch"]
@@ -0,0 +1,31 @@
+from streamlit_ui.history import ChatHistory
+
+
+def test_memory_is_counted_in_utf8_bytes():
+    history = ChatHistory(preview_chars=100, memory_cap=1024 * 1024)
+    history.add({"type": "user", "content": "é" * 50})
+
+    assert history.memory_bytes == 100
+    assert history.messages[0]["size"] == 100
+
+
+def test_cap_counts_multibyte_previews_and_evicts_oldest_first():
+    history = ChatHistory(preview_chars=1000, memory_cap=1000)
+    for _ in range(3):
+        history.add({"type": "assistant", "content": "€" * 200})
+
+    # Each message is 600 bytes although only 200 characters
+    assert len(history) == 1
+    assert history.dropped == 2
+    assert history.memory_bytes == 600
+
+
+def test_long_tool_output_keeps_a_preview_and_a_compressed_payload():
+    history = ChatHistory(preview_chars=10, memory_cap=1024 * 1024)
+    content = "ü" * 5000
+    history.add({"type": "tool_response", "content": content})
+    msg = history.messages[0]
+
+    assert msg["content"] == "ü" * 10
+    assert history.payload(msg) == content
+    assert history.memory_bytes < len(content)
@@ -0,0 +1,46 @@
+import hashlib
+
+from security_agent.entropy import detect_high_entropy
+
+SHA1 = hashlib.sha1(b"commit").hexdigest()
+SHA256 = hashlib.sha256(b"file").hexdigest()
+HEX32 = hashlib.md5(b"key").hexdigest()
+
+
+def rules(content, filename=None):
+    return [(f["line"], f["charset"]) for f in detect_high_entropy(content, filename)]
+
+
+def test_commit_and_file_hashes_are_not_flagged():
+    content = "\n".join([
+        f"revision {SHA1}",
+        f"    '{SHA256}',",
+        f"see https://github.com/acme/app/commit/{SHA1}",
+        f"expected = \"{HEX32}\"",
+    ])
+    assert rules(content) == []
+
+
+def test_sha_sized_hex_is_allowlisted_even_after_a_key_name():
+    assert rules(f"key_id = '{SHA1}'") == []
+
+
+def test_hex_credential_next_to_a_key_name_is_flagged():
+    assert rules(f"WEBHOOK_SECRET = '{HEX32}'") == [(1, "hex")]
+    assert rules(f"headers = {{'Authorization': 'Bearer {HEX32}{HEX32[:16]}'}}") == [(1, "hex")]
+
+
+def test_mixed_case_random_token_is_flagged_without_context():
+    assert rules("value = 'q8Zr2LxT0vNw7KpB4sYd9MhC'") == [(1, "alphanumeric")]
+
+
+def test_lockfiles_are_skipped():
+    assert rules("value = 'q8Zr2LxT0vNw7KpB4sYd9MhC'", "frontend/package-lock.json") == []
+
+
+def test_line_and_column_count_characters_across_lines():
+    token = "q8Zr2LxT0vNw7KpB4sYd9MhC"
+    content = f"# résumé ✓\n\nfirst = '{token}'\nsecond = 'ünï', '{token}'"
+    findings = detect_high_entropy(content)
+
+    assert [(f["line"], f["column"]) for f in findings] == [(3, 10), (4, 18)]
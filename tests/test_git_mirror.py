@@ -0,0 +1,144 @@
+import base64
+import subprocess
+
+import pytest
+
+from common import git_mirror
+from common.git_mirror import GitError, GitMirror
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+def commit_file(repo, path, content, message):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(content)
+    git(repo, "add", "-A")
+    git(repo, "commit", "--quiet", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = tmp_path / "origin"
+    repo.mkdir()
+    git(repo, "init", "--quiet", "-b", "main")
+    commit_file(repo, "app.py", "def main():\n    return 1\n", "Initial commit")
+    return repo
+
+
+@pytest.fixture
+def mirror(origin, tmp_path):
+    return GitMirror(str(origin), str(tmp_path / "mirror.git"), fetch_interval=3600)
+
+
+def test_recent_commits_and_head(origin, mirror):
+    sha = commit_file(origin, "app.py", "def main():\n    return 2\n", "Change return value")
+
+    commits = mirror.recent_commits(5)
+    assert [c["message"] for c in commits] == ["Change return value", "Initial commit"]
+    assert commits[0]["sha"] == sha
+    assert commits[0]["author"] == "Test"
+    assert mirror.head_sha() == ("main", sha)
+
+
+def test_commit_changes_matches_github_shape(origin, mirror):
+    git(origin, "mv", "app.py", "main.py")
+    (origin / "README.md").write_text("hello\n")
+    git(origin, "add", "-A")
+    git(origin, "commit", "--quiet", "-m", "Rename and add")
+    (origin / "main.py").write_text("def main():\n    return 3\n")
+    git(origin, "rm", "--quiet", "README.md")
+    git(origin, "commit", "--quiet", "-am", "Edit and remove")
+
+    first = mirror.commit_changes("HEAD~1")
+    files = {f["filename"]: f for f in first["files"]}
+    assert files["main.py"]["status"] == "renamed"
+    assert files["README.md"]["status"] == "added"
+    assert files["README.md"]["additions"] == 1
+    assert files["README.md"]["patch"] == "@@ -0,0 +1 @@\n+hello"
+
+    second = mirror.commit_changes("HEAD")
+    files = {f["filename"]: f for f in second["files"]}
+    assert files["README.md"]["status"] == "removed"
+    assert files["main.py"]["status"] == "modified"
+    assert (files["main.py"]["additions"], files["main.py"]["deletions"]) == (1, 1)
+    assert second["stats"] == {"total": 3, "additions": 1, "deletions": 2}
+    assert second["message"] == "Edit and remove"
+
+
+def test_root_commit_diffs_against_empty_tree(mirror):
+    changes = mirror.commit_changes("HEAD")
+    files = list(changes["files"])
+    assert [f["filename"] for f in files] == ["app.py"]
+    assert files[0]["status"] == "added"
+
+
+def test_unknown_commit_triggers_one_fetch(origin, mirror):
+    mirror.sync()
+    sha = commit_file(origin, "new.py", "x = 1\n", "Pushed later")
+
+    # Inside the fetch interval, but an unknown SHA forces a fetch
+    assert mirror.file_content("new.py", sha) == "x = 1\n"
+    with pytest.raises(GitError):
+        mirror.commit_changes("0" * 40)
+
+
+def test_compare_returns_net_diff(origin, mirror):
+    base = git(origin, "rev-parse", "HEAD")
+    commit_file(origin, "app.py", "def main():\n    return 2\n", "Two")
+    commit_file(origin, "app.py", "def main():\n    return 3\n", "Three")
+
+    result = mirror.compare(base, "main")
+    assert result["ahead_by"] == 2
+    assert [c["message"] for c in result["commits"]] == ["Two", "Three"]
+    files = list(result["files"])
+    assert len(files) == 1
+    assert "+    return 3" in files[0]["patch"]
+    assert "return 2" not in files[0]["patch"]
+
+
+def test_token_is_passed_through_the_environment(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_run(args, **kwargs):
+        calls.append((args, kwargs.get("env")))
+        return subprocess.CompletedProcess(args, 0, b"", b"")
+
+    monkeypatch.setattr(git_mirror.subprocess, "run", fake_run)
+    monkeypatch.delenv("GIT_CONFIG_COUNT", raising=False)
+    mirror = GitMirror("https://github.com/acme/app.git", str(tmp_path / "m.git"), fetch_interval=0, token="s3cret")
+
+    mirror.sync()
+    (tmp_path / "m.git").mkdir()
+    mirror.sync(force=True)
+
+    assert [args[1:3] for args, _ in calls] == [["clone", "--mirror"], ["--git-dir", str(tmp_path / "m.git")]]
+    credentials = base64.b64encode(b"x-access-token:s3cret").decode()
+    for args, env in calls:
+        assert not any("s3cret" in arg or credentials in arg for arg in args)
+        assert env["GIT_CONFIG_COUNT"] == "1"
+        assert env["GIT_CONFIG_KEY_0"] == "http.extraHeader"
+        assert env["GIT_CONFIG_VALUE_0"] == f"Authorization: Basic {credentials}"
+
+
+def test_config_env_appends_to_existing_entries(monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", "core.askPass")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "")
+    env = git_mirror._config_env({"http.extraHeader": "X: y"})
+    assert env["GIT_CONFIG_COUNT"] == "2"
+    assert env["GIT_CONFIG_KEY_0"] == "core.askPass"
+    assert (env["GIT_CONFIG_KEY_1"], env["GIT_CONFIG_VALUE_1"]) == ("http.extraHeader", "X: y")
+
+
+def test_git_reads_the_injected_config(tmp_path, monkeypatch):
+    monkeypatch.delenv("GIT_CONFIG_COUNT", raising=False)
+    env = git_mirror._config_env({"http.extraHeader": "Authorization: Basic abc"})
+    output = subprocess.run(["git", "config", "--get", "http.extraHeader"], env=env, capture_output=True, text=True)
+    assert output.stdout.strip() == "Authorization: Basic abc"
@@ -0,0 +1,172 @@
+import pytest
+from github import GithubException, RateLimitExceededException
+
+from repo_agent import github_pool, object_cache, scheduler
+from repo_agent.github_pool import GithubClientPool
+from repo_agent.scheduler import RateLimitScheduler
+from tests.fake_github import FakeGitHub
+
+REPO = {"full_name": "acme/app", "name": "app", "url": None}
+
+
+def commit_json(index):
+    return {
+        "sha": f"{index:040x}",
+        "commit": {"author": {"name": "dev", "date": "2024-01-01T00:00:00Z"}, "message": f"Commit {index}"},
+    }
+
+
+@pytest.fixture
+def fake():
+    server = FakeGitHub().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def fast_scheduler(monkeypatch):
+    instance = RateLimitScheduler(rate=1000, burst=1000, reserve=0, max_retries=3, base_delay=0.01, max_delay=0.05)
+    monkeypatch.setattr(scheduler, "_scheduler", instance)
+    return instance
+
+
+@pytest.fixture
+def repo_env(fake, fast_scheduler, monkeypatch, tmp_path):
+    fake.route("GET /repos/acme/app", lambda query, headers: (200, {}, dict(REPO, url=f"{fake.base_url}/repos/acme/app")))
+    monkeypatch.setenv("GITHUB_TOKEN", "token")
+    monkeypatch.setenv("GITHUB_REPO_URL", "https://github.com/acme/app")
+    monkeypatch.setenv("GITHUB_API_URL", fake.base_url)
+    monkeypatch.setenv("REPO_BACKEND", "github")
+    monkeypatch.setenv("REPO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(github_pool, "_github_pool", GithubClientPool())
+    monkeypatch.setattr(object_cache, "_object_cache", None)
+    return fake
+
+
+def test_rate_limited_call_is_retried_once_by_the_scheduler_only(repo_env, fast_scheduler):
+    repo_env.fail_next("GET /repos/acme/app", 403, {"message": "API rate limit exceeded for user."}, {"Retry-After": "0"})
+    repo = github_pool.get_github_pool().get_repo("token", "acme/app", repo_env.base_url)
+
+    assert repo.full_name == "acme/app"
+    # One failed attempt and one retry: PyGithub itself did not retry underneath
+    assert repo_env.count("GET /repos/acme/app") == 2
+    stats = fast_scheduler.stats()
+    assert stats["retries"] == 1
+    assert stats["requests"] == 2
+    assert stats["running"] == 0
+
+
+def test_permission_errors_are_not_retried(repo_env, fast_scheduler):
+    repo_env.fail_next("GET /repos/acme/app", 403, {"message": "Resource not accessible by integration"})
+    with pytest.raises(GithubException):
+        github_pool.get_github_pool().get_repo("token", "acme/app", repo_env.base_url)
+    assert repo_env.count("GET /repos/acme/app") == 1
+    assert fast_scheduler.stats()["failures"] == 1
+
+
+def test_every_page_takes_a_token(repo_env, fast_scheduler):
+    commits = [commit_json(i) for i in range(150)]
+
+    def list_commits(query, headers):
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        start = (page - 1) * per_page
+        link = {}
+        if start + per_page < len(commits):
+            link = {"Link": f'<{repo_env.base_url}/repos/acme/app/commits?per_page={per_page}&page={page + 1}>; rel="next"'}
+        return 200, link, commits[start:start + per_page]
+
+    repo_env.route("GET /repos/acme/app/commits", list_commits)
+    from repo_agent.agent import fetch_recent_commits
+
+    result = fetch_recent_commits(120)
+    assert len(result) == 120
+    pages = repo_env.count("GET /repos/acme/app/commits")
+    assert pages > 1
+    # Repository lookup plus one token per page, not one for the whole paginated call
+    assert fast_scheduler.stats()["requests"] == len(repo_env.requests)
+
+
+def test_unchanged_commit_list_is_served_from_the_etag_cache(repo_env, fast_scheduler):
+    def list_commits(query, headers):
+        if headers.get("if-none-match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, None
+        return 200, {"ETag": '"v1"'}, [commit_json(1), commit_json(2)]
+
+    repo_env.route("GET /repos/acme/app/commits", list_commits)
+    from repo_agent.agent import fetch_recent_commits
+
+    first = fetch_recent_commits(2)
+    second = fetch_recent_commits(2)
+    assert first == second
+    assert [c["message"] for c in first] == ["Commit 1", "Commit 2"]
+    assert repo_env.count("GET /repos/acme/app/commits") == 2
+    # The 304 gave its token back
+    assert fast_scheduler.stats()["not_modified"] == 1
+
+
+def test_credit_returns_a_token_up_to_the_burst():
+    instance = RateLimitScheduler(rate=0.001, burst=2)
+    instance.call(None, lambda: None)
+    instance.call(None, lambda: None)
+    instance.credit()
+    assert instance.stats()["tokens"] == pytest.approx(1, abs=0.01)
+    instance.credit()
+    instance.credit()
+    assert instance.stats()["tokens"] == pytest.approx(2, abs=0.01)
+
+
+def test_running_excludes_calls_that_are_backing_off(monkeypatch):
+    instance = RateLimitScheduler(rate=1000, burst=1000, max_retries=2, base_delay=0.01)
+    observed = []
+    monkeypatch.setattr(scheduler.time, "sleep", lambda delay: observed.append(instance.stats()["running"]))
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitExceededException(429, {"message": "rate limit"}, {})
+        return "ok"
+
+    assert instance.call(None, flaky) == "ok"
+    assert observed == [0, 0]
+    assert instance.stats()["retries"] == 2
+
+
+def test_identical_calls_in_flight_are_merged():
+    import threading
+
+    instance = RateLimitScheduler(rate=1000, burst=1000)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(instance.call("same", slow))) for _ in range(4)]
+    threads[0].start()
+    while not calls:
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while instance.stats()["coalesced"] < 3:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1, 1, 1, 1]
+    assert instance.stats()["coalesced"] == 3
+
+
+def test_instrument_warns_when_the_requester_hook_is_missing(caplog):
+    class Requester:
+        pass
+
+    requester = Requester()
+    with caplog.at_level("WARNING", logger=scheduler.__name__):
+        RateLimitScheduler().instrument(requester)
+    assert "__deferRequest" in caplog.text
+    assert not hasattr(requester, "_Requester__deferRequest")
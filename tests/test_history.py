@@ -0,0 +1,49 @@
+import asyncio
+
+from dev_manager_agent.history import MetricsHistory
+
+REPO = "acme/app"
+
+
+def file_row(name, additions, deletions):
+    return {"filename": name, "status": "modified", "additions": additions, "deletions": deletions,
+            "loc": None, "complexity": None, "findings": 0, "review_issues": 0}
+
+
+class PagedWorkers:
+    """Two diff pages per commit, but only the first is read (max_pages=1)."""
+
+    async def recent_commits(self, limit):
+        return [{"sha": "a" * 40, "author": "dev", "date": "2024-03-04T10:00:00Z", "message": "Big change"}]
+
+    async def commit_changes(self, sha, cursor=None):
+        return {"files": [{"filename": "README.md", "status": "modified", "additions": 3, "deletions": 1}],
+                "stats": {"additions": 500, "deletions": 40, "total": 540}, "next_cursor": "page2"}
+
+    async def scan_diff(self, files):
+        return {"findings": []}
+
+    async def review_diff(self, files):
+        return {"issues": []}
+
+
+def test_commit_totals_come_from_commit_stats_not_the_paged_files(tmp_path):
+    history = MetricsHistory(str(tmp_path / "history.db"))
+    result = asyncio.run(history.ingest(PagedWorkers(), REPO, max_pages=1))
+    assert result["ingested"] == 1
+
+    point = history.trend(REPO, bucket="commit")["points"][0]
+    assert (point["additions"], point["deletions"]) == (500, 40)
+    assert history.churn(REPO)["files"][0]["churn"] == 4
+
+
+def test_trend_buckets_are_iso_weeks_and_calendar_months(tmp_path):
+    history = MetricsHistory(str(tmp_path / "history.db"))
+    # Sunday 2024-03-03, Monday 2024-03-04, Sunday 2024-03-31 and Monday 2024-04-01
+    for index, date in enumerate(["2024-03-03T12:00:00Z", "2024-03-04T00:30:00Z", "2024-03-31T23:00:00Z", "2024-04-01T08:00:00Z"]):
+        history.record(REPO, {"sha": f"{index:040x}", "date": date}, [file_row("app.py", 1, 0)])
+
+    weeks = history.trend(REPO, bucket="week")["points"]
+    assert [(p["start"][:10], p["commits"]) for p in weeks] == [("2024-02-26", 1), ("2024-03-04", 1), ("2024-03-25", 1), ("2024-04-01", 1)]
+    months = history.trend(REPO, bucket="month")["points"]
+    assert [(p["start"][:10], p["commits"]) for p in months] == [("2024-03-01", 3), ("2024-04-01", 1)]
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from dev_manager_agent import pipeline
+from dev_manager_agent.pipeline import ACTIVITY_STATE_KEY, ActivityCollectorAgent, requested_commit_count
+
+
+def prompt(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Generate a sprint status report based on the last 5 commits.", 5),
+    ("Summarize the 3 most recent commits", 3),
+    ("latest 20 commits please", 20),
+    ("What changed in 1 commit?", 1),
+    ("Generate an activity report", None),
+    ("Report on the last 0 commits", None),
+])
+def test_requested_commit_count(text, expected):
+    assert requested_commit_count(prompt(text)) == expected
+
+
+class FakeWorkers:
+    def __init__(self):
+        self.limits = []
+
+    async def recent_commits(self, limit):
+        self.limits.append(limit)
+        return []
+
+
+@pytest.mark.parametrize("text, window", [
+    ("Report on the last 5 commits", 5),
+    ("Report on the last 50 commits", 10),
+    ("Generate an activity report", 10),
+])
+def test_the_collector_uses_the_prompted_count_capped_by_commit_limit(monkeypatch, text, window):
+    workers = FakeWorkers()
+    monkeypatch.setattr(pipeline, "RemoteWorkers", lambda semaphore, timeout: workers)
+    collector = ActivityCollectorAgent(name="collector", commit_limit=10)
+    ctx = SimpleNamespace(user_content=prompt(text), invocation_id="inv", branch=None)
+
+    async def run():
+        return [event async for event in collector._run_async_impl(ctx)]
+
+    events = asyncio.run(run())
+    assert workers.limits == [window]
+    assert json.loads(events[0].actions.state_delta[ACTIVITY_STATE_KEY])["commit_window"] == window
@@ -0,0 +1,170 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from dev_manager_agent.replicas import ReplicaPool, ReplicaTransport
+
+
+class Backend:
+    """
+    A local HTTP server answering every GET with ``status`` and its own name.
+    """
+
+    def __init__(self, name, status=200):
+        self.name = name
+        self.status = status
+        self.hits = 0
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                backend.hits += 1
+                body = backend.name.encode()
+                self.send_response(backend.status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def backends():
+    started = []
+
+    def start(name, status=200):
+        backend = Backend(name, status)
+        started.append(backend)
+        return backend
+
+    yield start
+    for backend in started:
+        backend.stop()
+
+
+async def get(pool, path="/ping"):
+    async with httpx.AsyncClient(transport=ReplicaTransport(pool), base_url="http://agent") as client:
+        return await client.get(path)
+
+
+def test_connection_failures_fail_over_and_eject(backends):
+    live = backends("live")
+    dead = closed_port_url()
+    pool = ReplicaPool("worker", [dead, live.url], eject_after=2, eject_seconds=60, health_interval=3600)
+    dead_replica = pool.replicas[0]
+
+    async def run():
+        responses = [await get(pool) for _ in range(4)]
+        await pool.aclose()
+        return responses
+
+    responses = asyncio.run(run())
+    # Every request lands on the live replica: the dead one is retried elsewhere, then ejected
+    assert [r.text for r in responses] == ["live"] * 4
+    assert live.hits == 4
+    assert dead_replica.failures == 2
+    stats = {r["url"]: r for r in pool.stats()["replicas"]}
+    assert stats[dead]["ejected"] is True
+    assert stats[dead]["requests"] == 2
+    assert all(r["outstanding"] == 0 for r in stats.values())
+
+
+def test_server_errors_count_towards_ejection_but_are_not_retried(backends):
+    broken = backends("broken", status=503)
+    pool = ReplicaPool("worker", [broken.url], eject_after=2, eject_seconds=60, health_interval=3600)
+
+    async def run():
+        statuses = [(await get(pool)).status_code for _ in range(2)]
+        await pool.aclose()
+        return statuses
+
+    assert asyncio.run(run()) == [503, 503]
+    assert broken.hits == 2
+    assert pool.stats()["replicas"][0]["ejected"] is True
+
+
+def test_health_check_reinstates_a_recovered_replica(backends):
+    flaky = backends("flaky", status=500)
+    pool = ReplicaPool("worker", [flaky.url], eject_after=1, eject_seconds=60)
+
+    async def run():
+        await get(pool)
+        ejected = pool.stats()["replicas"][0]["ejected"]
+        flaky.status = 200
+        await pool.check_health()
+        await pool.aclose()
+        return ejected
+
+    assert asyncio.run(run()) is True
+    assert pool.stats()["replicas"][0]["ejected"] is False
+    assert pool.replicas[0].failures == 0
+
+
+def test_background_health_probes_are_tracked_until_done(backends):
+    flaky = backends("flaky", status=500)
+    pool = ReplicaPool("worker", [flaky.url], eject_after=1, eject_seconds=60, health_interval=0)
+
+    async def run():
+        await get(pool)
+        flaky.status = 200
+        pool.maybe_check_health()
+        tracked = len(pool._health_tasks)
+        await asyncio.gather(*pool._health_tasks)
+        await asyncio.sleep(0)
+        await pool.aclose()
+        return tracked
+
+    assert asyncio.run(run()) == 1
+    assert pool._health_tasks == set()
+    assert pool.stats()["replicas"][0]["ejected"] is False
+
+
+def test_all_replicas_down_raises_after_trying_each():
+    pool = ReplicaPool("worker", [closed_port_url(), closed_port_url()], eject_after=5, health_interval=3600)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(get(pool))
+    assert [r.requests for r in pool.replicas] == [1, 1]
+
+
+def test_each_event_loop_gets_its_own_connection_pool(backends):
+    live = backends("live")
+    pool = ReplicaPool("worker", [live.url])
+    replica = pool.replicas[0]
+    transports = []
+
+    async def run():
+        response = await get(pool)
+        transports.append(replica.transport())
+        return response.text
+
+    # Two separate loops, as with asyncio.run in the CLI and the server's own loop
+    assert asyncio.run(run()) == "live"
+    assert asyncio.run(run()) == "live"
+    assert transports[0] is not transports[1]
+
+    async def same_loop():
+        return replica.transport() is replica.transport()
+
+    assert asyncio.run(same_loop())
@@ -0,0 +1,64 @@
+import subprocess
+
+import pytest
+
+from security_agent.agent import RepositoryScanRequest, scan_repository_endpoint
+from security_agent.repo_scan import run_repository_scan
+
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    repo = tmp_path / "checkout"
+    (repo / "src").mkdir(parents=True)
+    for i in range(12):
+        (repo / "src" / f"clean_{i:02}.py").write_text(f"def f{i}(x):\n    return x + {i}\n")
+    for i in range(5):
+        (repo / "src" / f"risky_{i}.py").write_text(f"def g{i}(data):\n    return eval(data)\n")
+    (repo / "node_modules").mkdir()
+    (repo / "node_modules" / "lib.js").write_text("eval(x)\n")
+    (repo / "logo.png").write_bytes(b"\x89PNG\0\0binary")
+    subprocess.run(["git", "init", "--quiet", "-b", "main", str(repo)], check=True)
+    subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=test@example.com", "add", "-A"], check=True
+    )
+    subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=test@example.com",
+         "commit", "--quiet", "-m", "Initial commit"],
+        check=True,
+    )
+    monkeypatch.setenv("REPO_CHECKOUT_PATH", str(repo))
+    return repo
+
+
+@pytest.mark.parametrize("ref", [None, "HEAD"])
+def test_scan_in_worker_processes_matches_inline_scan(checkout, ref):
+    inline = run_repository_scan(ref, workers=1)
+    pooled = run_repository_scan(ref, workers=2)
+
+    assert pooled["results"] == inline["results"]
+    assert pooled["totals"]["files_scanned"] == 17
+    assert pooled["totals"]["files_with_findings"] == 5
+    assert pooled["totals"]["skipped_by_reason"]["vendored"] >= 1
+    assert all("quality" in r for r in pooled["results"])
+
+
+def test_endpoint_pages_through_files_with_findings(checkout, monkeypatch):
+    monkeypatch.setenv("REPO_SCAN_WORKERS", "1")
+    first = scan_repository_endpoint(RepositoryScanRequest(ref="HEAD", limit=2))
+    assert [r["filename"] for r in first["results"]] == ["src/risky_0.py", "src/risky_1.py"]
+    assert first["total_results"] == 5
+    assert first["next_offset"] == 2
+    assert first["totals"]["files_scanned"] == 17
+
+    last = scan_repository_endpoint(RepositoryScanRequest(ref="HEAD", offset=4, limit=2))
+    assert [r["filename"] for r in last["results"]] == ["src/risky_4.py"]
+    assert last["next_offset"] is None
+
+
+def test_endpoint_can_list_every_file(checkout, monkeypatch):
+    monkeypatch.setenv("REPO_SCAN_WORKERS", "1")
+    monkeypatch.setenv("REPO_SCAN_MAX_RESULTS", "10")
+    page = scan_repository_endpoint(RepositoryScanRequest(ref="HEAD", only_findings=False))
+    assert len(page["results"]) == 10
+    assert page["total_results"] == 17
+    assert page["next_offset"] == 10
@@ -0,0 +1,89 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+
+from dev_manager_agent.report_cache import (
+    DEFAULT_REPORT_PATTERN,
+    ReportCacheCallbacks,
+    TTLCache,
+    normalize_prompt,
+)
+
+
+@pytest.mark.parametrize("prompt", [
+    "Status report for the last 5 commits",
+    "Generate a sprint status report based on the last 5 commits.",
+    "Generate a status report for the last 5 commits",
+    "Give me an activity report.",
+    "what's new",
+    "Can you write a weekly status update please?",
+    "Summarize the recent changes",
+])
+def test_activity_report_prompts_are_cached(prompt):
+    assert re.fullmatch(DEFAULT_REPORT_PATTERN, normalize_prompt(prompt))
+
+
+@pytest.mark.parametrize("prompt", [
+    "Summarize that file",
+    "What's the status of this PR?",
+    "Report the bug you found in auth.py",
+    "Give me a summary of the function above",
+    "Is the status report you wrote earlier accurate?",
+])
+def test_conversation_dependent_prompts_are_not_cached(prompt):
+    assert not re.fullmatch(DEFAULT_REPORT_PATTERN, normalize_prompt(prompt))
+
+
+def context(invocation_id, prompt, events=()):
+    return SimpleNamespace(
+        invocation_id=invocation_id,
+        user_content=types.Content(role="user", parts=[types.Part(text=prompt)]),
+        session=SimpleNamespace(events=list(events)),
+    )
+
+
+def answer(invocation_id, text):
+    return Event(author="dev_manager", invocation_id=invocation_id,
+                 content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def make_callbacks(**kwargs):
+    async def head():
+        return "a" * 40
+
+    return ReportCacheCallbacks(TTLCache(), head, "v1", **kwargs)
+
+
+def test_report_is_served_from_the_cache_on_the_second_request():
+    callbacks = make_callbacks()
+
+    async def run():
+        first = await callbacks.before_agent(context("i1", "Status report"))
+        await callbacks.after_agent(context("i1", "Status report", [answer("i1", "All quiet.")]))
+        second = await callbacks.before_agent(context("i2", "status report!"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is None
+    assert second.parts[0].text == "All quiet."
+    assert callbacks._pending == {}
+
+
+def test_unfinished_invocations_do_not_leak(monkeypatch):
+    callbacks = make_callbacks(pending_ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr("dev_manager_agent.report_cache.time.monotonic", lambda: clock[0])
+
+    async def run():
+        # i1 fails before after_agent runs
+        await callbacks.before_agent(context("i1", "Status report"))
+        assert set(callbacks._pending) == {"i1"}
+        clock[0] += 61
+        await callbacks.before_agent(context("i2", "Status report"))
+
+    asyncio.run(run())
+    assert set(callbacks._pending) == {"i2"}
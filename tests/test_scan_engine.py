@@ -0,0 +1,33 @@
+from security_agent.scan_engine import RULES, Rule, ScanEngine, engine
+
+
+def rule_ids(findings):
+    return [f["rule_id"] for f in findings]
+
+
+def test_overlapping_literals_are_all_found():
+    # "delete" and "eval(" overlap; eval( must still reach its rule
+    assert "INS001" in rule_ids(engine.scan("x = deleteval(payload)"))
+
+
+def test_literal_inside_a_longer_match_is_found():
+    findings = engine.scan("selectselect = eval(code)")
+    assert rule_ids(findings) == ["INS001"]
+    assert findings[0]["column"] == 16
+
+
+def test_shorter_literal_sharing_a_start_position():
+    scanner = ScanEngine(RULES + [Rule("TST001", "pickle", "insecure_pattern", r"pickle", ["pickle"], "pickle")])
+    assert rule_ids(scanner.scan("data = pickle.load(f)")) == ["INS002", "TST001"]
+
+
+def test_offsets_survive_case_folding():
+    # "İ" lowercases to two code points, which takes the case-insensitive path
+    findings = engine.scan("İ = 1\nvalue = EVAL(x) or eval(y)")
+    assert [(f["line"], f["column"]) for f in findings] == [(2, 20)]
+
+
+def test_categories_filter():
+    content = 'api_key = "abcdefghijklmnopqrstuvwxyz"\nresult = eval(data)'
+    assert rule_ids(engine.scan(content, ["insecure_pattern"])) == ["INS001"]
+    assert rule_ids(engine.scan(content)) == ["SEC001", "INS001"]
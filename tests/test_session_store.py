@@ -0,0 +1,75 @@
+import asyncio
+
+from google.adk.events import Event
+from google.genai import types
+
+from dev_manager_agent import session_store
+from dev_manager_agent.session_store import COMPACTOR_AUTHOR, SqliteSessionService, closed_boundaries
+
+PADDING = "x" * 400
+
+
+def user_event(index, text="hello"):
+    return Event(author="user", invocation_id=f"inv{index}", timestamp=float(index),
+                 content=types.Content(role="user", parts=[types.Part(text=text)]))
+
+
+def call_event(index, call_id):
+    part = types.Part(function_call=types.FunctionCall(id=call_id, name="tool", args={"padding": PADDING}))
+    return Event(author="agent", invocation_id="inv", timestamp=float(index), content=types.Content(role="model", parts=[part]))
+
+
+def response_event(index, call_id):
+    part = types.Part(function_response=types.FunctionResponse(id=call_id, name="tool", response={"padding": PADDING}))
+    return Event(author="agent", invocation_id="inv", timestamp=float(index), content=types.Content(role="user", parts=[part]))
+
+
+def single_turn(pairs):
+    events = [user_event(0)]
+    for n in range(pairs):
+        events.append(call_event(2 * n + 1, f"call{n}"))
+        events.append(response_event(2 * n + 2, f"call{n}"))
+    return events
+
+
+def append_all(service, events):
+    async def run():
+        session = await service.create_session(app_name="app", user_id="u", session_id="s")
+        for event in events:
+            await service.append_event(session, event)
+        return await service.get_session(app_name="app", user_id="u", session_id="s")
+
+    return asyncio.run(run())
+
+
+def test_closed_boundaries_never_split_a_call_from_its_response():
+    events = single_turn(3)
+    assert closed_boundaries(events) == [1, 3, 5]
+
+
+def test_a_single_long_turn_is_compacted_inside_the_turn(tmp_path):
+    service = SqliteSessionService(str(tmp_path / "sessions.db"), compact_bytes=8 * 1024, keep_recent_events=6)
+    session = append_all(service, single_turn(40))
+
+    assert session.events[0].author == COMPACTOR_AUTHOR
+    assert len(session.events) < 30
+    # Whatever was kept starts with a call, never with an orphaned response
+    kept = session.events[1:]
+    assert kept[0].get_function_calls()
+    assert {c.id for e in kept for c in e.get_function_calls()} >= {r.id for e in kept for r in e.get_function_responses()}
+
+
+def test_sessions_without_a_cut_point_are_not_reloaded_on_every_append(tmp_path, monkeypatch):
+    attempts = []
+    original = session_store.closed_boundaries
+    monkeypatch.setattr(session_store, "closed_boundaries", lambda events: attempts.append(len(events)) or original(events))
+    service = SqliteSessionService(str(tmp_path / "sessions.db"), compact_bytes=4 * 1024, keep_recent_events=4)
+    # Calls that are never answered leave no boundary to cut at
+    events = [user_event(0)] + [call_event(i, f"open{i}") for i in range(1, 200)]
+    session = append_all(service, events)
+
+    assert len(session.events) == 200
+    assert all(e.author != COMPACTOR_AUTHOR for e in session.events)
+    # A retry waits for keep_recent_events new events instead of running on every append
+    assert 0 < len(attempts) < 60
+    assert all(later - earlier >= 4 for earlier, later in zip(attempts, attempts[1:]))
@@ -0,0 +1,53 @@
+import json
+import urllib.parse
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dev_manager_agent.webhooks import parse_payload, sign_payload, webhook_api
+
+SECRET = "s3cret"
+PUSH = {"ref": "refs/heads/main", "repository": {"full_name": "someone-else/other"}, "commits": []}
+
+
+def post(body: bytes, content_type: str):
+    client = TestClient(webhook_api)
+    headers = {
+        "Content-Type": content_type,
+        "X-GitHub-Event": "push",
+        "X-Hub-Signature-256": sign_payload(SECRET, body),
+    }
+    return client.post("/github", content=body, headers=headers)
+
+
+@pytest.fixture(autouse=True)
+def webhook_env(monkeypatch):
+    monkeypatch.setenv("WEBHOOK_SECRET", SECRET)
+    monkeypatch.setenv("GITHUB_REPO_URL", "https://github.com/owner/repo")
+
+
+def test_json_and_form_encoded_payloads_decode_the_same():
+    body = json.dumps(PUSH).encode()
+    form = urllib.parse.urlencode({"payload": json.dumps(PUSH)}).encode()
+
+    assert parse_payload(body, "application/json") == PUSH
+    assert parse_payload(form, "application/x-www-form-urlencoded; charset=utf-8") == PUSH
+
+
+def test_form_encoded_push_is_accepted():
+    form = urllib.parse.urlencode({"payload": json.dumps(PUSH)}).encode()
+    response = post(form, "application/x-www-form-urlencoded")
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "ignored"
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"{not json", "application/json"),
+    (b"[1, 2]", "application/json"),
+    (b"other=field", "application/x-www-form-urlencoded"),
+])
+def test_malformed_signed_payloads_are_rejected_with_400(body, content_type):
+    response = post(body, content_type)
+
+    assert response.status_code == 400
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from dev_manager_agent import work_queue
+from dev_manager_agent.work_queue import DONE, FAILED, QUEUED, RUNNING, CommitQueue
+
+REPO = "acme/app"
+COMMITS = [{"sha": "a" * 40, "message": "First"}, {"sha": "b" * 40, "message": "Second"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(work_queue.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return CommitQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2, retry_delay=10)
+
+
+def test_commits_are_queued_once_and_claimed_in_order(queue):
+    assert queue.enqueue(REPO, COMMITS) == 2
+    assert queue.enqueue(REPO, COMMITS) == 0
+    first, second = queue.claim(), queue.claim()
+    assert [first["sha"], second["sha"]] == ["a" * 40, "b" * 40]
+    assert first["lease"] != second["lease"]
+    assert queue.claim() is None
+
+
+def test_a_worker_whose_lease_expired_cannot_complete(queue, clock):
+    queue.enqueue(REPO, COMMITS[:1])
+    stale = queue.claim()
+    clock[0] += 61
+    current = queue.claim()
+    assert current["sha"] == stale["sha"] and current["attempts"] == 2
+
+    assert queue.complete(REPO, stale["sha"], stale["lease"], {"findings": ["old"]}) is False
+    assert queue.fail(REPO, stale["sha"], stale["lease"], "timed out") is False
+    assert queue.status(REPO, stale["sha"])["status"] == RUNNING
+
+    assert queue.complete(REPO, current["sha"], current["lease"], {"findings": ["new"]}) is True
+    assert queue.results(REPO, [current["sha"]]) == {current["sha"]: {"findings": ["new"]}}
+    # A late completion from the first worker does not overwrite the stored result
+    assert queue.complete(REPO, stale["sha"], stale["lease"], {"findings": ["old"]}) is False
+    assert queue.status(REPO, current["sha"])["status"] == DONE
+
+
+def test_failures_are_retried_then_given_up(queue, clock):
+    queue.enqueue(REPO, COMMITS[:1])
+    item = queue.claim()
+    assert queue.fail(REPO, item["sha"], item["lease"], "boom") is True
+    assert queue.status(REPO, item["sha"])["status"] == QUEUED
+    assert queue.claim() is None  # waiting out the retry delay
+
+    clock[0] += 10
+    item = queue.claim()
+    assert queue.fail(REPO, item["sha"], item["lease"], "boom again") is True
+    entry = queue.status(REPO, item["sha"])
+    assert entry["status"] == FAILED and entry["error"] == "boom again"
+
+
+def test_queues_without_the_lease_column_are_upgraded(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(work_queue.SCHEMA.replace("    lease TEXT,\n", ""))
+    queue = CommitQueue(path)
+    queue.enqueue(REPO, COMMITS[:1])
+    item = queue.claim()
+    assert queue.complete(REPO, item["sha"], item["lease"], {}) is True